@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, status
+from core.database import engine, read_engine
+from core.security import usuario_direcao_token, password_hasher
+from core.token_revocation import token_revocation
+from core.user_cache import user_cache
+from services.alerta_service import AlertaService
+from utils.websocket_endpoints import manager
+from utils.logger import logger
+
+router = APIRouter(prefix="/admin")
+
+
+def _pool_stats() -> dict:
+    stats = {"principal": engine.pool.stats()}
+    if read_engine is not engine:
+        stats["leitura"] = read_engine.pool.stats()
+    return stats
+
+
+@router.get("/pool", status_code=status.HTTP_200_OK)
+async def get_pool_stats(current_user=Depends(usuario_direcao_token)):
+    """Estatísticas em tempo real do pool de conexões com o banco."""
+    logger.info(f"Usuário {current_user.usuario_id} consultando estatísticas do pool de conexões")
+    return _pool_stats()
+
+
+@router.get("/metricas", status_code=status.HTTP_200_OK)
+async def get_metricas(current_user=Depends(usuario_direcao_token)):
+    """Pool de conexões, caches, hashing de senhas, tokens revogados, alertas diários e WebSockets."""
+    logger.info(f"Usuário {current_user.usuario_id} consultando métricas internas")
+    return {
+        "pool": _pool_stats(),
+        "user_cache": user_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        # Por worker: a resposta reflete o processo que atendeu a requisição
+        "tokens_revogados": token_revocation.stats(),
+        "alertas_diarios": AlertaService.ultima_execucao_diaria,
+        "websocket": manager.stats(),
+    }
@@ -3,29 +3,29 @@
 from fastapi import APIRouter, Depends, Query, status # Importar 'status' para HTTP status codes
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.database import get_session
+from core.database import get_session, get_read_session
 
 from services.alerta_service import AlertaService
 
-from core.security import usuario_almoxarifado, direcao_ou_almoxarifado, todos_usuarios
+from core.security import usuario_almoxarifado, direcao_ou_almoxarifado, direcao_ou_almoxarifado_token, todos_usuarios_token
 from models.alerta import TipoAlerta
 
 from schemas.alerta import PaginatedAlertas, AlertaOut
 
 router = APIRouter (prefix="/alertas")
 
-@router.get("/", response_model=list [AlertaOut] , dependencies=[Depends (direcao_ou_almoxarifado)])
-async def listar_todos_alertas (db: AsyncSession = Depends (get_session)):
+@router.get("/", response_model=list [AlertaOut] , dependencies=[Depends(direcao_ou_almoxarifado_token)])
+async def listar_todos_alertas (db: AsyncSession = Depends (get_read_session)):
     """Lista todos os alertas do sistema (sem paginação)."""
     return await AlertaService.get_alertas(db)
 
-@router.get("/paginated", response_model=PaginatedAlertas, dependencies=[Depends (direcao_ou_almoxarifado)])
+@router.get("/paginated", response_model=PaginatedAlertas, dependencies=[Depends(direcao_ou_almoxarifado_token)])
 async def listar_alertas_paginados (
     page: int = Query(1, ge=1, description="Número da página"),
     size: int = Query(10, ge=1, le=100, description="Alertas por página: 5, 10, 25, 50 ou 100"),
     tipo_alerta: int | None = Query (None, description="Filtrar por tipo de alerta (1: Estoque Baixo, 2: Validade Próxima)"),
     search_term: str | None = Query (None, description="Filtrar por mensagem do alerta ou ID do item (parte da string)"),
-    db: AsyncSession = Depends (get_session)
+    db: AsyncSession = Depends (get_read_session)
 ):
     """Lista alertas do sistema com paginação e filtros."""
     return await AlertaService.get_alertas_paginated(db, page, size, tipo_alerta, search_term)
@@ -36,7 +36,7 @@ async def ignorar_alerta (alerta_id: int, db: AsyncSession = Depends (get_sessio
     return await AlertaService.mark_alerta_as_ignorar_novos (db, alerta_id)
 
 #  Endpoint para obter a contagem de alertas não visualizados
-@router.get("/unviewed-count", dependencies=[Depends (todos_usuarios)])
+@router.get("/unviewed-count", dependencies=[Depends(todos_usuarios_token)])
 async def get_unviewed_alerts_count(db: AsyncSession = Depends (get_session)):
     """Retorna o número de alertas não visualizados."""
     count = await AlertaService.get_unviewed_alerts_count(db)
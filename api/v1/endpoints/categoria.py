@@ -3,8 +3,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from schemas.categoria import CategoriaCreate, CategoriaUpdate, CategoriaOut, PaginatedCategorias
 from services.categoria_service import CategoriaService
 from typing import List
-from core.database import get_session
-from core.security import usuario_almoxarifado, direcao_ou_almoxarifado
+from core.database import get_session, get_read_session
+from core.security import usuario_almoxarifado, direcao_ou_almoxarifado_token, usuario_almoxarifado_token
 from utils.logger import logger
 
 router = APIRouter(prefix="/categorias")
@@ -24,13 +24,13 @@ async def create_categoria(
         raise HTTPException(status_code=500, detail="Erro ao criar categoria")
 
 
-@router.get("/buscar", response_model=PaginatedCategorias, dependencies=[Depends(usuario_almoxarifado)])
+@router.get("/buscar", response_model=PaginatedCategorias, dependencies=[Depends(usuario_almoxarifado_token)])
 async def search_categorias(
     nome: str | None = Query(None),
     page: int = Query(1, ge=1),
     size: int = Query(10),
-    db: AsyncSession = Depends(get_session),
-    current_user=Depends(direcao_ou_almoxarifado)
+    db: AsyncSession = Depends(get_read_session),
+    current_user=Depends(direcao_ou_almoxarifado_token)
 ):
     try:
         logger.info(f"Usuário {current_user.usuario_id} buscando categorias (nome={nome}, page={page}, size={size})")
@@ -40,11 +40,11 @@ async def search_categorias(
         raise HTTPException(status_code=500, detail="Erro ao buscar categorias")
 
 
-@router.get("/paginated", response_model=PaginatedCategorias, dependencies=[Depends(direcao_ou_almoxarifado)])
+@router.get("/paginated", response_model=PaginatedCategorias, dependencies=[Depends(direcao_ou_almoxarifado_token)])
 async def get_items_paginated(
     page: int = Query(1, ge=1),
     size: int = Query(10),
-    db: AsyncSession = Depends(get_session)
+    db: AsyncSession = Depends(get_read_session)
 ):
     try:
         logger.info(f"Listando categorias paginadas (page={page}, size={size})")
@@ -55,7 +55,7 @@ async def get_items_paginated(
 
 
 @router.get("/", response_model=List[CategoriaOut])
-async def get_categorias(db: AsyncSession = Depends(get_session), current_user=Depends(direcao_ou_almoxarifado)):
+async def get_categorias(db: AsyncSession = Depends(get_read_session), current_user=Depends(direcao_ou_almoxarifado_token)):
     try:
         logger.info(f"Usuário {current_user.usuario_id} listando todas as categorias")
         return await CategoriaService.get_categorias(db)
@@ -65,7 +65,7 @@ async def get_categorias(db: AsyncSession = Depends(get_session), current_user=D
 
 
 @router.get("/{categoria_id}", response_model=CategoriaOut)
-async def get_categoria_by_id(categoria_id: int, db: AsyncSession = Depends(get_session), current_user=Depends(direcao_ou_almoxarifado)):
+async def get_categoria_by_id(categoria_id: int, db: AsyncSession = Depends(get_session), current_user=Depends(direcao_ou_almoxarifado_token)):
     try:
         logger.info(f"Usuário {current_user.usuario_id} consultando categoria por ID: {categoria_id}")
         return await CategoriaService.get_categoria_by_id(db, categoria_id)
@@ -75,7 +75,7 @@ async def get_categoria_by_id(categoria_id: int, db: AsyncSession = Depends(get_
 
 
 @router.get("/{categoria_name}", response_model=CategoriaOut)
-async def get_categoria_by_name(categoria_name: str, db: AsyncSession = Depends(get_session), current_user=Depends(direcao_ou_almoxarifado)):
+async def get_categoria_by_name(categoria_name: str, db: AsyncSession = Depends(get_session), current_user=Depends(direcao_ou_almoxarifado_token)):
     try:
         logger.info(f"Usuário {current_user.usuario_id} consultando categoria por nome: {categoria_name}")
         return await CategoriaService.get_categoria_by_name(db, categoria_name)
@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends, status, Query, UploadFile, File, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, status, Query, UploadFile, File, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from core.database import get_session
-from core.security import usuario_almoxarifado, direcao_ou_almoxarifado, todos_usuarios
+from core.database import get_session, get_read_session
+from core.security import usuario_almoxarifado, direcao_ou_almoxarifado_token, todos_usuarios_token, usuario_almoxarifado_token
 from schemas.item import (
     ItemOut,
     ItemCreate,
     ItemUpdate,
     PaginatedItems,
     BulkItemUploadResult,
+    BulkUploadJobStatus,
 )
 from services.item_service import ItemService
 from utils.logger import logger
@@ -32,33 +34,48 @@ async def search_items(
     categoria: str | None = Query(None),
     page: int = Query(1, ge=1),
     size: int = Query(10),
-    db: AsyncSession = Depends(get_session),
-    current_user=Depends(todos_usuarios),
+    relevancia: bool = Query(True, description="Ordena pela similaridade com 'nome' (senão, alfabética)"),
+    cursor: str | None = Query(None, description="next_cursor da resposta anterior (ignora 'page')"),
+    db: AsyncSession = Depends(get_read_session),
+    current_user=Depends(todos_usuarios_token),
 ):
     try:
         logger.info(f"Usuário {current_user.usuario_id} buscando itens (nome={nome}, categoria={categoria}, page={page})")
-        return await ItemService.search_items_paginated(db, nome_produto=nome, nome_categoria=categoria, page=page, size=size)
+        return await ItemService.search_items_paginated(
+            db,
+            nome_produto=nome,
+            nome_categoria=categoria,
+            page=page,
+            size=size,
+            por_relevancia=relevancia,
+            cursor=cursor,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao buscar itens: {e}")
         raise HTTPException(status_code=500, detail="Erro ao buscar itens")
 
 
-@router.get("/paginated", response_model=PaginatedItems, dependencies=[Depends(todos_usuarios)])
+@router.get("/paginated", response_model=PaginatedItems, dependencies=[Depends(todos_usuarios_token)])
 async def get_items_paginated(
     page: int = Query(1, ge=1),
     size: int = Query(10),
-    db: AsyncSession = Depends(get_session),
+    cursor: str | None = Query(None, description="next_cursor da resposta anterior (ignora 'page')"),
+    db: AsyncSession = Depends(get_read_session),
 ):
     try:
-        logger.info(f"Listando itens paginados (page={page}, size={size})")
-        return await ItemService.get_items_paginated(db, page, size)
+        logger.info(f"Listando itens paginados (page={page}, size={size}, cursor={cursor})")
+        return await ItemService.get_items_paginated(db, page, size, cursor)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao listar itens paginados: {e}")
         raise HTTPException(status_code=500, detail="Erro ao listar itens")
 
 
 @router.get("/", response_model=List[ItemOut])
-async def get_itens(db: AsyncSession = Depends(get_session), current_user=Depends(direcao_ou_almoxarifado)):
+async def get_itens(db: AsyncSession = Depends(get_read_session), current_user=Depends(direcao_ou_almoxarifado_token)):
     try:
         logger.info(f"Usuário {current_user.usuario_id} listando todos os itens")
         return await ItemService.get_itens(db)
@@ -67,8 +84,31 @@ async def get_itens(db: AsyncSession = Depends(get_session), current_user=Depend
         raise HTTPException(status_code=500, detail="Erro ao listar itens")
 
 
+@router.get("/exportar", response_class=StreamingResponse)
+async def export_items(
+    formato: str = Query("ndjson", description="ndjson ou csv"),
+    nome: str | None = Query(None),
+    categoria: str | None = Query(None),
+    db: AsyncSession = Depends(get_read_session),
+    current_user=Depends(direcao_ou_almoxarifado_token),
+):
+    try:
+        logger.info(f"Usuário {current_user.usuario_id} exportando itens (formato={formato}, nome={nome}, categoria={categoria})")
+        exporter = await ItemService.export_items(db, formato, nome, categoria)
+        return StreamingResponse(
+            exporter.stream(),
+            media_type=exporter.media_type,
+            headers={"Content-Disposition": f'attachment; filename="{exporter.filename}"'},
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao exportar itens: {e}")
+        raise HTTPException(status_code=500, detail="Erro ao exportar itens")
+
+
 @router.get("/{item_id}", response_model=ItemOut)
-async def get_item(item_id: int, db: AsyncSession = Depends(get_session), current_user=Depends(todos_usuarios)):
+async def get_item(item_id: int, db: AsyncSession = Depends(get_session), current_user=Depends(todos_usuarios_token)):
     try:
         logger.info(f"Usuário {current_user.usuario_id} consultando item ID {item_id}")
         return await ItemService.get_item_by_id(db, item_id)
@@ -82,6 +122,8 @@ async def delete_item(item_id: int, db: AsyncSession = Depends(get_session), cur
     try:
         logger.info(f"Usuário {current_user.usuario_id} deletando item ID {item_id}")
         return await ItemService.delete_item(db, item_id)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao deletar item ID {item_id}: {e}")
         raise HTTPException(status_code=500, detail="Erro ao deletar item")
@@ -92,6 +134,8 @@ async def update_item(item_id: int, item: ItemUpdate, db: AsyncSession = Depends
     try:
         logger.info(f"Usuário {current_user.usuario_id} atualizando item ID {item_id} para: {item.nome_item}")
         return await ItemService.update_item(db, item_id, item, current_user)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao atualizar item ID {item_id}: {e}")
         raise HTTPException(status_code=500, detail="Erro ao atualizar item")
@@ -105,3 +149,35 @@ async def upload_items_bulk(file: UploadFile = File(...), db: AsyncSession = Dep
     except Exception as e:
         logger.error(f"Erro no upload em massa de itens: {e}")
         raise HTTPException(status_code=500, detail="Erro ao processar upload de itens")
+
+
+@router.post("/upload-bulk/async", response_model=BulkUploadJobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def upload_items_bulk_async(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    current_user=Depends(usuario_almoxarifado),
+):
+    """Agenda o upload em massa em segundo plano e retorna o job para acompanhamento."""
+    try:
+        logger.info(f"Usuário {current_user.usuario_id} agendou upload em massa de itens: {file.filename}")
+        job = await ItemService.create_bulk_upload_job(file, current_user.usuario_id)
+        background_tasks.add_task(ItemService.run_bulk_upload_job, job.job_id)
+        return job
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao agendar upload em massa de itens: {e}")
+        raise HTTPException(status_code=500, detail="Erro ao agendar upload de itens")
+
+
+@router.get("/upload-bulk/jobs/{job_id}", response_model=BulkUploadJobStatus)
+async def get_upload_bulk_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_session),
+    current_user=Depends(usuario_almoxarifado_token),
+):
+    """
+    Consulta o progresso de um upload em massa agendado pelo próprio usuário.
+    Os contadores avançam a cada lote; a lista de erros é preenchida quando o job termina.
+    """
+    return await ItemService.get_bulk_upload_job(db, job_id, current_user.usuario_id)
@@ -3,9 +3,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import FileResponse
 from datetime import datetime
 import os
-from core.database import get_session
+from core.database import get_read_session
 from services.relatorio_service import RelatorioService
-from core.security import direcao_ou_almoxarifado
+from core.security import direcao_ou_almoxarifado_token
 from utils.logger import logger
 
 router = APIRouter()
@@ -16,8 +16,8 @@ async def gerar_relatorio_quantidade(
     filtro_categoria: str = Query(None),
     filtro_produto: str = Query(None),
     formato: str = Query("csv"),
-    db: AsyncSession = Depends(get_session),
-    current_user=Depends(direcao_ou_almoxarifado)
+    db: AsyncSession = Depends(get_read_session),
+    current_user=Depends(direcao_ou_almoxarifado_token)
 ):
     try:
         logger.info(
@@ -48,8 +48,8 @@ async def gerar_relatorio_entrada(
     data_inicio: datetime = Query(...),
     data_fim: datetime = Query(...),
     formato: str = Query("csv"),
-    db: AsyncSession = Depends(get_session),
-    current_user=Depends(direcao_ou_almoxarifado)
+    db: AsyncSession = Depends(get_read_session),
+    current_user=Depends(direcao_ou_almoxarifado_token)
 ):
     try:
         logger.info(
@@ -82,8 +82,8 @@ async def gerar_relatorio_retiradas_setor(
     data_inicio: datetime = Query(...),
     data_fim: datetime = Query(...),
     formato: str = Query("csv"),
-    db: AsyncSession = Depends(get_session),
-    current_user=Depends(direcao_ou_almoxarifado)
+    db: AsyncSession = Depends(get_read_session),
+    current_user=Depends(direcao_ou_almoxarifado_token)
 ):
     try:
         logger.info(
@@ -111,8 +111,8 @@ async def gerar_relatorio_retiradas_usuario(
     data_inicio: datetime = Query(...),
     data_fim: datetime = Query(...),
     formato: str = Query("csv"),
-    db: AsyncSession = Depends(get_session),
-    current_user=Depends(direcao_ou_almoxarifado)
+    db: AsyncSession = Depends(get_read_session),
+    current_user=Depends(direcao_ou_almoxarifado_token)
 ):
     try:
         logger.info(
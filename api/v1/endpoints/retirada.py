@@ -4,13 +4,13 @@ from datetime import datetime
 from fastapi import APIRouter, Depends, status, Query, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.database import get_session
+from core.database import get_session, get_read_session
 from schemas.retirada import (
     RetiradaCreate, RetiradaUpdateStatus, RetiradaOut,
     RetiradaPaginated, RetiradaFilterParams, StatusEnum
 )
 from services.retirada_service import RetiradaService
-from core.security import todos_usuarios, usuario_almoxarifado, direcao_ou_almoxarifado
+from core.security import todos_usuarios, usuario_almoxarifado, direcao_ou_almoxarifado, direcao_ou_almoxarifado_token, todos_usuarios_token
 from utils.logger import logger
 
 router = APIRouter(prefix="/retiradas")
@@ -27,6 +27,8 @@ async def solicitar_retirada(
         logger.info(f"Usuário {current_user.username} solicitou uma retirada de itens")
         # Passa o ID e o tipo de usuário logado para o serviço
         return await RetiradaService.solicitar_retirada(db, retirada, current_user.usuario_id, current_user.tipo_usuario)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao solicitar retirada: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Erro ao solicitar retirada")
@@ -43,6 +45,8 @@ async def atualizar_status_retirada(
     try:
         logger.info(f"Usuário {current_user.usuario_id} atualizou status da retirada {retirada_id}")
         return await RetiradaService.atualizar_status(db, retirada_id, status_data, current_user.usuario_id)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao atualizar status da retirada {retirada_id}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Erro ao atualizar status da retirada")
@@ -56,8 +60,8 @@ async def atualizar_status_retirada(
 async def listar_retiradas_paginadas(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
-    db: AsyncSession = Depends(get_session),
-    current_user=Depends(direcao_ou_almoxarifado)
+    db: AsyncSession = Depends(get_read_session),
+    current_user=Depends(direcao_ou_almoxarifado_token)
 ):
     """Lista todas as retiradas com paginação. Apenas para usuários do almoxarifado."""
     return await RetiradaService.get_retiradas_paginadas(db, page, page_size)
@@ -71,8 +75,8 @@ async def listar_retiradas_paginadas(
 async def listar_pendentes_paginados(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
-    db: AsyncSession = Depends(get_session),
-    current_user=Depends(todos_usuarios) # Pode ser acessado por todos, mas o serviço deve filtrar
+    db: AsyncSession = Depends(get_read_session),
+    current_user=Depends(todos_usuarios_token) # Pode ser acessado por todos, mas o serviço deve filtrar
 ):
     """Lista retiradas pendentes com paginação."""
     return await RetiradaService.get_retiradas_pendentes_paginated(db, page, page_size)
@@ -90,8 +94,8 @@ async def buscar_retiradas(
     end_date: datetime | None = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
-    db: AsyncSession = Depends(get_session),
-    current_user=Depends(direcao_ou_almoxarifado)
+    db: AsyncSession = Depends(get_read_session),
+    current_user=Depends(direcao_ou_almoxarifado_token)
 ):
     """Busca retiradas com filtros e paginação. Apenas para usuários do almoxarifado."""
     params = RetiradaFilterParams(
@@ -107,7 +111,7 @@ async def buscar_retiradas(
 async def get_retirada(
     retirada_id: int,
     db: AsyncSession = Depends(get_session),
-    current_user=Depends(direcao_ou_almoxarifado)
+    current_user=Depends(direcao_ou_almoxarifado_token)
 ):
     """Recupera uma retirada específica pelo ID. Apenas para usuários do almoxarifado."""
     return await RetiradaService.get_retirada_by_id(db, retirada_id)
@@ -121,8 +125,8 @@ async def get_retirada(
 async def listar_minhas_retiradas_paginadas(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
-    db: AsyncSession = Depends(get_session),
-    current_user=Depends(todos_usuarios) # Acessível por qualquer usuário logado
+    db: AsyncSession = Depends(get_read_session),
+    current_user=Depends(todos_usuarios_token) # Acessível por qualquer usuário logado
 ):
     """Lista as retiradas solicitadas pelo usuário logado, com paginação."""
     return await RetiradaService.get_retiradas_by_user_paginated(db, current_user.usuario_id, page, page_size)
@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from core.database import get_session
+from core.database import get_session, get_read_session
 from schemas.setor import SetorCreate, SetorUpdate, SetorOut
 from services.setor_service import SetorService
 from typing import List
-from core.security import usuario_direcao, todos_usuarios
+from core.security import usuario_direcao, todos_usuarios_token
 from utils.logger import logger
 
 router = APIRouter(prefix="/setores")
@@ -26,8 +26,8 @@ async def create_setor(
 
 @router.get("/", response_model=List[SetorOut], status_code=status.HTTP_200_OK)
 async def get_setores(
-    db: AsyncSession = Depends(get_session),
-    current_user=Depends(todos_usuarios)
+    db: AsyncSession = Depends(get_read_session),
+    current_user=Depends(todos_usuarios_token)
 ):
     try:
         logger.info(f"Usuário {current_user.usuario_id} listando todos os setores")
@@ -41,7 +41,7 @@ async def get_setores(
 async def get_setor_by_id(
     setor_id: int,
     db: AsyncSession = Depends(get_session),
-    current_user=Depends(todos_usuarios)
+    current_user=Depends(todos_usuarios_token)
 ):
     try:
         logger.info(f"Usuário {current_user.usuario_id} consultando setor ID {setor_id}")
@@ -4,8 +4,8 @@ from fastapi import APIRouter, Depends, status, Response, HTTPException, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from core.database import get_session
-from core.security import usuario_direcao, direcao_ou_almoxarifado, todos_usuarios
+from core.database import get_session, get_read_session
+from core.security import usuario_direcao, todos_usuarios, direcao_ou_almoxarifado_token, todos_usuarios_token
 from schemas.usuario import (
     UsuarioOut,
     UsuarioCreate,
@@ -61,8 +61,8 @@ async def create_user(
 
 @router.get("/", response_model=List[UsuarioOut], status_code=status.HTTP_200_OK)
 async def get_usuarios(
-    db: AsyncSession = Depends(get_session),
-    current_user=Depends(direcao_ou_almoxarifado),
+    db: AsyncSession = Depends(get_read_session),
+    current_user=Depends(direcao_ou_almoxarifado_token),
 ):
     try:
         logger.info(f"Usuário {current_user.usuario_id} listando todos os usuários")
@@ -74,8 +74,8 @@ async def get_usuarios(
 @router.get("/search", response_model=List[UsuarioOut], status_code=status.HTTP_200_OK)
 async def search_usuarios(
     query: str = Query(..., min_length=1, description="Termo de busca para nome de usuário ou SIApe"),
-    db: AsyncSession = Depends(get_session),
-    current_user=Depends(direcao_ou_almoxarifado),
+    db: AsyncSession = Depends(get_read_session),
+    current_user=Depends(direcao_ou_almoxarifado_token),
 ):
     """Busca usuários por nome de usuário ou SIApe."""
     try:
@@ -90,7 +90,7 @@ async def search_usuarios(
 async def get_usuario(
     usuario_id: int,
     db: AsyncSession = Depends(get_session),
-    current_user=Depends(todos_usuarios),
+    current_user=Depends(todos_usuarios_token),
 ):
     try:
         logger.info(f"Usuário {current_user.usuario_id} consultando usuário ID {usuario_id}")
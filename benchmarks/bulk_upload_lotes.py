@@ -0,0 +1,102 @@
+# benchmarks/bulk_upload_lotes.py
+"""
+Importa o mesmo arquivo gerado (benchmarks.dados) com vários tamanhos de lote
+(o batch_size do ItemBulkProcessor.process_file, padrão BULK_UPLOAD_BATCH_SIZE) e
+mostra linhas/s de cada um. Cada rodada parte de um banco vazio.
+
+Lotes maiores que BULK_UPLOAD_CHUNK_SIZE ficam limitados ao bloco lido do arquivo;
+--chunk-size muda o bloco só para o benchmark.
+
+Precisa de um PostgreSQL descartável (as tabelas são apagadas e recriadas), o mesmo
+TEST_DATABASE_URL dos testes em tests/:
+
+    TEST_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.bulk_upload_lotes --linhas 20000 --lotes 50 200 500 1000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if not TEST_DATABASE_URL:
+    sys.exit("TEST_DATABASE_URL não definida (requer PostgreSQL descartável)")
+
+# As configurações são lidas na importação; o banco de teste substitui o da aplicação
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+os.environ.pop("DATABASE_URL_READ", None)
+os.environ.setdefault("JWT_SECRET", "benchmark")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+from sqlalchemy import text
+
+from benchmarks.dados import gerar_planilha
+from core.configs import settings
+from core.database import SessionLocal, engine
+from models import Setor, Usuario
+from models.usuario import RoleEnum
+from services.bulk_processor import ItemBulkProcessor
+from services.categoria_index import categoria_index
+
+
+async def _preparar_banco() -> int:
+    """Recria o schema vazio com um usuário para a auditoria; retorna o usuario_id."""
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(settings.DBBaseModel.metadata.drop_all)
+        await conn.run_sync(settings.DBBaseModel.metadata.create_all)
+    # O índice de categorias em memória guardaria ids do schema anterior
+    categoria_index.invalidar()
+
+    async with SessionLocal() as db:
+        setor = Setor(nome_setor="Setor de benchmark")
+        db.add(setor)
+        await db.flush()
+        usuario = Usuario(
+            nome_usuario="Almoxarife",
+            tipo_usuario=RoleEnum.USUARIO_ALMOXARIFADO.value,
+            email_usuario="almoxarife@benchmark",
+            senha_usuario="x",
+            setor_id=setor.setor_id,
+            username="almoxarife",
+        )
+        db.add(usuario)
+        await db.commit()
+        return usuario.usuario_id
+
+
+async def main(linhas: int, lotes: list[int], chunk_size: int | None):
+    if chunk_size:
+        settings.BULK_UPLOAD_CHUNK_SIZE = chunk_size
+    with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as arquivo:
+        caminho = arquivo.name
+    gerar_planilha(linhas).to_csv(caminho, index=False, encoding="utf-8")
+
+    try:
+        print(f"{linhas} linhas; BULK_UPLOAD_CHUNK_SIZE={settings.BULK_UPLOAD_CHUNK_SIZE}")
+        print(f"{'lote':>6} {'segundos':>9} {'linhas/s':>9} {'criados':>8} {'atualizados':>12} {'erros':>6}")
+        for lote in lotes:
+            usuario_id = await _preparar_banco()
+            async with SessionLocal() as db:
+                inicio = time.perf_counter()
+                resultado = await ItemBulkProcessor(db, usuario_id).process_file(caminho, "csv", batch_size=lote)
+                duracao = time.perf_counter() - inicio
+            print(
+                f"{lote:>6} {duracao:>9.2f} {linhas / duracao:>9.0f} {resultado.items_created:>8}"
+                f" {resultado.items_updated:>12} {len(resultado.errors):>6}"
+            )
+    finally:
+        os.remove(caminho)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=20000, help="linhas do arquivo gerado")
+    parser.add_argument("--lotes", type=int, nargs="+", default=[50, 200, 500, 1000], help="tamanhos de lote")
+    parser.add_argument("--chunk-size", type=int, default=None, help="substitui BULK_UPLOAD_CHUNK_SIZE")
+    args = parser.parse_args()
+    asyncio.run(main(args.linhas, args.lotes, args.chunk_size))
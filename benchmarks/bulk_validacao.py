@@ -0,0 +1,162 @@
+# benchmarks/bulk_validacao.py
+"""
+Tempo da validação de uma planilha grande (padrão 100 mil linhas), sem banco:
+
+- por_linha: o antigo processamento linha a linha (iterrows + _parse_row/_parse_date,
+  reproduzido abaixo como referência);
+- vetorizado: o pré-processamento atual por colunas (ItemBulkProcessor._validate_dataframe,
+  com _parse_dates).
+
+Os dois recebem os mesmos blocos de BULK_UPLOAD_CHUNK_SIZE linhas, como no upload, e o
+script compara o resultado linha a linha. A diferença esperada são células vazias lidas
+como NaN: o caminho antigo as transformava no texto "nan" (aceitando, por exemplo, uma
+unidade de medida em branco); o atual as rejeita.
+
+    python -m benchmarks.bulk_validacao --linhas 100000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://benchmark@localhost/benchmark") # não conecta
+os.environ.setdefault("JWT_SECRET", "benchmark")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+import pandas as pd
+
+from benchmarks.dados import gerar_planilha
+from core.configs import settings
+from services.bulk_processor import ItemBulkProcessor
+from utils.normalizar_texto import normalize_name
+
+
+def _parse_date_por_linha(raw_value, produto_raw: str):
+    if raw_value is pd.NA or pd.isna(raw_value):
+        return None
+    if isinstance(raw_value, datetime):
+        return raw_value.date()
+    parsed = pd.to_datetime(raw_value, errors="coerce", format="%d/%m/%Y")
+    if pd.isna(parsed):
+        parsed = pd.to_datetime(raw_value, errors="coerce")
+    if pd.isna(parsed):
+        raise ValueError(f"Formato de validade inválido para '{produto_raw}': {raw_value}")
+    return parsed.date()
+
+
+def _parse_row_por_linha(category_map: dict, idx: int, row) -> dict:
+    produto_raw = str(row["produto"]).strip()
+    if not produto_raw:
+        raise ValueError("Nome do produto não pode ser vazio.")
+
+    qtd_raw = row["quantidade"]
+    if pd.isna(qtd_raw) or not str(qtd_raw).strip().isdigit():
+        raise ValueError("Quantidade inválida ou vazia.")
+    quantidade = int(qtd_raw)
+    if quantidade <= 0:
+        raise ValueError("Quantidade deve ser maior que zero.")
+
+    unidade = str(row["unidade de medida"]).strip()
+    if not unidade:
+        raise ValueError("Unidade de medida não pode ser vazia.")
+
+    if "descrição" in row and pd.notna(row["descrição"]) and str(row["descrição"]).strip():
+        descricao = str(row["descrição"]).strip()
+    else:
+        descricao = f"{produto_raw} {unidade}"
+
+    marca = str(row.get("marca", "")).strip() if pd.notna(row.get("marca")) else None
+    # Marca em branco é o mesmo que sem marca (ajuste posterior, aplicado aqui para comparar)
+    marca = marca or None
+
+    validade = _parse_date_por_linha(row.get("validade"), produto_raw)
+
+    cat_raw = str(row["categoria"]).strip()
+    categoria_id = category_map.get(normalize_name(cat_raw))
+    if not categoria_id:
+        raise ValueError(f"Falha ao encontrar ou criar a categoria '{cat_raw}'.")
+
+    return {
+        "row": idx + 2,
+        "chave": (normalize_name(produto_raw), categoria_id, validade, marca),
+        "nome_item_original": produto_raw,
+        "descricao_item": descricao,
+        "unidade_medida_item": unidade,
+        "quantidade_item": quantidade,
+    }
+
+
+def validar_por_linha(processor: ItemBulkProcessor, df: pd.DataFrame) -> tuple[list[dict], list[dict]]:
+    registros, erros = [], []
+    for idx, row in df.iterrows():
+        try:
+            registros.append(_parse_row_por_linha(processor.category_map, idx, row))
+        except ValueError as ve:
+            erros.append({"row": idx + 2, "error": str(ve)})
+    return registros, erros
+
+
+def _blocos(planilha: pd.DataFrame, tamanho: int) -> list[pd.DataFrame]:
+    # Mesmo formato que o upload recebe: colunas normalizadas, índice = posição no arquivo
+    blocos = []
+    for inicio in range(0, len(planilha), tamanho):
+        bloco = planilha.iloc[inicio:inicio + tamanho].copy()
+        blocos.append(ItemBulkProcessor._normalize_columns(None, bloco))
+    return blocos
+
+
+def _medir(validar, processor, blocos) -> tuple[float, list[dict], list[dict]]:
+    registros, erros = [], []
+    inicio = time.perf_counter()
+    for bloco in blocos:
+        r, e = validar(processor, bloco)
+        registros.extend(r)
+        erros.extend(e)
+    return time.perf_counter() - inicio, registros, erros
+
+
+def main(linhas: int):
+    # Ida e volta pelo CSV: as colunas chegam com os mesmos tipos que no upload
+    planilha = gerar_planilha(linhas)
+    with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as arquivo:
+        caminho = arquivo.name
+    planilha.to_csv(caminho, index=False, encoding="utf-8")
+    try:
+        planilha = pd.read_csv(caminho, encoding="utf-8")
+    finally:
+        os.remove(caminho)
+
+    processor = ItemBulkProcessor(None, 1)
+    categorias = planilha["Categoria"].astype(str).str.strip().unique()
+    processor.category_map = {normalize_name(nome): i for i, nome in enumerate(categorias, start=1)}
+    blocos = _blocos(planilha, settings.BULK_UPLOAD_CHUNK_SIZE)
+
+    t_linha, reg_linha, err_linha = _medir(validar_por_linha, processor, blocos)
+    t_vetor, reg_vetor, err_vetor = _medir(ItemBulkProcessor._validate_dataframe, processor, blocos)
+
+    print(f"{linhas} linhas em blocos de {settings.BULK_UPLOAD_CHUNK_SIZE}")
+    print(f"{'modo':<11} {'segundos':>9} {'linhas/s':>10} {'válidas':>8} {'erros':>6}")
+    for nome, duracao, registros, erros in (
+        ("por_linha", t_linha, reg_linha, err_linha),
+        ("vetorizado", t_vetor, reg_vetor, err_vetor),
+    ):
+        print(f"{nome:<11} {duracao:>9.2f} {linhas / duracao:>10.0f} {len(registros):>8} {len(erros):>6}")
+    print(f"ganho: {t_linha / t_vetor:.1f}x")
+
+    # Resultado de cada linha: o registro gerado ou a mensagem de erro
+    por_linha = {r["row"]: r for r in reg_linha} | {e["row"]: e["error"] for e in err_linha}
+    vetorizado = {r["row"]: r for r in reg_vetor} | {e["row"]: e["error"] for e in err_vetor}
+    diferentes = [row for row in sorted(por_linha) if por_linha[row] != vetorizado.get(row)]
+    print(f"linhas com resultado diferente: {len(diferentes)}")
+    for row in diferentes[:3]:
+        print(f"  linha {row}: por_linha={por_linha[row]!r} vetorizado={vetorizado.get(row)!r}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=100_000, help="linhas da planilha gerada")
+    args = parser.parse_args()
+    main(args.linhas)
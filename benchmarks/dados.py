@@ -0,0 +1,45 @@
+# benchmarks/dados.py
+"""Planilhas sintéticas de upload em massa, com as colunas que o ItemBulkProcessor espera."""
+
+import random
+from datetime import date, timedelta
+
+import pandas as pd
+
+UNIDADES = ["un", "cx", "pct", "kg", "l"]
+MARCAS = ["Acme", "Tramontina", "Faber", "", None]
+
+
+def gerar_planilha(linhas: int, itens_distintos: int = 5000, categorias: int = 40,
+                   taxa_erros: float = 0.02, semente: int = 42) -> pd.DataFrame:
+    """
+    Gera `linhas` linhas sorteando entre `itens_distintos` produtos (repetições viram
+    atualizações do mesmo item) e `categorias` categorias. Cerca de `taxa_erros` das
+    linhas têm um problema de validação (quantidade, unidade ou validade inválida).
+    """
+    aleatorio = random.Random(semente)
+    hoje = date.today()
+    registros = []
+    for _ in range(linhas):
+        n = aleatorio.randrange(itens_distintos)
+        validade = hoje + timedelta(days=30 + n % 700)
+        registro = {
+            "Produto": f"Produto {n}",
+            "Quantidade": aleatorio.randint(1, 50),
+            "Unidade de Medida": UNIDADES[n % len(UNIDADES)],
+            "Categoria": f"Categoria {n % categorias}",
+            "Descrição": f"Descrição do produto {n}" if n % 3 else "",
+            "Marca": MARCAS[n % len(MARCAS)],
+            # Parte das datas fora do dd/mm/YYYY exercita a inferência de formato
+            "Validade": validade.strftime("%d/%m/%Y") if n % 10 else validade.isoformat(),
+        }
+        if aleatorio.random() < taxa_erros:
+            problema = aleatorio.randrange(3)
+            if problema == 0:
+                registro["Quantidade"] = "abc"
+            elif problema == 1:
+                registro["Unidade de Medida"] = ""
+            else:
+                registro["Validade"] = "31/31/2031"
+        registros.append(registro)
+    return pd.DataFrame(registros)
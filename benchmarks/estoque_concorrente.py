@@ -0,0 +1,146 @@
+# benchmarks/estoque_concorrente.py
+"""
+K tarefas concorrentes baixando o estoque do mesmo item, em dois modos:
+
+- versao: leitura-modificação-escrita com Item.versao (concorrência otimista) dentro
+  de utils.concorrencia.com_retentativas, o caminho usado pelo ItemService;
+- for_update: SELECT ... FOR UPDATE seguido da mesma escrita (bloqueio pessimista).
+
+Mostra operações/s, tentativas repetidas por conflito de versão e quantas operações
+desistiram com 409, e confere que o estoque final bate com as baixas concluídas.
+
+Precisa de um PostgreSQL descartável (as tabelas são apagadas e recriadas), o mesmo
+TEST_DATABASE_URL dos testes em tests/:
+
+    TEST_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.estoque_concorrente --tarefas 10
+
+Com mais tarefas que DB_POOL_SIZE + DB_MAX_OVERFLOW, parte delas espera por conexão.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if not TEST_DATABASE_URL:
+    sys.exit("TEST_DATABASE_URL não definida (requer PostgreSQL descartável)")
+
+# As configurações são lidas na importação; o banco de teste substitui o da aplicação
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+os.environ.pop("DATABASE_URL_READ", None)
+os.environ.setdefault("JWT_SECRET", "benchmark")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+from fastapi import HTTPException
+from sqlalchemy import select, text
+
+from core.configs import settings
+from core.database import SessionLocal, engine
+from models import Categoria, Item, Setor, Usuario
+from models.usuario import RoleEnum
+from utils.concorrencia import com_retentativas
+
+
+async def _preparar_banco(estoque: int) -> int:
+    """Recria o schema com um único item; retorna o item_id."""
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(settings.DBBaseModel.metadata.drop_all)
+        await conn.run_sync(settings.DBBaseModel.metadata.create_all)
+
+    async with SessionLocal() as db:
+        setor = Setor(nome_setor="Setor de benchmark")
+        categoria = Categoria(nome_categoria="benchmark", nome_original="Benchmark")
+        db.add_all([setor, categoria])
+        await db.flush()
+        usuario = Usuario(
+            nome_usuario="Almoxarife",
+            tipo_usuario=RoleEnum.USUARIO_ALMOXARIFADO.value,
+            email_usuario="almoxarife@benchmark",
+            senha_usuario="x",
+            setor_id=setor.setor_id,
+            username="almoxarife",
+        )
+        db.add(usuario)
+        await db.flush()
+        item = Item(
+            nome_item="parafuso",
+            nome_item_original="Parafuso",
+            descricao_item="Parafuso de benchmark",
+            unidade_medida_item="un",
+            quantidade_item=estoque,
+            quantidade_minima_item=0,
+            categoria_id=categoria.categoria_id,
+            auditoria_usuario_id=usuario.usuario_id,
+        )
+        db.add(item)
+        await db.commit()
+        return item.item_id
+
+
+async def _rodada(modo: str, item_id: int, tarefas: int, operacoes: int) -> dict:
+    contagem = {"tentativas": 0, "concluidas": 0, "conflitos_409": 0}
+
+    async def baixar(db):
+        contagem["tentativas"] += 1
+        query = select(Item).where(Item.item_id == item_id).execution_options(populate_existing=True)
+        if modo == "for_update":
+            query = query.with_for_update()
+        item = await db.scalar(query)
+        item.quantidade_item -= 1
+        await db.commit()
+
+    async def tarefa():
+        async with SessionLocal() as db:
+            for _ in range(operacoes):
+                try:
+                    if modo == "versao":
+                        await com_retentativas(db, lambda: baixar(db), "item")
+                    else:
+                        await baixar(db)
+                    contagem["concluidas"] += 1
+                except HTTPException as e:
+                    if e.status_code != 409:
+                        raise
+                    contagem["conflitos_409"] += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(tarefa() for _ in range(tarefas)))
+    duracao = time.perf_counter() - inicio
+
+    return {
+        **contagem,
+        "retentativas": contagem["tentativas"] - tarefas * operacoes,
+        "segundos": round(duracao, 3),
+        "operacoes_por_s": round(contagem["concluidas"] / duracao, 1),
+    }
+
+
+async def main(tarefas: int, operacoes: int):
+    estoque_inicial = tarefas * operacoes
+    try:
+        print(f"{tarefas} tarefas x {operacoes} baixas; OPTIMISTIC_LOCK_MAX_RETRIES={settings.OPTIMISTIC_LOCK_MAX_RETRIES}")
+        print(f"{'modo':<11} {'ops/s':>8} {'concluídas':>11} {'retentativas':>13} {'409':>5} {'estoque ok':>11}")
+        for modo in ("versao", "for_update"):
+            item_id = await _preparar_banco(estoque_inicial)
+            r = await _rodada(modo, item_id, tarefas, operacoes)
+            async with SessionLocal() as db:
+                estoque = await db.scalar(select(Item.quantidade_item).where(Item.item_id == item_id))
+            consistente = estoque == estoque_inicial - r["concluidas"]
+            print(
+                f"{modo:<11} {r['operacoes_por_s']:>8} {r['concluidas']:>11} {r['retentativas']:>13}"
+                f" {r['conflitos_409']:>5} {str(consistente):>11}"
+            )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tarefas", type=int, default=10, help="tarefas concorrentes (K)")
+    parser.add_argument("--operacoes", type=int, default=50, help="baixas de 1 unidade por tarefa")
+    args = parser.parse_args()
+    asyncio.run(main(args.tarefas, args.operacoes))
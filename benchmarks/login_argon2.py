@@ -0,0 +1,148 @@
+# benchmarks/login_argon2.py
+"""
+Vazão de login (UsuarioService.login_user) com N logins simultâneos, em dois modos:
+
+- inline: Argon2 chamado direto no event loop, como antes do PasswordHasherPool;
+- pool: verificação no PasswordHasherPool (core.password_hasher), o caminho atual.
+
+Para medir só o custo do Argon2, o banco é substituído por uma sessão que devolve
+sempre o mesmo usuário. Além de logins/s, mostra a maior latência do event loop
+durante a rodada (o que as outras requisições sentiriam) e a fila do pool via stats().
+
+    python -m benchmarks.login_argon2 --logins 64 --workers 4
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://benchmark@localhost/benchmark") # não conecta
+os.environ.setdefault("JWT_SECRET", "benchmark")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+from fastapi.security import OAuth2PasswordRequestForm
+from pwdlib import PasswordHash
+
+import services.usuario_service as usuario_service
+from core.password_hasher import PasswordHasherPool
+from models.usuario import RoleEnum, Usuario
+from services.usuario_service import UsuarioService
+
+SENHA = "senha-de-benchmark"
+
+
+class _SessaoFixa:
+    """Faz o papel da AsyncSession no login: o SELECT do usuário devolve sempre o mesmo."""
+
+    def __init__(self, usuario: Usuario):
+        self._usuario = usuario
+
+    async def scalar(self, _query):
+        return self._usuario
+
+
+async def _medir_event_loop(parar: asyncio.Event, intervalo: float = 0.005) -> float:
+    """Maior atraso (s) de um sleep curto no event loop enquanto a rodada executa."""
+    pior = 0.0
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        await asyncio.sleep(intervalo)
+        pior = max(pior, time.perf_counter() - inicio - intervalo)
+    return pior
+
+
+async def _rodada(logins: int, sessao: _SessaoFixa, pool: PasswordHasherPool | None) -> dict:
+    form = OAuth2PasswordRequestForm(username="benchmark", password=SENHA)
+    amostras_fila = []
+
+    async def amostrar_fila(parar: asyncio.Event):
+        while not parar.is_set():
+            amostras_fila.append(pool.stats()["queue_depth"])
+            await asyncio.sleep(0.01)
+
+    parar = asyncio.Event()
+    monitores = [asyncio.create_task(_medir_event_loop(parar))]
+    if pool is not None:
+        monitores.append(asyncio.create_task(amostrar_fila(parar)))
+    await asyncio.sleep(0) # monitores começam antes dos logins
+
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(
+        *(UsuarioService.login_user(form, sessao) for _ in range(logins)), return_exceptions=True
+    )
+    duracao = time.perf_counter() - inicio
+    parar.set()
+    latencia_loop, *_ = await asyncio.gather(*monitores)
+
+    falhas = [r for r in resultados if isinstance(r, Exception)]
+    relatorio = {
+        "logins": logins,
+        "falhas": len(falhas),
+        "segundos": round(duracao, 3),
+        "logins_por_s": round((logins - len(falhas)) / duracao, 1),
+        "max_atraso_event_loop_ms": round(latencia_loop * 1000, 1),
+    }
+    if pool is not None:
+        stats = pool.stats()
+        relatorio.update({
+            "fila_media": round(sum(amostras_fila) / len(amostras_fila), 1) if amostras_fila else 0.0,
+            "fila_pico": stats["peak_queue_depth"],
+            "rejeitados_503": stats["rejected"],
+            "espera_media_ms": stats["avg_wait_ms"],
+            "execucao_media_ms": stats["avg_run_ms"],
+        })
+    return relatorio
+
+
+async def main(logins: int, workers: int, max_pending: int):
+    hasher = PasswordHash.recommended()
+    usuario = Usuario(
+        usuario_id=1,
+        username="benchmark",
+        senha_usuario=hasher.hash(SENHA),
+        tipo_usuario=RoleEnum.USUARIO_GERAL.value,
+        is_active=True,
+    )
+    sessao = _SessaoFixa(usuario)
+    original = usuario_service.verify_password
+
+    # Modo inline: a verificação bloqueia o event loop durante todo o Argon2
+    async def verify_inline(senha: str, hash_senha: str) -> bool:
+        return hasher.verify(senha, hash_senha)
+
+    usuario_service.verify_password = verify_inline
+    try:
+        inline = await _rodada(logins, sessao, None)
+    finally:
+        usuario_service.verify_password = original
+
+    pool = PasswordHasherPool(workers, max_pending)
+
+    async def verify_pool(senha: str, hash_senha: str) -> bool:
+        return await pool.verify(senha, hash_senha)
+
+    usuario_service.verify_password = verify_pool
+    try:
+        com_pool = await _rodada(logins, sessao, pool)
+    finally:
+        usuario_service.verify_password = original
+        pool.shutdown()
+
+    print(f"{'modo':<8} {'logins/s':>9} {'falhas':>7} {'atraso loop (ms)':>17} {'fila média':>11} {'fila pico':>10}")
+    for nome, r in (("inline", inline), (f"pool({workers})", com_pool)):
+        print(
+            f"{nome:<8} {r['logins_por_s']:>9} {r['falhas']:>7} {r['max_atraso_event_loop_ms']:>17}"
+            f" {r.get('fila_media', '-'):>11} {r.get('fila_pico', '-'):>10}"
+        )
+    print(f"stats do pool: {pool.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64, help="logins simultâneos por modo")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="threads do pool")
+    parser.add_argument("--max-pending", type=int, default=256, help="limite da fila do pool")
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.workers, args.max_pending))
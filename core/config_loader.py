@@ -28,5 +28,13 @@ class ConfigLoader:
             raise ValueError(f"Variável de ambiente obrigatória {key} não foi encontrada!")
         return value
 
+    @classmethod
+    def get_bool(cls, key, default: bool = False) -> bool:
+        """Obtém um valor booleano ("true"/"1"/"sim"/"yes", sem diferenciar maiúsculas)."""
+        value = cls.get(key)
+        if value is None:
+            return default
+        return str(value).strip().lower() in ("1", "true", "sim", "yes")
+
 # Carregar configurações na inicialização
 ConfigLoader.load_config()
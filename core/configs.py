@@ -2,12 +2,27 @@ from sqlalchemy.ext.declarative import declarative_base
 from core.config_loader import ConfigLoader
 import pytz
 from pathlib import Path
+import os
 
 class Settings:
     API_STR: str = "/api/almoxarifado"
 
     # Banco de Dados
     DATABASE_URL: str = ConfigLoader.get("DATABASE_URL", required=True)
+    # Réplica somente leitura (listagens e relatórios); vazia usa o banco principal
+    DATABASE_URL_READ: str | None = ConfigLoader.get("DATABASE_URL_READ") or None
+    # Pool de conexões
+    DB_POOL_SIZE: int = int(ConfigLoader.get("DB_POOL_SIZE", default=5))
+    DB_MAX_OVERFLOW: int = int(ConfigLoader.get("DB_MAX_OVERFLOW", default=10))
+    DB_POOL_TIMEOUT: float = float(ConfigLoader.get("DB_POOL_TIMEOUT", default=30))
+    # Conexões mais antigas que isso (segundos) são recriadas; -1 desativa
+    DB_POOL_RECYCLE: int = int(ConfigLoader.get("DB_POOL_RECYCLE", default=1800))
+    # Testa a conexão antes de entregá-la (descarta conexões mortas após restart do banco)
+    DB_POOL_PRE_PING: bool = ConfigLoader.get_bool("DB_POOL_PRE_PING", default=True)
+    # Cache de prepared statements do asyncpg por conexão; 0 desativa (necessário com pgbouncer em modo transaction)
+    DB_STATEMENT_CACHE_SIZE: int = int(ConfigLoader.get("DB_STATEMENT_CACHE_SIZE", default=100))
+    # Tentativas de leitura-modificação-escrita quando outra transação altera a mesma linha
+    OPTIMISTIC_LOCK_MAX_RETRIES: int = int(ConfigLoader.get("OPTIMISTIC_LOCK_MAX_RETRIES", default=3))
     DBBaseModel = declarative_base()
 
     # Autenticação
@@ -26,4 +41,37 @@ class Settings:
     #configuração para retenção de relatórios (em dias)
     REPORT_RETENTION_DAYS: int = int(ConfigLoader.get("REPORT_RETENTION_DAYS", default=30))
 
+    # Upload em massa de itens: linhas lidas por vez do arquivo enviado
+    BULK_UPLOAD_CHUNK_SIZE: int = int(ConfigLoader.get("BULK_UPLOAD_CHUNK_SIZE", default=1000))
+    # Linhas gravadas por lote (SAVEPOINT + commit); um lote com erro não desfaz os anteriores
+    BULK_UPLOAD_BATCH_SIZE: int = int(ConfigLoader.get("BULK_UPLOAD_BATCH_SIZE", default=500))
+    # Job pendente/processando sem gravar progresso há mais que isso (segundos) foi interrompido
+    # (reinício ou queda do worker) e é marcado como falho
+    BULK_UPLOAD_JOB_STALE_SECONDS: int = int(ConfigLoader.get("BULK_UPLOAD_JOB_STALE_SECONDS", default=600))
+
+    # Paginação: segundos que o total de listagens sem filtro fica em cache (0 desativa)
+    PAGINATION_TOTAL_CACHE_SECONDS: int = int(ConfigLoader.get("PAGINATION_TOTAL_CACHE_SECONDS", default=0))
+
+    # Índice de categorias em memória: recarga periódica para refletir escritas de outros processos
+    CATEGORIA_INDEX_TTL_SECONDS: int = int(ConfigLoader.get("CATEGORIA_INDEX_TTL_SECONDS", default=300))
+
+    # Cache dos usuários autenticados (get_current_user); TTL 0 desativa. Alterações chegam aos
+    # outros workers pelo barramento; se ele estiver fora, o TTL é o atraso máximo até refletirem
+    USER_CACHE_TTL_SECONDS: int = int(ConfigLoader.get("USER_CACHE_TTL_SECONDS", default=60))
+    USER_CACHE_MAX_SIZE: int = int(ConfigLoader.get("USER_CACHE_MAX_SIZE", default=1024))
+    # Ressincronização com o banco dos usuários desativados (token_revocation), além da carga na inicialização
+    TOKEN_REVOCATION_SYNC_SECONDS: int = int(ConfigLoader.get("TOKEN_REVOCATION_SYNC_SECONDS", default=300))
+
+    # Argon2: threads dedicadas ao hash/verificação de senha e limite da fila de espera
+    PASSWORD_HASH_WORKERS: int = int(ConfigLoader.get("PASSWORD_HASH_WORKERS", default=min(4, os.cpu_count() or 1)))
+    PASSWORD_HASH_MAX_PENDING: int = int(ConfigLoader.get("PASSWORD_HASH_MAX_PENDING", default=64))
+
+    # WebSocket: mensagens pendentes por conexão (acima disso o cliente lento é desconectado)
+    # e tempo máximo de um envio
+    WS_QUEUE_SIZE: int = int(ConfigLoader.get("WS_QUEUE_SIZE", default=100))
+    WS_SEND_TIMEOUT_SECONDS: float = float(ConfigLoader.get("WS_SEND_TIMEOUT_SECONDS", default=5))
+    # Barramento entre workers: "postgres" (LISTEN/NOTIFY) ou "memoria" (um processo só)
+    NOTIFICATION_BUS: str = ConfigLoader.get("NOTIFICATION_BUS", default="postgres").strip().lower()
+    NOTIFICATION_CHANNEL: str = ConfigLoader.get("NOTIFICATION_CHANNEL", default="almoxarifado_ws")
+
 settings = Settings()
@@ -1,13 +1,89 @@
+import time
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from core.configs import settings
 from contextlib import asynccontextmanager
 from sqlalchemy.ext.asyncio import async_session
 from typing import AsyncGenerator
 
 
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """
+    Pool padrão do engine assíncrono, medindo o tempo de espera por uma conexão
+    (inclui a abertura de conexões novas e o pre-ping). Esperas que terminam em
+    timeout ficam em contadores próprios, fora da média dos checkouts bem-sucedidos.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeout_wait_total = 0.0
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            self.timeout_wait_total += time.perf_counter() - inicio
+            raise
+        espera = time.perf_counter() - inicio
+        self.checkouts += 1
+        self.wait_total += espera
+        self.wait_max = max(self.wait_max, espera)
+        return conexao
+
+    def stats(self) -> dict:
+        return {
+            "pool_size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            # overflow() fica negativo enquanto o pool base não foi todo aberto
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.wait_total / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+            "max_wait_ms": round(self.wait_max * 1000, 2),
+            "avg_timeout_wait_ms": (
+                round(self.timeout_wait_total / self.timeouts * 1000, 2) if self.timeouts else 0.0
+            ),
+        }
+
+
+def _engine_url(url: str):
+    url = make_url(url)
+    if url.get_driver_name() == "asyncpg":
+        url = url.update_query_dict(
+            {"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)}
+        )
+    return url
+
+
+def _create_engine(url: str):
+    return create_async_engine(
+        _engine_url(url),
+        echo=False,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+
 # Criar engine assíncrona
-engine = create_async_engine(settings.DATABASE_URL, echo=False)
+engine = _create_engine(settings.DATABASE_URL)
+
+# Engine da réplica de leitura; sem réplica configurada, aponta para o principal
+read_engine = _create_engine(settings.DATABASE_URL_READ) if settings.DATABASE_URL_READ else engine
 
 # Criar sessão assíncrona
 SessionLocal = sessionmaker(
@@ -18,12 +94,27 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# Sessão para consultas que toleram o atraso de replicação (listagens, buscas, relatórios)
+ReadSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    class_=AsyncSession,
+    bind=read_engine
+)
+
 # Função para obter sessão do banco de dados para usuarios
 async def get_session():
     async with SessionLocal() as session:
         yield session
 
 
+# Função para obter sessão somente leitura (réplica, se configurada)
+async def get_read_session():
+    async with ReadSessionLocal() as session:
+        yield session
+
+
 
 # Função para obter sessão do banco de dados para o scheduler
 @asynccontextmanager
@@ -0,0 +1,191 @@
+# core/migrations.py
+"""
+Migrações versionadas do schema: arquivos migrations/NNNN_descricao.sql aplicados
+em ordem, cada um em sua própria transação, e registrados em schema_migrations.
+
+Uso:
+    python -m core.migrations             # aplica as migrações pendentes
+    python -m core.migrations --status    # lista aplicadas e pendentes
+    python -m core.migrations --explain   # confere se as consultas frequentes usam seus índices
+"""
+
+import argparse
+import asyncio
+import json
+import re
+from pathlib import Path
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from core.database import engine
+from utils.logger import logger
+
+PASTA_MIGRACOES = Path(__file__).resolve().parent.parent / "migrations"
+_NOME_ARQUIVO = re.compile(r"^(\d{4})_\w+\.sql$")
+# Chave do advisory lock: impede duas instâncias aplicando migrações ao mesmo tempo
+_LOCK_ID = 7420017
+
+# Formato das consultas dos repositórios (com valores fixos) e o índice que cada uma deve usar
+CONSULTAS_INDEXADAS = {
+    "ix_retirada_ativa_data": (
+        "SELECT * FROM retirada WHERE is_active = true ORDER BY data_solicitacao DESC LIMIT 10"
+    ),
+    "ix_retirada_status_data": (
+        "SELECT * FROM retirada WHERE status = 1 AND is_active = true "
+        "ORDER BY data_solicitacao DESC LIMIT 10"
+    ),
+    "ix_retirada_usuario_data": (
+        "SELECT * FROM retirada WHERE usuario_id = 1 AND is_active = true "
+        "ORDER BY data_solicitacao DESC LIMIT 10"
+    ),
+    "ix_retirada_setor_data": (
+        "SELECT * FROM retirada WHERE setor_id = 1 AND data_solicitacao >= '2024-01-01' "
+        "AND data_solicitacao <= '2024-12-31' AND is_active = true ORDER BY data_solicitacao DESC"
+    ),
+    "ix_retirada_item_item": "SELECT * FROM retirada_item WHERE item_id = 1",
+    "ix_alerta_item_tipo": (
+        "SELECT * FROM alerta WHERE tipo_alerta = 1 AND item_id = 1 AND (ignorar_novos = true "
+        "OR (visualizado = false AND ignorar_novos = false))"
+    ),
+    "ix_alerta_nao_visualizado": "SELECT count(*) FROM alerta WHERE visualizado = false",
+    "ix_alerta_data": "SELECT * FROM alerta ORDER BY data_alerta DESC, alerta_id DESC LIMIT 10",
+    "ix_alerta_tipo_data": (
+        "SELECT * FROM alerta WHERE tipo_alerta = 1 ORDER BY data_alerta DESC, alerta_id DESC LIMIT 10"
+    ),
+    "ix_item_ativo_categoria_nome": "SELECT * FROM item WHERE categoria_id = 1 AND ativo = true",
+    "ix_item_ativo_validade": (
+        "SELECT * FROM item WHERE data_validade_item <= '2024-12-31' AND ativo = true"
+    ),
+    "ix_item_ativo_data_entrada": (
+        "SELECT * FROM item WHERE data_entrada_item >= '2024-01-01' "
+        "AND data_entrada_item <= '2024-12-31' AND ativo = true"
+    ),
+    "ix_item_ativo_nome_id": (
+        "SELECT * FROM item WHERE ativo = true ORDER BY nome_item, item_id LIMIT 10"
+    ),
+    "ix_item_nome_trgm": "SELECT * FROM item WHERE nome_item ILIKE '%parafuso%' AND ativo = true",
+    "ix_usuario_username": "SELECT * FROM usuario WHERE username = 'admin'",
+}
+
+
+def arquivos_migracao() -> list[tuple[str, Path]]:
+    """(versão, caminho) de cada arquivo de migração, em ordem."""
+    arquivos = []
+    for caminho in sorted(PASTA_MIGRACOES.glob("*.sql")):
+        match = _NOME_ARQUIVO.match(caminho.name)
+        if not match:
+            raise ValueError(f"Nome de migração inválido: {caminho.name} (esperado NNNN_descricao.sql)")
+        arquivos.append((match.group(1), caminho))
+    return arquivos
+
+
+async def _versoes_aplicadas(conn: AsyncConnection) -> set[str]:
+    await conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " versao VARCHAR(4) PRIMARY KEY,"
+        " arquivo VARCHAR(255) NOT NULL,"
+        " aplicada_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    ))
+    result = await conn.execute(text("SELECT versao FROM schema_migrations"))
+    return {linha[0] for linha in result}
+
+
+async def aplicar_pendentes() -> list[str]:
+    """Aplica as migrações ainda não registradas e retorna os arquivos aplicados."""
+    aplicados = []
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": _LOCK_ID})
+        try:
+            aplicadas = await _versoes_aplicadas(conn)
+            await conn.commit()
+            for versao, caminho in arquivos_migracao():
+                if versao in aplicadas:
+                    continue
+                logger.info(f"Aplicando migração {caminho.name}")
+                # O registro abre a transação; o script roda dentro dela pelo driver, que
+                # aceita vários comandos num único execute (o SQLAlchemy prepara um por vez)
+                await conn.execute(
+                    text("INSERT INTO schema_migrations (versao, arquivo) VALUES (:versao, :arquivo)"),
+                    {"versao": versao, "arquivo": caminho.name},
+                )
+                raw = await conn.get_raw_connection()
+                try:
+                    await raw.driver_connection.execute(caminho.read_text(encoding="utf-8"))
+                except Exception:
+                    await conn.rollback()
+                    raise
+                await conn.commit()
+                aplicados.append(caminho.name)
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _LOCK_ID})
+            await conn.commit()
+    return aplicados
+
+
+async def status() -> list[tuple[str, bool]]:
+    """(arquivo, aplicada?) para cada migração conhecida."""
+    async with engine.connect() as conn:
+        aplicadas = await _versoes_aplicadas(conn)
+        await conn.commit()
+    return [(caminho.name, versao in aplicadas) for versao, caminho in arquivos_migracao()]
+
+
+def _indices_do_plano(plano: dict) -> set[str]:
+    indices = {plano["Index Name"]} if "Index Name" in plano else set()
+    for filho in plano.get("Plans", []):
+        indices |= _indices_do_plano(filho)
+    return indices
+
+
+async def verificar_indices() -> dict[str, set[str]]:
+    """
+    Roda EXPLAIN de cada consulta em CONSULTAS_INDEXADAS com seq scan desabilitado
+    (em bases pequenas o planner prefere varrer a tabela mesmo com o índice certo)
+    e retorna, para as que não usaram o índice esperado, os índices que usaram.
+    """
+    falhas = {}
+    async with engine.connect() as conn:
+        await conn.execute(text("SET LOCAL enable_seqscan = off"))
+        for indice, sql in CONSULTAS_INDEXADAS.items():
+            result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+            plano = result.scalar_one()
+            if isinstance(plano, str):
+                plano = json.loads(plano)
+            usados = _indices_do_plano(plano[0]["Plan"])
+            if indice not in usados:
+                falhas[indice] = usados
+        await conn.rollback()
+    return falhas
+
+
+async def _executar(args: argparse.Namespace) -> int:
+    try:
+        if args.status:
+            for arquivo, aplicada in await status():
+                print(f"[{'x' if aplicada else ' '}] {arquivo}")
+            return 0
+        if args.explain:
+            falhas = await verificar_indices()
+            for indice in CONSULTAS_INDEXADAS:
+                if indice in falhas:
+                    print(f"FALHA {indice}: plano usou {sorted(falhas[indice]) or 'nenhum índice'}")
+                else:
+                    print(f"OK    {indice}")
+            return 1 if falhas else 0
+        aplicados = await aplicar_pendentes()
+        print("\n".join(f"Aplicada: {arquivo}" for arquivo in aplicados) or "Nenhuma migração pendente.")
+        return 0
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migrações do banco do almoxarifado")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--status", action="store_true", help="lista migrações aplicadas e pendentes")
+    grupo.add_argument("--explain", action="store_true", help="verifica o uso dos índices pelas consultas")
+    raise SystemExit(asyncio.run(_executar(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
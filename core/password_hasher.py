@@ -0,0 +1,83 @@
+# core/password_hasher.py
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from pwdlib import PasswordHash
+
+
+class PasswordHasherPool:
+    """
+    Executa o Argon2 (hash e verificação) num pool de threads de tamanho fixo,
+    fora do event loop. A biblioteca do Argon2 libera o GIL, então as threads
+    rodam em paralelo de fato. Pedidos além de max_pending na fila recebem 503
+    em vez de acumular sem limite.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pwd_context = PasswordHash.recommended()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="argon2")
+        self._slots = asyncio.Semaphore(max_workers)
+
+        # Métricas
+        self._na_fila = 0
+        self._em_execucao = 0
+        self.pico_fila = 0
+        self.concluidas = 0
+        self.rejeitadas = 0
+        self._espera_total = 0.0
+        self._execucao_total = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._executar(self._pwd_context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._executar(self._pwd_context.verify, password, hashed_password)
+
+    async def _executar(self, funcao, *args):
+        if self._na_fila >= self.max_pending:
+            self.rejeitadas += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servidor ocupado, tente novamente em instantes",
+            )
+
+        entrada = time.perf_counter()
+        self._na_fila += 1
+        self.pico_fila = max(self.pico_fila, self._na_fila)
+        try:
+            await self._slots.acquire()
+        finally:
+            self._na_fila -= 1
+
+        inicio = time.perf_counter()
+        self._em_execucao += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, funcao, *args)
+        finally:
+            fim = time.perf_counter()
+            self._em_execucao -= 1
+            self._slots.release()
+            self.concluidas += 1
+            self._espera_total += inicio - entrada
+            self._execucao_total += fim - inicio
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "queue_depth": self._na_fila,
+            "in_progress": self._em_execucao,
+            "peak_queue_depth": self.pico_fila,
+            "completed": self.concluidas,
+            "rejected": self.rejeitadas,
+            "avg_wait_ms": round(self._espera_total / self.concluidas * 1000, 2) if self.concluidas else 0.0,
+            "avg_run_ms": round(self._execucao_total / self.concluidas * 1000, 2) if self.concluidas else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,5 +1,4 @@
 # core/security.py
-from pwdlib import PasswordHash
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt import encode, decode
@@ -11,16 +10,21 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from models import Usuario
 from sqlalchemy.future import select
 from models.usuario import RoleEnum
+from core.user_cache import user_cache
+from core.password_hasher import PasswordHasherPool
+from core.token_revocation import token_revocation
 from typing import List
+from dataclasses import dataclass
 
-pwd_context = PasswordHash.recommended()
+password_hasher = PasswordHasherPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/almoxarifado/usuarios/token")
 
-def get_password_hash(password: str):
-    return pwd_context.hash(password)
+# Argon2 roda no pool de threads do password_hasher, sem bloquear o event loop
+async def get_password_hash(password: str):
+    return await password_hasher.hash(password)
 
-def verify_password(original_password: str, hashed_password: str):
-    return pwd_context.verify(original_password, hashed_password)
+async def verify_password(original_password: str, hashed_password: str):
+    return await password_hasher.verify(original_password, hashed_password)
 
 def create_access_token(data_payload: dict, tipo_usuario: int, usuario_id: int = None): # Adicionado usuario_id
     to_encode = data_payload.copy()
@@ -30,14 +34,16 @@ def create_access_token(data_payload: dict, tipo_usuario: int, usuario_id: int =
         to_encode.update({'usuario_id': usuario_id})
 
     #ver se é melhor usar ZoneInfo
-    expire_date = datetime.now(tz=settings.BRASILIA_TIMEZONE) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({'exp': expire_date.timestamp()})
+    now = datetime.now(tz=settings.BRASILIA_TIMEZONE)
+    expire_date = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # 'iat' permite recusar tokens emitidos antes de uma revogação (token_revocation)
+    to_encode.update({'exp': expire_date.timestamp(), 'iat': now.timestamp()})
 
     encoded_jwt = encode(to_encode, settings.JWT_SECRET, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme),
-                           db: AsyncSession = Depends(get_session)):
+def decode_access_token(token: str) -> dict:
+    """Valida assinatura, expiração e revogação do token; levanta 401 se inválido."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail='Não foi possível validar as credenciais',
@@ -45,27 +51,77 @@ async def get_current_user(token: str = Depends(oauth2_scheme),
     )
     try:
         payload = decode(token, settings.JWT_SECRET, algorithms=[settings.ALGORITHM])
-        username: str = payload.get('sub')
-        tipo_usuario = payload.get('tipo_usuario') # Agora buscando 'tipo_usuario'
-        #  Obtendo o usuario_id do token
-        usuario_id = payload.get('usuario_id')
-
-        if not username:
-            raise credentials_exception
     except PyJWTError:
         raise credentials_exception
 
-    user = await db.scalar(select(Usuario).where(Usuario.username == username))
-    if not user:
+    if not payload.get('sub'):
+        raise credentials_exception
+    if token_revocation.esta_revogado(payload.get('usuario_id'), payload.get('iat')):
         raise credentials_exception
+    return payload
+
+async def get_current_user(token: str = Depends(oauth2_scheme),
+                           db: AsyncSession = Depends(get_session)):
+    payload = decode_access_token(token)
+    username: str = payload.get('sub')
+    tipo_usuario = payload.get('tipo_usuario') # Agora buscando 'tipo_usuario'
+    #  Obtendo o usuario_id do token
+    usuario_id = payload.get('usuario_id')
+
+    # Evita a ida ao banco quando o usuário foi carregado há pouco
+    user = user_cache.get(username)
+    if user is None:
+        user = await db.scalar(select(Usuario).where(Usuario.username == username))
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail='Não foi possível validar as credenciais',
+                headers={'WWW-Authenticate': 'Bearer'}
+            )
+        user_cache.put(user)
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='Usuário inativo',
+            headers={'WWW-Authenticate': 'Bearer'}
+        )
     user.tipo_usuario_from_token = tipo_usuario
     user.usuario_id_from_token = usuario_id # Armazena o ID do token no objeto do usuário
 
     return user
 
-def verify_user_type(allowed_types: List[RoleEnum]):
+@dataclass(frozen=True)
+class Principal:
+    """Usuário autenticado montado só a partir das claims do token, sem consultar o banco."""
+    usuario_id: int
+    username: str
+    tipo_usuario: int
+
+    # Mesmos nomes que get_current_user define no Usuario, para o verify_user_type
+    @property
+    def tipo_usuario_from_token(self) -> int:
+        return self.tipo_usuario
+
+    @property
+    def usuario_id_from_token(self) -> int:
+        return self.usuario_id
+
+async def get_current_principal(token: str = Depends(oauth2_scheme)) -> Principal:
+    """
+    Autoriza só pelo token, sem consultar o banco. Usuário desativado ou com credenciais
+    alteradas é barrado no decode_access_token pelo token_revocation (desativados carregados
+    do banco na inicialização e alterações propagadas entre workers pelo barramento).
+    """
+    payload = decode_access_token(token)
+    return Principal(
+        usuario_id=payload.get('usuario_id'),
+        username=payload.get('sub'),
+        tipo_usuario=payload.get('tipo_usuario'),
+    )
+
+def verify_user_type(allowed_types: List[RoleEnum], current_user_dependency=get_current_user):
     allowed_values = [t.value for t in allowed_types]
-    def verifier(current_user: Usuario = Depends(get_current_user)):
+    def verifier(current_user: Usuario = Depends(current_user_dependency)):
         tipo_usuario = current_user.tipo_usuario_from_token
         if tipo_usuario not in allowed_values:
             allowed_names = [t.name for t in allowed_types]
@@ -81,4 +137,14 @@ usuario_direcao = verify_user_type([RoleEnum.USUARIO_DIRECAO])
 usuario_almoxarifado = verify_user_type([RoleEnum.USUARIO_ALMOXARIFADO])
 usuario_geral = verify_user_type([RoleEnum.USUARIO_GERAL])
 direcao_ou_almoxarifado = verify_user_type([RoleEnum.USUARIO_ALMOXARIFADO, RoleEnum.USUARIO_DIRECAO])
-todos_usuarios = verify_user_type([RoleEnum.USUARIO_ALMOXARIFADO, RoleEnum.USUARIO_DIRECAO, RoleEnum.USUARIO_GERAL])
\ No newline at end of file
+todos_usuarios = verify_user_type([RoleEnum.USUARIO_ALMOXARIFADO, RoleEnum.USUARIO_DIRECAO, RoleEnum.USUARIO_GERAL])
+
+# Verificadores só com as claims do token (Principal, sem acesso ao banco), para endpoints de leitura
+usuario_direcao_token = verify_user_type([RoleEnum.USUARIO_DIRECAO], get_current_principal)
+usuario_almoxarifado_token = verify_user_type([RoleEnum.USUARIO_ALMOXARIFADO], get_current_principal)
+direcao_ou_almoxarifado_token = verify_user_type(
+    [RoleEnum.USUARIO_ALMOXARIFADO, RoleEnum.USUARIO_DIRECAO], get_current_principal
+)
+todos_usuarios_token = verify_user_type(
+    [RoleEnum.USUARIO_ALMOXARIFADO, RoleEnum.USUARIO_DIRECAO, RoleEnum.USUARIO_GERAL], get_current_principal
+)
@@ -0,0 +1,92 @@
+# core/token_revocation.py
+
+import time
+from sqlalchemy import select
+from core.configs import settings
+from models.usuario import Usuario
+
+
+class TokenRevocationList:
+    """
+    Registro em memória dos usuários cujos tokens não valem mais, consultado a cada
+    requisição (inclusive nos endpoints que só leem as claims, sem ir ao banco):
+
+    - desativados: usuários com is_active=False. Todo token deles é recusado até a
+      reativação; o conjunto é carregado do banco na inicialização e ressincronizado
+      periodicamente (carregar_desativados).
+    - revogados_em: usuário com perfil, username ou senha alterados. Tokens com 'iat'
+      anterior ou igual à revogação são recusados; tokens sem 'iat' (emitidos antes deste
+      controle) são recusados sempre. Estas entradas expiram junto com o último token
+      que poderiam afetar.
+
+    Cada processo tem sua cópia. As alterações feitas num worker chegam aos demais pelo
+    barramento de notificações (destino "revogacao_token", ver UsuarioService); se o
+    barramento estiver fora, os outros workers só as veem na próxima ressincronização
+    (desativações) ou nunca (revogações por 'iat', até o token expirar).
+    """
+
+    def __init__(self):
+        self._revogados_em: dict[int, float] = {}
+        self._desativados: set[int] = set()
+        self.sincronizado_em: float | None = None
+
+    def revogar(self, usuario_id: int, revogado_em: float | None = None) -> float:
+        """Recusa os tokens do usuário emitidos até agora (ou até revogado_em); retorna o instante."""
+        self._remover_expirados()
+        revogado_em = time.time() if revogado_em is None else revogado_em
+        # Max: o evento pode voltar pelo barramento depois de aplicado localmente
+        self._revogados_em[usuario_id] = max(revogado_em, self._revogados_em.get(usuario_id, 0.0))
+        return revogado_em
+
+    def desativar(self, usuario_id: int) -> None:
+        self._desativados.add(usuario_id)
+
+    def reativar(self, usuario_id: int) -> None:
+        self._desativados.discard(usuario_id)
+
+    def aplicar(self, evento: dict) -> None:
+        """Aplica um evento recebido do barramento: {"usuario_id", "revogado_em", "desativado"}."""
+        usuario_id = evento["usuario_id"]
+        if evento.get("revogado_em") is not None:
+            self.revogar(usuario_id, evento["revogado_em"])
+        if evento.get("desativado") is True:
+            self.desativar(usuario_id)
+        elif evento.get("desativado") is False:
+            self.reativar(usuario_id)
+
+    async def carregar_desativados(self, db) -> int:
+        """Substitui o conjunto de desativados pelo que está no banco; retorna quantos são."""
+        result = await db.execute(select(Usuario.usuario_id).where(Usuario.is_active == False))
+        self._desativados = set(result.scalars().all())
+        self.sincronizado_em = time.time()
+        return len(self._desativados)
+
+    def esta_revogado(self, usuario_id: int | None, emitido_em: float | None) -> bool:
+        if usuario_id in self._desativados:
+            return True
+        revogado_em = self._revogados_em.get(usuario_id)
+        if revogado_em is None:
+            return False
+        return emitido_em is None or emitido_em <= revogado_em
+
+    def __len__(self) -> int:
+        return len(self._revogados_em) + len(self._desativados)
+
+    def _remover_expirados(self) -> None:
+        limite = time.time() - settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        for usuario_id, revogado_em in list(self._revogados_em.items()):
+            if revogado_em < limite:
+                del self._revogados_em[usuario_id]
+
+    def stats(self) -> dict:
+        self._remover_expirados()
+        return {
+            "desativados": len(self._desativados),
+            "revogados_por_iat": len(self._revogados_em),
+            "sincronizado_em": self.sincronizado_em,
+            # Estado deste worker; os demais recebem as alterações pelo barramento (websocket.barramento)
+            "escopo": "processo",
+        }
+
+
+token_revocation = TokenRevocationList()
@@ -0,0 +1,81 @@
+# core/user_cache.py
+
+import time
+from collections import OrderedDict
+from sqlalchemy.orm import make_transient_to_detached
+from core.configs import settings
+from models.usuario import Usuario
+
+
+class UserCache:
+    """
+    Cache LRU com TTL (por processo) dos usuários autenticados, indexado pelo username do token.
+    Guarda só os valores das colunas (sem a senha) e devolve um Usuario desanexado
+    a cada acerto, para que nenhuma requisição compartilhe o mesmo objeto.
+    Alterações de usuário invalidam a entrada em todos os workers pelo barramento de
+    notificações (destino "cache_usuario"); com o barramento fora, os outros workers podem
+    servir o usuário antigo por até USER_CACHE_TTL_SECONDS.
+    """
+    # A senha não é necessária para autorizar a requisição e não fica em memória
+    COLUNAS = [c.key for c in Usuario.__table__.columns if c.key != "senha_usuario"]
+
+    def __init__(self, ttl_seconds: int, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entradas: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, username: str) -> Usuario | None:
+        if not self.enabled:
+            return None
+        entrada = self._entradas.get(username)
+        if entrada is None or entrada[1] <= time.monotonic():
+            if entrada is not None:
+                del self._entradas[username]
+            self.misses += 1
+            return None
+        self._entradas.move_to_end(username)
+        self.hits += 1
+
+        # senha_usuario explícito como None: atributo ausente em objeto desanexado levantaria erro
+        usuario = Usuario(**entrada[0], senha_usuario=None)
+        make_transient_to_detached(usuario)
+        return usuario
+
+    def put(self, usuario: Usuario) -> None:
+        if not self.enabled:
+            return
+        dados = {coluna: getattr(usuario, coluna) for coluna in self.COLUNAS}
+        self._entradas[usuario.username] = (dados, time.monotonic() + self.ttl_seconds)
+        self._entradas.move_to_end(usuario.username)
+        while len(self._entradas) > self.max_size:
+            self._entradas.popitem(last=False)
+
+    def aplicar(self, evento: dict) -> None:
+        """Invalidação recebida do barramento: {"usuario_id": ...}."""
+        self.invalidate(evento["usuario_id"])
+
+    def invalidate(self, usuario_id: int) -> None:
+        """Remove o usuário do cache, qualquer que seja o username guardado (inclusive após renomear)."""
+        for username, (dados, _) in list(self._entradas.items()):
+            if dados["usuario_id"] == usuario_id:
+                del self._entradas[username]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entradas),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+user_cache = UserCache(settings.USER_CACHE_TTL_SECONDS, settings.USER_CACHE_MAX_SIZE)
@@ -2,8 +2,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from core.configs import settings
-from utils.scheduler import tarefa_diaria, scheduler, tarefa_limpar_relatorios 
+from utils.scheduler import (
+    tarefa_diaria, scheduler, tarefa_limpar_relatorios, tarefa_reconciliar_uploads, tarefa_sincronizar_desativados
+)
 import uvicorn
+from datetime import datetime
 from contextlib import asynccontextmanager
 from api.v1.endpoints.categoria import router as categoria_router
 from api.v1.endpoints.setor import router as setor_router
@@ -12,13 +15,18 @@ from api.v1.endpoints.item import router as item_router
 from api.v1.endpoints.retirada import router as retirada_router
 from api.v1.endpoints.relatorios import router as relatorio_router
 from api.v1.endpoints.alerta import router as alerta_router
+from api.v1.endpoints.admin import router as admin_router
 from fastapi.staticfiles import StaticFiles
 from frontend.routes.home import router as frontend_router
 import mimetypes
 from utils.logger import logger
+from core.security import password_hasher
+from core.token_revocation import token_revocation
+from core.user_cache import user_cache
 
 # roteador WebSocket e o manager
-from utils.websocket_endpoints import websocket_router
+from utils.websocket_endpoints import websocket_router, manager
+from utils.notification_bus import criar_bus
 
 logger.info("Iniciando aplicação Almoxarifado…")
 
@@ -33,14 +41,35 @@ async def lifespan(app: FastAPI):
     try:
         scheduler.add_job(tarefa_diaria, 'cron', hour=9, minute=52) # verificar validade dos produtos 
         scheduler.add_job(tarefa_limpar_relatorios, 'cron', hour=11,  minute=8) # limpar relatórios antigos
+        # jobs de upload em massa interrompidos: na inicialização e depois periodicamente
+        scheduler.add_job(
+            tarefa_reconciliar_uploads, 'interval', seconds=settings.BULK_UPLOAD_JOB_STALE_SECONDS,
+            next_run_time=datetime.now(),
+        )
+        # usuários desativados (token_revocation): ressincroniza com o banco periodicamente
+        scheduler.add_job(
+            tarefa_sincronizar_desativados, 'interval', seconds=settings.TOKEN_REVOCATION_SYNC_SECONDS
+        )
         scheduler.start()
         print("Scheduler iniciado com sucesso via lifespan.")
     except Exception as e:
         print("Erro ao iniciar scheduler via lifespan:", e)
+    # A primeira carga dos desativados roda antes de aceitar requisições
+    try:
+        await tarefa_sincronizar_desativados()
+    except Exception as e:
+        logger.error(f"Erro ao carregar os usuários desativados: {e!r}")
+    # Notificações WebSocket passam pelo barramento para alcançar sockets de outros workers;
+    # revogações de token e invalidações do cache de usuários também, para valerem em todos
+    manager.registrar_tratador("revogacao_token", token_revocation.aplicar)
+    manager.registrar_tratador("cache_usuario", user_cache.aplicar)
+    await manager.iniciar_bus(criar_bus())
     yield # app roda
     # Executado quando o app estiver encerrando
     scheduler.shutdown()
     print("Scheduler finalizado.")
+    await manager.parar_bus()
+    password_hasher.shutdown()
 
 app = FastAPI(
     title="Sistema de Gerenciamento de Almoxarifado",
@@ -65,6 +94,7 @@ app.include_router(item_router, prefix=settings.API_STR, tags=['Gerenciamento de
 app.include_router(retirada_router, prefix=settings.API_STR, tags=['Gerenciamento de Retiradas'])
 app.include_router(relatorio_router, prefix=settings.API_STR, tags=['Geração de Relatórios de Itens'])
 app.include_router(alerta_router, prefix=settings.API_STR, tags=['Gerenciamento de Alertas'])
+app.include_router(admin_router, prefix=settings.API_STR, tags=['Administração'])
 
 # Incluir o roteador WebSocket
 # Adicionado um parâmetro para o user_id no WebSocket, que será opcional na rota
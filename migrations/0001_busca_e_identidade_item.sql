@@ -0,0 +1,17 @@
+-- Índices já descritos em SQL_DB.txt para instalações novas, trazidos para bancos existentes.
+-- uq_item_identidade falha se já houver itens duplicados (mesmo nome, categoria, validade e marca):
+-- eles precisam ser unificados antes desta migração.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS ix_categoria_nome_trgm ON categoria USING gin (nome_categoria gin_trgm_ops);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_item_identidade ON item (
+    nome_item,
+    categoria_id,
+    COALESCE(data_validade_item, DATE '0001-01-01'),
+    COALESCE(marca_item, '')
+);
+
+CREATE INDEX IF NOT EXISTS ix_item_ativo_nome_id ON item (nome_item, item_id) WHERE ativo;
+CREATE INDEX IF NOT EXISTS ix_item_nome_trgm ON item USING gin (nome_item gin_trgm_ops);
@@ -0,0 +1,33 @@
+-- Índices compostos/parciais para os filtros mais frequentes dos repositórios.
+-- As listagens só enxergam linhas ativas, então os índices de retirada/item são parciais.
+
+-- Retiradas ativas por data (listagem geral paginada e soft delete por período)
+CREATE INDEX IF NOT EXISTS ix_retirada_ativa_data ON retirada (data_solicitacao DESC) WHERE is_active;
+-- Pendentes e busca por status
+CREATE INDEX IF NOT EXISTS ix_retirada_status_data ON retirada (status, data_solicitacao DESC) WHERE is_active;
+-- "Minhas retiradas" e relatório por usuário
+CREATE INDEX IF NOT EXISTS ix_retirada_usuario_data ON retirada (usuario_id, data_solicitacao DESC) WHERE is_active;
+-- Relatório por setor
+CREATE INDEX IF NOT EXISTS ix_retirada_setor_data ON retirada (setor_id, data_solicitacao DESC) WHERE is_active;
+
+-- A chave primária começa por retirada_id; consultas por item precisam do próprio índice
+CREATE INDEX IF NOT EXISTS ix_retirada_item_item ON retirada_item (item_id);
+
+-- Verificação de alerta já existente por item/tipo
+CREATE INDEX IF NOT EXISTS ix_alerta_item_tipo ON alerta (item_id, tipo_alerta);
+-- Contagem e marcação dos não visualizados
+CREATE INDEX IF NOT EXISTS ix_alerta_nao_visualizado ON alerta (alerta_id) WHERE NOT visualizado;
+-- Listagem paginada (com ou sem filtro por tipo), mais recentes primeiro
+CREATE INDEX IF NOT EXISTS ix_alerta_data ON alerta (data_alerta DESC, alerta_id DESC);
+CREATE INDEX IF NOT EXISTS ix_alerta_tipo_data ON alerta (tipo_alerta, data_alerta DESC, alerta_id DESC);
+
+-- Itens ativos por categoria, já na ordem da listagem
+CREATE INDEX IF NOT EXISTS ix_item_ativo_categoria_nome ON item (categoria_id, nome_item, item_id) WHERE ativo;
+-- Itens com validade próxima (alertas diários)
+CREATE INDEX IF NOT EXISTS ix_item_ativo_validade ON item (data_validade_item)
+    WHERE ativo AND data_validade_item IS NOT NULL;
+-- Relatório de entrada de itens por período
+CREATE INDEX IF NOT EXISTS ix_item_ativo_data_entrada ON item (data_entrada_item) WHERE ativo;
+
+-- Login por username
+CREATE INDEX IF NOT EXISTS ix_usuario_username ON usuario (username);
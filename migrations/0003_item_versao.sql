@@ -0,0 +1,2 @@
+-- Versão da linha de item para controle de concorrência otimista (version_id_col do ORM).
+ALTER TABLE item ADD COLUMN IF NOT EXISTS versao INTEGER NOT NULL DEFAULT 1;
@@ -0,0 +1,13 @@
+-- Jobs de upload em massa em tabela, para que o status seja consultável em qualquer worker.
+CREATE TABLE IF NOT EXISTS upload_job (
+    job_id VARCHAR(32) PRIMARY KEY,
+    usuario_id INTEGER NOT NULL REFERENCES usuario(usuario_id),
+    status VARCHAR(20) NOT NULL, -- pendente, processando, concluido ou falhou
+    total_items_processed INTEGER NOT NULL DEFAULT 0,
+    items_created INTEGER NOT NULL DEFAULT 0,
+    items_updated INTEGER NOT NULL DEFAULT 0,
+    errors JSONB NOT NULL DEFAULT '[]',
+    detalhe TEXT,
+    criado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    finalizado_em TIMESTAMP
+);
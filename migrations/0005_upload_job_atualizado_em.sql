@@ -0,0 +1,2 @@
+-- Última gravação de progresso do job, para marcar como falhos os interrompidos por reinício do worker.
+ALTER TABLE upload_job ADD COLUMN IF NOT EXISTS atualizado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
@@ -8,4 +8,4 @@ from models.usuario import Usuario
 from models.retirada import Retirada
 from models.retirada_item import RetiradaItem
 from models.alerta import Alerta
-
+from models.upload_job import UploadJob
@@ -1,6 +1,6 @@
 #models\alerta.py
 
-from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP, String, Boolean
+from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP, String, Boolean, Index
 from core.configs import settings
 from datetime import datetime
 from enum import Enum
@@ -19,3 +19,9 @@ class Alerta(settings.DBBaseModel):
     mensagem_alerta = Column(String(255), nullable=False)
     visualizado = Column(Boolean, default=False)
     ignorar_novos = Column(Boolean, default=False) 
+
+
+Index("ix_alerta_item_tipo", Alerta.item_id, Alerta.tipo_alerta)
+Index("ix_alerta_nao_visualizado", Alerta.alerta_id, postgresql_where=~Alerta.visualizado)
+Index("ix_alerta_data", Alerta.data_alerta.desc(), Alerta.alerta_id.desc())
+Index("ix_alerta_tipo_data", Alerta.tipo_alerta, Alerta.data_alerta.desc(), Alerta.alerta_id.desc())
@@ -1,6 +1,6 @@
 #models\categoria.py
 
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, Index
 from core.configs import settings
 
 class Categoria(settings.DBBaseModel):
@@ -11,3 +11,13 @@ class Categoria(settings.DBBaseModel):
     descricao_categoria = Column(String(255), nullable=True)
     nome_original = Column(String(100), nullable=False)  # Original do usuário
     ativo = Column(Boolean, nullable=False, default=True)
+
+    __table_args__ = (
+        # Busca por trecho do nome (ILIKE '%termo%' e similarity) via pg_trgm
+        Index(
+            "ix_categoria_nome_trgm",
+            "nome_categoria",
+            postgresql_using="gin",
+            postgresql_ops={"nome_categoria": "gin_trgm_ops"},
+        ),
+    )
@@ -1,6 +1,6 @@
 # models/item.py
 
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, TIMESTAMP, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, TIMESTAMP, DateTime, Boolean, Index, func, literal_column
 from datetime import datetime
 from core.configs import settings
 
@@ -21,3 +21,49 @@ class Item(settings.DBBaseModel):
     marca_item = Column(String(200), nullable=True)
     nome_item_original = Column(String(256), nullable=False)
     ativo = Column(Boolean, default=True, nullable=False) #  coluna para soft delete
+    # Versão da linha: o ORM só grava se ela não mudou desde a leitura (ver utils/concorrencia.py);
+    # escritas em lote fora do ORM precisam incrementá-la explicitamente
+    versao = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __mapper_args__ = {"version_id_col": versao}
+
+
+# Identidade de um item para detecção de duplicatas (nome, categoria, validade, marca).
+# COALESCE faz validade/marca nulas contarem como valor, já que NULL nunca conflita em UNIQUE.
+# As mesmas expressões são usadas como alvo do ON CONFLICT em ItemRepository.upsert_incrementando.
+ITEM_IDENTIDADE = (
+    Item.nome_item,
+    Item.categoria_id,
+    func.coalesce(Item.data_validade_item, literal_column("'0001-01-01'")),
+    func.coalesce(Item.marca_item, literal_column("''")),
+)
+
+Index("uq_item_identidade", *ITEM_IDENTIDADE, unique=True)
+
+# Listagem paginada por (nome_item, item_id), usada também na paginação por cursor
+Index("ix_item_ativo_nome_id", Item.nome_item, Item.item_id, postgresql_where=Item.ativo)
+
+# Busca por trecho do nome (ILIKE '%termo%' e similarity) via pg_trgm
+Index(
+    "ix_item_nome_trgm",
+    Item.nome_item,
+    postgresql_using="gin",
+    postgresql_ops={"nome_item": "gin_trgm_ops"},
+)
+
+# Itens ativos por categoria, já na ordem da listagem
+Index(
+    "ix_item_ativo_categoria_nome",
+    Item.categoria_id,
+    Item.nome_item,
+    Item.item_id,
+    postgresql_where=Item.ativo,
+)
+
+# Validade próxima (alertas diários) e relatório de entrada por período
+Index(
+    "ix_item_ativo_validade",
+    Item.data_validade_item,
+    postgresql_where=Item.ativo & Item.data_validade_item.isnot(None),
+)
+Index("ix_item_ativo_data_entrada", Item.data_entrada_item, postgresql_where=Item.ativo)
@@ -1,6 +1,6 @@
 #models\retirada.py
 
-from sqlalchemy import Column, Integer, ForeignKey, String, DateTime, Text, Boolean
+from sqlalchemy import Column, Integer, ForeignKey, String, DateTime, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from core.configs import settings
 from datetime import datetime
@@ -31,4 +31,11 @@ class Retirada(settings.DBBaseModel):
     usuario = relationship("Usuario", foreign_keys=[usuario_id])
     admin = relationship("Usuario", foreign_keys=[autorizado_por])
 
-    itens = relationship("RetiradaItem", back_populates="retirada")
\ No newline at end of file
+    itens = relationship("RetiradaItem", back_populates="retirada")
+
+
+# Listagens e relatórios só enxergam retiradas ativas, sempre das mais recentes para as mais antigas
+Index("ix_retirada_ativa_data", Retirada.data_solicitacao.desc(), postgresql_where=Retirada.is_active)
+Index("ix_retirada_status_data", Retirada.status, Retirada.data_solicitacao.desc(), postgresql_where=Retirada.is_active)
+Index("ix_retirada_usuario_data", Retirada.usuario_id, Retirada.data_solicitacao.desc(), postgresql_where=Retirada.is_active)
+Index("ix_retirada_setor_data", Retirada.setor_id, Retirada.data_solicitacao.desc(), postgresql_where=Retirada.is_active)
@@ -1,6 +1,6 @@
 #models\retirada_item.py
 
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from core.configs import settings
 
@@ -13,3 +13,7 @@ class RetiradaItem(settings.DBBaseModel):
 
     retirada = relationship("Retirada", back_populates="itens")
     item = relationship("Item")
+
+
+# A chave primária começa por retirada_id; consultas por item precisam do próprio índice
+Index("ix_retirada_item_item", RetiradaItem.item_id)
@@ -0,0 +1,23 @@
+#models\upload_job.py
+
+from sqlalchemy import Column, Integer, ForeignKey, String, Text, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from core.configs import settings
+from datetime import datetime
+
+class UploadJob(settings.DBBaseModel):
+    """Estado de um upload em massa em segundo plano, visível a todos os workers."""
+    __tablename__ = "upload_job"
+
+    job_id = Column(String(32), primary_key=True)
+    usuario_id = Column(Integer, ForeignKey("usuario.usuario_id"), nullable=False)  # Dono do job
+    status = Column(String(20), nullable=False)  # pendente, processando, concluido ou falhou
+    total_items_processed = Column(Integer, nullable=False, default=0)
+    items_created = Column(Integer, nullable=False, default=0)
+    items_updated = Column(Integer, nullable=False, default=0)
+    errors = Column(JSONB, nullable=False, default=list)  # [{"row": ..., "error": ...}]
+    detalhe = Column(Text, nullable=True)  # Mensagem de erro quando o job falha
+    criado_em = Column(DateTime, nullable=False, default=datetime.now)
+    finalizado_em = Column(DateTime, nullable=True)
+    # Renovado a cada gravação de progresso; job em andamento sem renovação foi interrompido
+    atualizado_em = Column(DateTime, nullable=False, default=datetime.now)
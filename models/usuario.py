@@ -1,6 +1,6 @@
 #models\usuario.py
 
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean 
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Index
 from core.configs import settings
 from enum import IntEnum
 
@@ -22,3 +22,6 @@ class Usuario(settings.DBBaseModel):
     username = Column(String(100), nullable=False)
     is_active = Column (Boolean, nullable=False, default=True)
 
+
+# Login por username
+Index("ix_usuario_username", Usuario.username)
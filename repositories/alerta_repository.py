@@ -1,45 +1,69 @@
 # repositories/alerta_repository.py
 
-from sqlalchemy import func, or_, and_ , update
+from sqlalchemy import func, or_, and_ , update, insert, literal, false, Integer, DateTime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from models.alerta import Alerta
-from schemas.alerta import AlertaBase
+from models.item import Item
+from repositories.paginacao import Paginacao
 from fastapi import HTTPException, status
 from datetime import datetime
 
 class AlertaRepository:
 
     @staticmethod
-    async def alerta_ja_existe (db, tipo_alerta: int, item_id: int) -> bool:
-        result = await db.execute(
-            select(Alerta).where(
-                Alerta.tipo_alerta == tipo_alerta,
-                Alerta.item_id == item_id,
-               
-                # Um alerta é considerado "existente" e impede a criação de um novo se:
-                or_(
-                    Alerta.ignorar_novos == True, # Se foi marcado para ignorar novos alertas
-                    and_(
-                        Alerta.visualizado == False, # OU se não foi visualizado
-                        Alerta.ignorar_novos == False # E não foi marcado para ignorar
-                    )
+    def _alerta_em_aberto(tipo_alerta: int, item_id):
+        """Condição de alerta "existente", que impede a criação de um novo para o mesmo item/tipo."""
+        return and_(
+            Alerta.tipo_alerta == tipo_alerta,
+            Alerta.item_id == item_id,
+            # Um alerta é considerado "existente" e impede a criação de um novo se:
+            or_(
+                Alerta.ignorar_novos == True, # Se foi marcado para ignorar novos alertas
+                and_(
+                    Alerta.visualizado == False, # OU se não foi visualizado
+                    Alerta.ignorar_novos == False # E não foi marcado para ignorar
                 )
             )
         )
-        return result.scalars().first() is not None
 
     @staticmethod
-    async def create_alerta (db: AsyncSession, alerta_data: AlertaBase):
-        novo_alerta = Alerta(
-            tipo_alerta=alerta_data.tipo_alerta,
-            item_id=alerta_data.item_id,
-            mensagem_alerta=alerta_data.mensagem_alerta,
-            data_alerta=datetime.now()
+    async def inserir_alertas_itens(
+        db: AsyncSession, tipo_alerta: int, condicao, mensagem, item_ids: list[int] | None = None
+    ) -> list:
+        """
+        Cria, num único INSERT ... SELECT, um alerta do tipo para cada item que atende
+        `condicao` e ainda não tem alerta em aberto (NOT EXISTS com a regra de
+        _alerta_em_aberto). `mensagem` é uma expressão SQL sobre o item; `item_ids`
+        restringe os itens avaliados. Não faz commit; retorna linhas
+        (alerta_id, item_id, mensagem_alerta) dos alertas criados.
+        """
+        origem = select(
+            literal(tipo_alerta, Integer),
+            Item.item_id,
+            literal(datetime.now(), DateTime),
+            func.substr(mensagem, 1, 255), # mensagem_alerta é VARCHAR(255)
+            false(),
+            false(),
+        ).where(
+            condicao,
+            ~select(Alerta.alerta_id)
+            .where(AlertaRepository._alerta_em_aberto(tipo_alerta, Item.item_id))
+            .exists(),
         )
-        db.add(novo_alerta)
-        await db.commit()
-        return novo_alerta
+        if item_ids is not None:
+            origem = origem.where(Item.item_id.in_(item_ids))
+
+        stmt = (
+            insert(Alerta)
+            .from_select(
+                ["tipo_alerta", "item_id", "data_alerta", "mensagem_alerta", "visualizado", "ignorar_novos"],
+                origem,
+            )
+            .returning(Alerta.alerta_id, Alerta.item_id, Alerta.mensagem_alerta)
+        )
+        result = await db.execute(stmt)
+        return result.all()
 
     @staticmethod
     async def get_alertas (db: AsyncSession):
@@ -52,34 +76,6 @@ class AlertaRepository:
         result = await db.execute(select(Alerta).where(Alerta.alerta_id == alerta_id))
         return result.scalars().first()
 
-    @staticmethod
-    async def count_alertas(
-        db: AsyncSession,
-        tipo_alerta: int | None = None,
-        search_term: str | None = None
-    ) -> int:
-        query = select(func.count()).select_from(Alerta)
-
-        # Adicionar filtros
-        if tipo_alerta is not None:
-            query = query.where(Alerta.tipo_alerta == tipo_alerta)
-
-        if search_term:
-            # Tentar buscar por mensagem ou por ID do item.
-            # Se a busca por item_id for numérica, precisa de tratamento para evitar erro
-            try:
-                item_id_int = int(search_term)
-                query = query.where(
-                    (Alerta.mensagem_alerta.ilike(f"%{search_term}%")) |
-                    (Alerta.item_id == item_id_int)
-                )
-            except ValueError:
-                # Se não for um ID de item numérico, busca apenas na mensagem
-                query = query.where(Alerta.mensagem_alerta.ilike(f"%{search_term}%"))
-
-        result = await db.execute(query)
-        return result.scalar_one()
-
     @staticmethod
     async def get_alertas_paginated(
         db: AsyncSession,
@@ -87,10 +83,10 @@ class AlertaRepository:
         limit: int,
         tipo_alerta: int | None = None,
         search_term: str | None = None
-    ) -> list[Alerta]:
+    ) -> tuple[list[Alerta], int]:
         query = select(Alerta)
 
-        # Adicionar filtros (mesma lógica de count_alertas)
+        # Adicionar filtros
         if tipo_alerta is not None:
             query = query.where(Alerta.tipo_alerta == tipo_alerta)
 
@@ -102,17 +98,20 @@ class AlertaRepository:
                     (Alerta.item_id == item_id_int)
                 )
             except ValueError:
+                # Se não for um ID de item numérico, busca apenas na mensagem
                 query = query.where(Alerta.mensagem_alerta.ilike(f"%{search_term}%"))
 
-        query = query.offset(offset).limit(limit).order_by(Alerta.data_alerta.desc())
-        result = await db.execute(query)
-        return result.scalars().all()
+        # Sem filtros, o total pode vir do cache de totais
+        chave_cache = "alertas" if tipo_alerta is None and not search_term else None
+        query = query.order_by(Alerta.data_alerta.desc(), Alerta.alerta_id.desc())
+        return await Paginacao.paginar(db, query, offset, limit, chave_cache)
 
     @staticmethod
     async def delete_alerta (db: AsyncSession, alerta_id: int):
         alerta = await AlertaRepository.get_alerta_by_id(db, alerta_id)
         await db.delete(alerta)
         await db.commit()
+        Paginacao.invalidar("alertas")
         return {"message": "Alerta deletado com sucesso"}
 
     @staticmethod
@@ -122,6 +121,7 @@ class AlertaRepository:
             return None
         alerta.ignorar_novos = True
         await db.commit()
+        Paginacao.invalidar("alertas")
         return alerta
 
     # Conta alertas não visualizados
@@ -140,3 +140,4 @@ class AlertaRepository:
             values(visualizado=True) # definir visualizado como True
         )
         await db.commit()
+        Paginacao.invalidar("alertas")
@@ -0,0 +1,28 @@
+# repositories/busca_trigram.py
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class BuscaTrigram:
+    """
+    Busca por trecho de nome apoiada nos índices GIN pg_trgm (gin_trgm_ops).
+    O filtro continua sendo ILIKE '%termo%', que o índice trigram atende no PostgreSQL;
+    a ordenação por relevância usa similarity() quando o banco é PostgreSQL
+    e cai para ordem alfabética nos demais (ex.: SQLite em testes).
+    """
+
+    @staticmethod
+    def filtro(coluna, termo_normalizado: str):
+        return coluna.ilike(f"%{termo_normalizado}%")
+
+    @staticmethod
+    def suporta_similaridade(db: AsyncSession) -> bool:
+        return db.get_bind().dialect.name == "postgresql"
+
+    @staticmethod
+    def ordenacao(db: AsyncSession, coluna, termo_normalizado: str | None, por_relevancia: bool = True) -> list:
+        """Critérios de ORDER BY: mais parecidos primeiro, desempate pelo próprio nome."""
+        if termo_normalizado and por_relevancia and BuscaTrigram.suporta_similaridade(db):
+            return [func.similarity(coluna, termo_normalizado).desc(), coluna]
+        return [coluna]
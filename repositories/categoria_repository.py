@@ -6,6 +6,8 @@ from sqlalchemy.future import select
 from models.categoria import Categoria
 from fastapi import HTTPException, status
 from models import Item
+from repositories.busca_trigram import BuscaTrigram
+from repositories.paginacao import Paginacao
 
 
 class CategoriaRepository:
@@ -50,9 +52,9 @@ class CategoriaRepository:
     @staticmethod
     async def get_categoria_by_name_like(db: AsyncSession, termo_busca: str):
         result = await db.execute(
-            select(Categoria).where(
-                Categoria.nome_categoria.ilike(f"%{termo_busca}%")
-            )
+            select(Categoria)
+            .where(BuscaTrigram.filtro(Categoria.nome_categoria, termo_busca))
+            .order_by(*BuscaTrigram.ordenacao(db, Categoria.nome_categoria, termo_busca))
         )
         return result
 
@@ -103,61 +105,32 @@ class CategoriaRepository:
         return {"message": "Categoria excluída com sucesso"}
 
     
-    @staticmethod
-    async def find_categoria_ids_by_name(db: AsyncSession, nome_normalizado: str) -> list[int]:
-        result = await db.execute(
-            select(Categoria.categoria_id)
-            .where(Categoria.nome_categoria.ilike(f"%{nome_normalizado}%"))
-        )
-        return [r[0] for r in result.all()]
-    
-    @staticmethod
-    async def count_categorias(db: AsyncSession) -> int:
-        result = await db.execute(select(func.count()).select_from(Categoria))
-        return result.scalar_one()
-
     @staticmethod
     async def get_categorias_paginated(
         db: AsyncSession,
         offset: int,
         limit: int
-    ) -> list[Categoria]:
-        result = await db.execute(
-            select(Categoria)
-            .offset(offset)
-            .limit(limit)
-        )
-        return result.scalars().all()
+    ) -> tuple[list[Categoria], int]:
+        query = select(Categoria).order_by(Categoria.categoria_id)
+        return await Paginacao.paginar(db, query, offset, limit, chave_cache="categorias")
     
-    @staticmethod
-    async def count_filtered_categorias(
-        db: AsyncSession,
-        categoria_ids: list[int] | None,
-        nome_categoria_normalizado: str | None
-    ) -> int:
-        query = select(func.count()).select_from(Categoria)
-        if categoria_ids:
-            query = query.where(Categoria.categoria_id.in_(categoria_ids))
-        if nome_categoria_normalizado:
-            query = query.where(Categoria.nome_categoria.ilike(f"%{nome_categoria_normalizado}%"))
-        result = await db.execute(query)
-        return result.scalar_one()
-
     @staticmethod
     async def get_filtered_categorias_paginated(
         db: AsyncSession,
         categoria_ids: list[int] | None,
         nome_categorias_normalizado: str | None,
         offset: int, limit: int
-    ) -> list[Categoria]:
+    ) -> tuple[list[Categoria], int]:
         query = select(Categoria)
         if categoria_ids:
             query = query.where(Categoria.categoria_id.in_(categoria_ids))
         if nome_categorias_normalizado:
-            query = query.where(Categoria.nome_categoria.ilike(f"%{nome_categorias_normalizado}%"))
-        query = query.offset(offset).limit(limit)
-        result = await db.execute(query)
-        return result.scalars().all()
+            query = query.where(BuscaTrigram.filtro(Categoria.nome_categoria, nome_categorias_normalizado))
+        query = query.order_by(
+            *BuscaTrigram.ordenacao(db, Categoria.nome_categoria, nome_categorias_normalizado),
+            Categoria.categoria_id,
+        )
+        return await Paginacao.paginar(db, query, offset, limit)
 
     @staticmethod
     async def __first_or_404(db: AsyncSession, where_expr):
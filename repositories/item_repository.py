@@ -1,9 +1,13 @@
 # repositories/item_repository.py
 
-from sqlalchemy import func, select
+from typing import AsyncIterator
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from models.item import Item
+from models.item import Item, ITEM_IDENTIDADE
 from models.categoria import Categoria
+from repositories.busca_trigram import BuscaTrigram
+from repositories.paginacao import Paginacao
 
 class ItemRepository:
 
@@ -14,6 +18,35 @@ class ItemRepository:
         await db.refresh(item)
         return item
 
+    @staticmethod
+    async def upsert_incrementando(db: AsyncSession, dados: dict) -> Item:
+        """
+        Cria o item ou, se já existir um com a mesma identidade (uq_item_identidade),
+        soma a quantidade ao existente e o reativa. Uma única ida ao banco:
+        INSERT ... ON CONFLICT DO UPDATE ... RETURNING.
+        """
+        stmt = pg_insert(Item).values(**dados)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(ITEM_IDENTIDADE),
+            set_={
+                "quantidade_item": Item.quantidade_item + stmt.excluded.quantidade_item,
+                "data_entrada_item": stmt.excluded.data_entrada_item,
+                "quantidade_minima_item": func.coalesce(
+                    stmt.excluded.quantidade_minima_item, Item.quantidade_minima_item
+                ),
+                "auditoria_usuario_id": stmt.excluded.auditoria_usuario_id,
+                "ativo": True,  # Reativa itens inativos que recebem estoque
+                "versao": Item.versao + 1,
+            },
+        ).returning(Item)
+
+        result = await db.execute(
+            select(Item).from_statement(stmt).execution_options(populate_existing=True)
+        )
+        item = result.scalar_one()
+        await db.commit()
+        return item
+
     @staticmethod
     async def get_all(db: AsyncSession) -> list[Item]:
         # Retorna apenas itens ativos
@@ -35,16 +68,14 @@ class ItemRepository:
         # Não é necessário db.delete(item) para soft delete
 
     @staticmethod
-    async def count(db: AsyncSession) -> int:
-        # Conta apenas itens ativos
-        result = await db.execute(select(func.count()).select_from(Item).where(Item.ativo == True))
-        return result.scalar_one()
-
-    @staticmethod
-    async def get_paginated(db: AsyncSession, offset: int, limit: int) -> list[Item]:
-        # Retorna apenas itens ativos
-        result = await db.execute(select(Item).where(Item.ativo == True).offset(offset).limit(limit))
-        return result.scalars().all()
+    async def get_paginated(
+        db: AsyncSession, offset: int, limit: int, apos: tuple[str, int] | None = None
+    ) -> tuple[list[Item], int]:
+        # Retorna apenas itens ativos, em ordem estável (nome_item, item_id), e o total de ativos
+        query = select(Item).where(Item.ativo == True)
+        return await ItemRepository._paginar_por_nome(
+            db, query, offset, limit, apos, chave_cache="itens_ativos"
+        )
 
     @staticmethod
     async def find_filtered(
@@ -56,59 +87,87 @@ class ItemRepository:
         query = select(Item, Categoria.nome_categoria).join(
             Categoria, Item.categoria_id == Categoria.categoria_id
         ).where(Item.ativo == True) # Adiciona filtro de ativo
-
-        if categoria_ids:
-            query = query.where(Item.categoria_id.in_(categoria_ids))
-
-        if nome_produto_normalizado:
-            query = query.where(
-                Item.nome_item.ilike(f"%{nome_produto_normalizado}%")
-            )
+        query = ItemRepository._aplicar_filtros(query, categoria_ids, nome_produto_normalizado)
 
         result = await db.execute(query)
         return result.all()
 
     @staticmethod
-    async def count_filtered(
+    async def get_filtered_paginated(
         db: AsyncSession,
         categoria_ids: list[int] | None = None,
         nome_produto_normalizado: str | None = None,
-    ) -> int:
-        # Conta apenas itens ativos
-        query = select(func.count()).select_from(Item).where(Item.ativo == True) # Adiciona filtro de ativo
-        if categoria_ids:
-            query = query.where(Item.categoria_id.in_(categoria_ids))
+        offset: int = 0,
+        limit: int = 10,
+        por_relevancia: bool = True,
+        apos: tuple[str, int] | None = None,
+    ) -> tuple[list[Item], int]:
+        # Retorna apenas itens ativos e o total que atende aos filtros
+        query = select(Item).where(Item.ativo == True) # Adiciona filtro de ativo
+        query = ItemRepository._aplicar_filtros(query, categoria_ids, nome_produto_normalizado)
 
-        if nome_produto_normalizado:
-            query = query.where(
-                Item.nome_item.ilike(f"%{nome_produto_normalizado}%")
-            )
+        if apos is not None or not por_relevancia:
+            return await ItemRepository._paginar_por_nome(db, query, offset, limit, apos)
 
-        result = await db.execute(query)
-        return result.scalar_one()
+        # Mais parecidos com o termo primeiro; ordem estável entre páginas
+        query = query.order_by(
+            *BuscaTrigram.ordenacao(db, Item.nome_item, nome_produto_normalizado),
+            Item.item_id,
+        )
+        return await Paginacao.paginar(db, query, offset, limit)
 
     @staticmethod
-    async def get_filtered_paginated(
+    async def stream_filtered(
         db: AsyncSession,
+        colunas: list[str],
         categoria_ids: list[int] | None = None,
         nome_produto_normalizado: str | None = None,
-        offset: int = 0,
-        limit: int = 10,
-    ) -> list[Item]:
-        # Retorna apenas itens ativos
-        query = select(Item).where(Item.ativo == True) # Adiciona filtro de ativo
+        tamanho_lote: int = 1000,
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Percorre os itens ativos filtrados com cursor no servidor, entregando lotes de
+        até tamanho_lote linhas (dicts só com as colunas pedidas, sem objetos ORM).
+        """
+        tabela = Item.__table__
+        query = select(*(tabela.c[coluna] for coluna in colunas)).where(Item.ativo == True)
+        query = ItemRepository._aplicar_filtros(query, categoria_ids, nome_produto_normalizado)
+        query = query.order_by(Item.nome_item, Item.item_id).execution_options(yield_per=tamanho_lote)
+
+        result = await db.stream(query)
+        async for lote in result.mappings().partitions():
+            yield [dict(linha) for linha in lote]
 
+    @staticmethod
+    def _aplicar_filtros(query, categoria_ids: list[int] | None, nome_produto_normalizado: str | None):
         if categoria_ids:
             query = query.where(Item.categoria_id.in_(categoria_ids))
 
         if nome_produto_normalizado:
-            query = query.where(
-                Item.nome_item.ilike(f"%{nome_produto_normalizado}%")
-            )
+            query = query.where(BuscaTrigram.filtro(Item.nome_item, nome_produto_normalizado))
+        return query
 
-        query = query.offset(offset).limit(limit)
+    @staticmethod
+    async def _paginar_por_nome(
+        db: AsyncSession,
+        query,
+        offset: int,
+        limit: int,
+        apos: tuple[str, int] | None,
+        chave_cache: str | None = None,
+    ) -> tuple[list[Item], int]:
+        if apos is None:
+            query = query.order_by(Item.nome_item, Item.item_id)
+            return await Paginacao.paginar(db, query, offset, limit, chave_cache)
+
+        # Paginação por cursor: o total não depende da posição, então é contado antes do filtro
+        total = await Paginacao.contar(db, query, chave_cache)
+        query = (
+            query.where(tuple_(Item.nome_item, Item.item_id) > tuple_(*apos))
+            .order_by(Item.nome_item, Item.item_id)
+            .limit(limit)
+        )
         result = await db.execute(query)
-        return result.scalars().all()
+        return list(result.scalars().all()), total
 
     @staticmethod
     async def get_items_by_category(db: AsyncSession, categoria_id: int) -> list[Item]:
@@ -139,14 +198,6 @@ class ItemRepository:
         result = await db.execute(query)
         return result.mappings().all()
 
-    @staticmethod
-    async def get_items_expiring_before(db: AsyncSession, date) -> list[Item]:
-        # Retorna apenas itens ativos
-        result = await db.execute(
-            select(Item).where(Item.data_validade_item <= date, Item.ativo == True) # Adiciona filtro de ativo
-        )
-        return result.scalars().all()
-
     @staticmethod
     async def find_low_stock(db: AsyncSession) -> list[Item]:
         # Retorna apenas itens ativos
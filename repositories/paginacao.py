@@ -0,0 +1,96 @@
+# repositories/paginacao.py
+
+import time
+from collections import OrderedDict
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.configs import settings
+
+
+class Paginacao:
+    """
+    Página + total em uma única consulta: o total vem de COUNT(*) OVER () calculado
+    sobre as linhas já filtradas, antes do LIMIT/OFFSET.
+    Totais de listagens sem filtro podem ser guardados por PAGINATION_TOTAL_CACHE_SECONDS
+    (por processo); nesse caso a página é buscada sem a função de janela.
+    """
+    # chave -> (total, expira_em), em ordem de uso; limitado a MAX_CHAVES
+    _totais: OrderedDict[str, tuple[int, float]] = OrderedDict()
+    MAX_CHAVES = 256
+
+    @staticmethod
+    async def paginar(
+        db: AsyncSession,
+        query: Select,
+        offset: int,
+        limit: int,
+        chave_cache: str | None = None,
+    ) -> tuple[list, int]:
+        """
+        Executa query (já filtrada e ordenada, com uma única entidade selecionada)
+        paginada e devolve (itens da página, total de linhas que atendem aos filtros).
+        chave_cache só deve ser informada em listagens sem filtros do usuário.
+        """
+        total = Paginacao._total_em_cache(chave_cache)
+        if total is not None:
+            result = await db.execute(query.offset(offset).limit(limit))
+            return list(result.scalars().all()), total
+
+        result = await db.execute(
+            query.add_columns(func.count().over().label("total_paginacao"))
+            .offset(offset)
+            .limit(limit)
+        )
+        linhas = result.all()
+        if linhas:
+            total = linhas[0].total_paginacao
+        elif offset == 0:
+            total = 0
+        else:
+            # Página além do fim: a janela não devolve linhas, então conta à parte
+            total = await Paginacao.contar(db, query)
+
+        Paginacao._guardar_total(chave_cache, total)
+        return [linha[0] for linha in linhas], total
+
+    @staticmethod
+    async def contar(db: AsyncSession, query: Select, chave_cache: str | None = None) -> int:
+        """Total de linhas de query (sem ORDER BY/LIMIT), usando o cache quando houver chave."""
+        total = Paginacao._total_em_cache(chave_cache)
+        if total is None:
+            subquery = query.order_by(None).limit(None).offset(None).subquery()
+            total = (await db.execute(select(func.count()).select_from(subquery))).scalar_one()
+            Paginacao._guardar_total(chave_cache, total)
+        return total
+
+    @staticmethod
+    def _total_em_cache(chave: str | None) -> int | None:
+        if chave is None or settings.PAGINATION_TOTAL_CACHE_SECONDS <= 0:
+            return None
+        guardado = Paginacao._totais.get(chave)
+        if guardado is None:
+            return None
+        if guardado[1] <= time.monotonic():
+            del Paginacao._totais[chave]
+            return None
+        Paginacao._totais.move_to_end(chave)
+        return guardado[0]
+
+    @staticmethod
+    def _guardar_total(chave: str | None, total: int) -> None:
+        if chave is None or settings.PAGINATION_TOTAL_CACHE_SECONDS <= 0:
+            return
+        agora = time.monotonic()
+        # Descarta os expirados e, se ainda cheio, os menos usados
+        for expirada in [c for c, (_, expira_em) in Paginacao._totais.items() if expira_em <= agora]:
+            del Paginacao._totais[expirada]
+        Paginacao._totais[chave] = (total, agora + settings.PAGINATION_TOTAL_CACHE_SECONDS)
+        Paginacao._totais.move_to_end(chave)
+        while len(Paginacao._totais) > Paginacao.MAX_CHAVES:
+            Paginacao._totais.popitem(last=False)
+
+    @staticmethod
+    def invalidar(*chaves: str) -> None:
+        """Esquece os totais das chaves após uma escrita que os altera (só neste processo)."""
+        for chave in chaves:
+            Paginacao._totais.pop(chave, None)
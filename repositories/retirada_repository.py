@@ -1,6 +1,6 @@
 # repositories/retirada_repository.py
 
-from sqlalchemy import func, and_, or_, update # Importe 'update'
+from sqlalchemy import func, and_, or_, update, insert, values, column, case, true, Integer # Importe 'update'
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload, aliased
@@ -9,20 +9,15 @@ from models.retirada import Retirada, StatusEnum
 from models.retirada_item import RetiradaItem
 from models.item import Item
 from models.usuario import Usuario
+from repositories.paginacao import Paginacao
 from datetime import datetime
 
 class RetiradaRepository:
 
     @staticmethod
-    async def count_retiradas(db: AsyncSession) -> int:
-        """Conta o total de retiradas ativas no banco de dados."""
-        result = await db.execute(select(func.count(Retirada.retirada_id)).where(Retirada.is_active == True))
-        return result.scalar_one()
-
-    @staticmethod
-    async def get_retiradas_paginated(db: AsyncSession, offset: int, limit: int):
+    async def get_retiradas_paginated(db: AsyncSession, offset: int, limit: int) -> tuple[list[Retirada], int]:
         """Retorna uma lista paginada de retiradas ativas, ordenadas por data_solicitacao (desc),
-        com eager loading de itens, usuário e admin."""
+        com eager loading de itens, usuário e admin, e o total de retiradas ativas."""
         q = (
             select(Retirada)
             .options(
@@ -32,24 +27,13 @@ class RetiradaRepository:
             )
             .where(Retirada.is_active == True) # Filtra apenas retiradas ativas
             .order_by(Retirada.data_solicitacao.desc()) # ordena do mais recente para o mais antigo
-            .offset(offset)
-            .limit(limit)
-        )
-        return (await db.execute(q)).scalars().all()
-
-    @staticmethod
-    async def count_retiradas_pendentes(db: AsyncSession) -> int:
-        """Conta o total de retiradas ativas com status PENDENTE."""
-        result = await db.execute(
-            select(func.count(Retirada.retirada_id))
-            .where(and_(Retirada.status == StatusEnum.PENDENTE, Retirada.is_active == True)) # Adiciona filtro de ativo
         )
-        return result.scalar_one()
+        return await Paginacao.paginar(db, q, offset, limit, chave_cache="retiradas_ativas")
 
     @staticmethod
-    async def get_retiradas_pendentes_paginated(db: AsyncSession, offset: int, limit: int):
+    async def get_retiradas_pendentes_paginated(db: AsyncSession, offset: int, limit: int) -> tuple[list[Retirada], int]:
         """Retorna uma lista paginada de retiradas ativas e pendentes, ordenadas por data_solicitacao (desc),
-        com eager loading de itens, usuário e admin."""
+        com eager loading de itens, usuário e admin, e o total de pendentes."""
         q = (
             select(Retirada)
             .options(
@@ -59,39 +43,9 @@ class RetiradaRepository:
             )
             .where(and_(Retirada.status == StatusEnum.PENDENTE, Retirada.is_active == True)) # Adiciona filtro de ativo
             .order_by(Retirada.data_solicitacao.desc()) # pendentes mais recentes primeiro
-            .offset(offset)
-            .limit(limit)
         )
-        return (await db.execute(q)).scalars().all()
-
-    @staticmethod
-    async def count_retiradas_filter(db: AsyncSession, params: RetiradaFilterParams) -> int:
-        """Conta o total de retiradas ativas filtradas com base nos parâmetros fornecidos."""
-        q = select(func.count(Retirada.retirada_id)).where(Retirada.is_active == True) # Adiciona filtro de ativo
-        conditions = []
-
-        if params.status is not None:
-            conditions.append(Retirada.status == params.status)
-        if params.solicitante:
-            alias = aliased(Usuario)
-            q = q.select_from(Retirada).join(alias, Retirada.usuario)
-            conditions.append(
-                or_(
-                    alias.nome_usuario.ilike(f"%{params.solicitante}%"),
-                    Retirada.solicitado_localmente_por.ilike(f"%{params.solicitante}%")
-                )
-            )
-        if params.start_date and params.end_date:
-            conditions.append(
-                and_(
-                    Retirada.data_solicitacao >= params.start_date, # Usar >=
-                    Retirada.data_solicitacao <= params.end_date # Usar <=
-                )
-            )
-        if conditions:
-            q = q.where(and_(*conditions)) # Usa and_ para combinar todas as condições
-
-        return (await db.execute(q)).scalar_one()
+        # Sem cache do total: é a lista que mais muda e a que o almoxarifado acompanha
+        return await Paginacao.paginar(db, q, offset, limit)
 
     @staticmethod
     async def filter_retiradas_paginated(
@@ -99,9 +53,10 @@ class RetiradaRepository:
         params: RetiradaFilterParams,
         offset: int,
         limit: int
-    ):
+    ) -> tuple[list[Retirada], int]:
         """Filtra e retorna retiradas ativas paginadas com base nos parâmetros fornecidos,
-        ordenadas por data_solicitacao (desc), com eager loading de itens, usuário e admin."""
+        ordenadas por data_solicitacao (desc), com eager loading de itens, usuário e admin,
+        e o total de retiradas que atendem aos filtros."""
         q = select(Retirada).where(Retirada.is_active == True) # Adiciona filtro de ativo
         q = q.options(
             selectinload(Retirada.itens).selectinload(RetiradaItem.item),
@@ -132,26 +87,38 @@ class RetiradaRepository:
         if conditions:
             q = q.where(and_(*conditions))
 
-        q = (
-            q.order_by(Retirada.data_solicitacao.desc())
-            .offset(offset)
-            .limit(limit)
-        )
-        return (await db.execute(q)).scalars().all()
+        q = q.order_by(Retirada.data_solicitacao.desc())
+        return await Paginacao.paginar(db, q, offset, limit)
 
     @staticmethod
-    async def criar_retirada(db: AsyncSession, retirada: Retirada):
-        """Adiciona uma nova retirada ao banco de dados e a atualiza para obter o ID."""
-        db.add(retirada)
-        await db.flush()
-        await db.refresh(retirada)
-        return retirada
+    async def buscar_itens(db: AsyncSession, item_ids: list[int]) -> dict[int, Item]:
+        """Carrega de uma vez os itens de uma solicitação (ativos ou não), por item_id."""
+        result = await db.execute(select(Item).where(Item.item_id.in_(item_ids)))
+        return {item.item_id: item for item in result.scalars().all()}
 
     @staticmethod
-    async def adicionar_itens_retirada(db: AsyncSession, itens: list[RetiradaItem]):
-        """Adiciona múltiplos itens a uma retirada no banco de dados."""
-        db.add_all(itens)
-        await db.flush()
+    async def inserir_com_itens(db: AsyncSession, dados: dict, quantidades: dict[int, int]) -> int:
+        """
+        Insere o cabeçalho da retirada e todas as suas linhas num único comando
+        (WITH nova_retirada AS (INSERT ... RETURNING) INSERT ... SELECT ... RETURNING)
+        e retorna o retirada_id. Não faz commit; `quantidades` não pode ser vazio.
+        """
+        cabecalho = insert(Retirada).values(**dados).returning(Retirada.retirada_id).cte("nova_retirada")
+        linhas = values(
+            column("item_id", Integer), column("quantidade_retirada", Integer), name="linhas"
+        ).data(list(quantidades.items()))
+        stmt = (
+            insert(RetiradaItem)
+            .from_select(
+                ["retirada_id", "item_id", "quantidade_retirada"],
+                select(cabecalho.c.retirada_id, linhas.c.item_id, linhas.c.quantidade_retirada)
+                .select_from(cabecalho)
+                .join(linhas, true()),
+            )
+            .returning(RetiradaItem.retirada_id)
+        )
+        result = await db.execute(stmt)
+        return result.scalars().first()
 
     @staticmethod
     async def buscar_retirada_por_id(db: AsyncSession, retirada_id: int):
@@ -164,6 +131,8 @@ class RetiradaRepository:
                 selectinload(Retirada.admin),
             )
             .where(and_(Retirada.retirada_id == retirada_id, Retirada.is_active == True)) # Adiciona filtro de ativo
+            # Relê do banco mesmo que a retirada já esteja na sessão (ex.: após um UPDATE direto)
+            .execution_options(populate_existing=True)
         )
         return result.scalars().first()
 
@@ -233,31 +202,95 @@ class RetiradaRepository:
         return result.scalars().unique().all()
 
     @staticmethod
-    async def atualizar_retirada(db: AsyncSession, retirada: Retirada):
-        """Atualiza uma retirada existente no banco de dados."""
-        # Não é necessário filtrar por is_active aqui, pois o objeto `retirada` já foi buscado
-        # e estamos atualizando ele.
-        await db.commit()
-        await db.refresh(retirada)
-        return retirada
+    async def atualizar_status_condicional(
+        db: AsyncSession, retirada_id: int, novo_status: int, detalhe_status: str | None, autorizado_por: int
+    ) -> bool:
+        """
+        Muda o status de uma retirada ativa que ainda não foi concluída, num único UPDATE
+        condicional. Não faz commit. Retorna False se nenhuma linha atendeu à condição.
+        A linha fica travada até o fim da transação: uma segunda transação concorrente
+        espera, reavalia o WHERE após o commit da primeira e não a encontra mais.
+        """
+        result = await db.execute(
+            update(Retirada)
+            .where(
+                Retirada.retirada_id == retirada_id,
+                Retirada.is_active == True,
+                Retirada.status != StatusEnum.CONCLUIDA.value,
+            )
+            .values(status=novo_status, detalhe_status=detalhe_status, autorizado_por=autorizado_por)
+            .returning(Retirada.retirada_id)
+            .execution_options(synchronize_session=False)
+        )
+        return result.scalar_one_or_none() is not None
 
     @staticmethod
-    async def buscar_item_por_id(db: AsyncSession, item_id: int):
-        """Busca um item pelo ID."""
-        result = await db.execute(select(Item).where(Item.item_id == item_id))
-        return result.scalars().first()
+    async def decrementar_estoque(db: AsyncSession, quantidades: dict[int, int]) -> list[dict]:
+        """
+        Baixa o estoque de todos os itens (item_id -> quantidade) num único UPDATE
+        condicional, inativando os que chegam a zero. Não faz commit.
+        Retorna os itens sem saldo suficiente (vazio se todos foram baixados); nesse
+        caso os demais já foram atualizados e quem chamou deve desfazer a transação.
+        """
+        ids = sorted(quantidades)
+        valores = values(
+            column("item_id", Integer), column("quantidade", Integer), name="retirada_qtd"
+        ).data([(item_id, quantidades[item_id]) for item_id in ids])
+        # Trava as linhas em ordem de item_id antes do UPDATE: duas retiradas concorrentes
+        # com itens em comum esperam uma pela outra em vez de entrar em deadlock
+        bloqueio = (
+            select(Item.item_id)
+            .where(Item.item_id.in_(ids))
+            .order_by(Item.item_id)
+            .with_for_update()
+            .cte("bloqueio")
+        )
+        restante = Item.quantidade_item - valores.c.quantidade
+        stmt = (
+            update(Item)
+            .where(
+                Item.item_id == valores.c.item_id,
+                Item.item_id == bloqueio.c.item_id,
+                # Reavaliado pelo PostgreSQL sobre a versão mais recente da linha
+                Item.quantidade_item >= valores.c.quantidade,
+            )
+            .values(
+                quantidade_item=restante,
+                ativo=case((restante == 0, False), else_=Item.ativo),
+                versao=Item.versao + 1,
+            )
+            .returning(Item)
+        )
+        # populate_existing atualiza os itens já carregados na sessão (ex.: retirada.itens[].item)
+        result = await db.execute(
+            select(Item).from_statement(stmt).execution_options(populate_existing=True)
+        )
+        baixados = {item.item_id for item in result.scalars().all()}
+        if len(baixados) == len(ids):
+            return []
 
-    @staticmethod
-    async def atualizar_quantidade_item(db: AsyncSession, item: Item, nova_quantidade: int):
-        """Atualiza a quantidade de um item no estoque."""
-        item.quantidade_item = nova_quantidade
-        await db.flush()
-        return item
+        faltando = [item_id for item_id in ids if item_id not in baixados]
+        result = await db.execute(
+            select(Item.item_id, Item.nome_item_original, Item.quantidade_item)
+            .where(Item.item_id.in_(faltando))
+        )
+        disponiveis = {item_id: (nome, quantidade) for item_id, nome, quantidade in result.all()}
+        return [
+            {
+                "item_id": item_id,
+                "nome_item": disponiveis[item_id][0] if item_id in disponiveis else None,
+                "disponivel": disponiveis[item_id][1] if item_id in disponiveis else 0,
+                "solicitada": quantidades[item_id],
+            }
+            for item_id in faltando
+        ]
 
     @staticmethod
-    async def get_retiradas_by_user_paginated(db: AsyncSession, usuario_id: int, offset: int, limit: int):
+    async def get_retiradas_by_user_paginated(
+        db: AsyncSession, usuario_id: int, offset: int, limit: int
+    ) -> tuple[list[Retirada], int]:
         """Retorna retiradas ativas paginadas para um usuário específico, ordenadas por data_solicitacao (desc),
-        com eager loading de itens, usuário e admin."""
+        com eager loading de itens, usuário e admin, e o total de retiradas do usuário."""
         query = (
             select(Retirada)
             .where(and_(Retirada.usuario_id == usuario_id, Retirada.is_active == True)) # Adiciona filtro de ativo
@@ -267,21 +300,9 @@ class RetiradaRepository:
                 selectinload(Retirada.admin),
             )
             .order_by(Retirada.data_solicitacao.desc())
-            .offset(offset)
-            .limit(limit)
         )
-        result = await db.execute(query)
-        return result.scalars().all()
+        return await Paginacao.paginar(db, query, offset, limit)
 
-    @staticmethod
-    async def count_retiradas_by_user(db: AsyncSession, usuario_id: int) -> int:
-        """Conta o total de retiradas ativas para um usuário específico."""
-        result = await db.execute(
-            select(func.count(Retirada.retirada_id))
-            .where(and_(Retirada.usuario_id == usuario_id, Retirada.is_active == True)) # Adiciona filtro de ativo
-        )
-        return result.scalar_one()
-    
     @staticmethod
     async def soft_delete_by_period(db: AsyncSession, start_date: datetime, end_date: datetime) -> int:
         """
@@ -14,7 +14,7 @@ class UsuarioRepository:
         new_user = Usuario(
             siape_usuario=user_data.siape_usuario,
             nome_usuario=user_data.nome_usuario,
-            senha_usuario=get_password_hash(user_data.senha_usuario),
+            senha_usuario=await get_password_hash(user_data.senha_usuario),
             tipo_usuario=user_data.tipo_usuario,
             email_usuario=user_data.email_usuario,
             setor_id=user_data.setor_id,
@@ -90,7 +90,7 @@ class UsuarioRepository:
             usuario.setor_id = usuario_data.setor_id
 
         if usuario_data.senha_usuario:
-            usuario.senha_usuario = get_password_hash(usuario_data.senha_usuario)
+            usuario.senha_usuario = await get_password_hash(usuario_data.senha_usuario)
 
         if usuario_data.username:
             usuario.username = usuario_data.username.lower()
@@ -61,6 +61,7 @@ class PaginatedItems(BaseModel):
     total: int # total de itens no banco
     total_pages: int # total de páginas (ceil(total/size))
     items: List[ItemOut]
+    next_cursor: Optional[str] = None # cursor da próxima página (None na última)
 
     model_config = {
         'from_attributes': True
@@ -76,3 +77,9 @@ class BulkItemUploadResult(BaseModel):
     model_config = {
         'from_attributes': True
     }
+
+# Schema para o acompanhamento do upload em massa executado em segundo plano
+class BulkUploadJobStatus(BulkItemUploadResult):
+    job_id: str
+    status: str # pendente, processando, concluido ou falhou
+    detalhe: Optional[str] = None # mensagem de erro quando o job falha
@@ -1,42 +1,96 @@
 # services/alerta_service.py
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import and_, literal
 from datetime import datetime, timedelta
 from models.alerta import TipoAlerta
 from models.item import Item
-from repositories.item_repository import ItemRepository
+from models.usuario import RoleEnum
 from repositories.alerta_repository import AlertaRepository
-from schemas.alerta import AlertaBase, PaginatedAlertas, AlertaOut
+from repositories.paginacao import Paginacao
+from schemas.alerta import PaginatedAlertas, AlertaOut
 from utils.websocket_endpoints import manager # Importar o manager
 from fastapi import HTTPException, status
 import math
+import time
+from utils.logger import logger
+
+# Perfis que acompanham os alertas; servidores (USUARIO_GERAL) não os recebem
+PERFIS_ALERTA = (RoleEnum.USUARIO_ALMOXARIFADO, RoleEnum.USUARIO_DIRECAO)
 
 class AlertaService:
+    # Métricas da última execução de generate_daily_alerts (expostas em /admin/metricas)
+    ultima_execucao_diaria: dict | None = None
+
     @staticmethod
-    async def generate_daily_alerts(db: AsyncSession):
-        # Verificar validade e estoque juntos
-        await AlertaService.verificar_validade_itens(db)
-        await AlertaService.verificar_estoque_baixo(db)
+    async def generate_daily_alerts(db: AsyncSession) -> dict:
+        """
+        Varredura diária: um INSERT ... SELECT ... WHERE NOT EXISTS por tipo de alerta,
+        um único commit e uma única notificação agregada. Retorna as métricas da execução.
+        """
+        inicio = time.perf_counter()
+        alertas_validade = await AlertaService.verificar_validade_itens(db)
+        fim_validade = time.perf_counter()
+        alertas_estoque = await AlertaService.verificar_estoque_baixo(db)
+        fim_estoque = time.perf_counter()
+        await db.commit()
+        fim_commit = time.perf_counter()
+        Paginacao.invalidar("alertas")
+
+        metricas = {
+            "executado_em": datetime.now().isoformat(timespec="seconds"),
+            "alertas_validade": len(alertas_validade),
+            "alertas_estoque_baixo": len(alertas_estoque),
+            "validade_ms": round((fim_validade - inicio) * 1000, 1),
+            "estoque_baixo_ms": round((fim_estoque - fim_validade) * 1000, 1),
+            "commit_ms": round((fim_commit - fim_estoque) * 1000, 1),
+            "total_ms": round((fim_commit - inicio) * 1000, 1),
+        }
+        AlertaService.ultima_execucao_diaria = metricas
+        logger.info(
+            f"Alertas diários: {metricas['alertas_validade']} de validade ({metricas['validade_ms']} ms), "
+            f"{metricas['alertas_estoque_baixo']} de estoque baixo ({metricas['estoque_baixo_ms']} ms), "
+            f"total {metricas['total_ms']} ms"
+        )
+
+        await AlertaService.notificar_resumo(alertas_validade, alertas_estoque)
+        return metricas
 
     @staticmethod
-    async def verificar_validade_itens(db: AsyncSession):
-        threshold_date = datetime.now() + timedelta(days=60)
-        items = await ItemRepository.get_items_expiring_before(db, threshold_date)
+    async def verificar_validade_itens(db: AsyncSession) -> list:
+        """Cria (sem commit) os alertas de validade próxima dos itens ativos."""
+        threshold_date = (datetime.now() + timedelta(days=60)).date()
+        return await AlertaRepository.inserir_alertas_itens(
+            db,
+            TipoAlerta.VALIDADE_PROXIMA.value,
+            and_(Item.ativo == True, Item.data_validade_item <= threshold_date),
+            literal("Item ") + Item.nome_item_original + literal(" próximo da validade"),
+        )
 
-        for item in items:
-            alerta_existe = await AlertaRepository.alerta_ja_existe(
-                db, TipoAlerta.VALIDADE_PROXIMA.value, item.item_id
-            )
-            if not alerta_existe:
-                # Criar o alerta
-                novo_alerta = await AlertaRepository.create_alerta(db, AlertaBase(
-                    tipo_alerta=TipoAlerta.VALIDADE_PROXIMA.value,
-                    mensagem_alerta=f"Item {item.nome_item_original} próximo da validade",
-                    item_id=item.item_id,
-                    data_alerta=datetime.now()
-                ))
-                #  Transmitir o evento de novo alerta via WebSocket (para conexões gerais)
-                await manager.broadcast({"type": "new_alert", "alert_id": novo_alerta.alerta_id, "message": novo_alerta.mensagem_alerta})
+    @staticmethod
+    async def verificar_estoque_baixo(db: AsyncSession) -> list:
+        """Cria (sem commit) os alertas de estoque baixo dos itens ativos."""
+        return await AlertaRepository.inserir_alertas_itens(
+            db,
+            TipoAlerta.ESTOQUE_BAIXO.value,
+            and_(Item.ativo == True, Item.quantidade_item < Item.quantidade_minima_item),
+            literal("Estoque de ") + Item.nome_item_original + literal(" abaixo do mínimo"),
+        )
+
+    @staticmethod
+    async def notificar_resumo(alertas_validade: list, alertas_estoque: list) -> None:
+        """Uma única mensagem WebSocket com o resumo dos alertas criados na varredura."""
+        if not alertas_validade and not alertas_estoque:
+            return
+        partes = []
+        if alertas_validade:
+            partes.append(f"{len(alertas_validade)} item(ns) próximo(s) da validade")
+        if alertas_estoque:
+            partes.append(f"{len(alertas_estoque)} item(ns) com estoque baixo")
+        await manager.send_to_role(PERFIS_ALERTA, {
+            "type": "new_alert",
+            "alert_ids": [alerta.alerta_id for alerta in alertas_validade + alertas_estoque],
+            "message": " e ".join(partes),
+        })
 
     @staticmethod
     async def get_alertas(db: AsyncSession):
@@ -47,28 +101,33 @@ class AlertaService:
         return result
 
     @staticmethod
-    async def verificar_estoque_baixo(db: AsyncSession, item_id: int = None):
-        query = select(Item)
-        if item_id:
-            query = query.where(Item.item_id == item_id)
-        query = query.where(Item.quantidade_item < Item.quantidade_minima_item)
-        
-        items = await db.execute(query)
-
-        for item in items.scalars():
-            alerta_existe = await AlertaRepository.alerta_ja_existe(
-                db, TipoAlerta.ESTOQUE_BAIXO.value, item.item_id
+    async def verificar_estoque_baixo_itens(db: AsyncSession, item_ids) -> list:
+        """
+        Gera, dentro da transação de quem chamou (sem commit), os alertas de estoque baixo
+        dos itens informados — por exemplo, os de uma retirada — com um único comando.
+        Não filtra por ativo: itens zerados pela retirada ficam inativos e devem alertar.
+        Após o commit, os alertas retornados devem ser passados para notificar_alertas.
+        """
+        if not item_ids:
+            return []
+        return await AlertaRepository.inserir_alertas_itens(
+            db,
+            TipoAlerta.ESTOQUE_BAIXO.value,
+            Item.quantidade_item < Item.quantidade_minima_item,
+            literal("Estoque de ") + Item.nome_item_original + literal(" abaixo do mínimo"),
+            item_ids=list(item_ids),
+        )
+
+    @staticmethod
+    async def notificar_alertas(alertas) -> None:
+        """Envia os alertas já gravados via WebSocket para almoxarifado e direção."""
+        if alertas:
+            # Chamado logo após o commit que os criou: o total em cache da listagem ficou velho
+            Paginacao.invalidar("alertas")
+        for alerta in alertas:
+            await manager.send_to_role(
+                PERFIS_ALERTA, {"type": "new_alert", "alert_id": alerta.alerta_id, "message": alerta.mensagem_alerta}
             )
-            if not alerta_existe:
-                # Criar o alerta
-                novo_alerta = await AlertaRepository.create_alerta(db, AlertaBase(
-                    tipo_alerta=TipoAlerta.ESTOQUE_BAIXO.value,
-                    mensagem_alerta=f"Estoque de {item.nome_item_original} abaixo do mínimo",
-                    item_id=item.item_id,
-                    data_alerta=datetime.now()
-                ))
-                # Transmitir o evento de novo alerta via WebSocket (para conexões gerais)
-                await manager.broadcast({"type": "new_alert", "alert_id": novo_alerta.alerta_id, "message": novo_alerta.mensagem_alerta})
 
     @staticmethod
     async def get_alerta_by_id(db: AsyncSession, alerta_id: int):
@@ -97,10 +156,9 @@ class AlertaService:
                 detail="page deve ser >= 1"
             )
 
-        total_alertas = await AlertaRepository.count_alertas(db, tipo_alerta, search_term) # Passar fil
-        total_pages = math.ceil(total_alertas / size) if total_alertas > 0 else 1
         offset = (page - 1) * size
-        alertas_db = await AlertaRepository.get_alertas_paginated(db, offset, size, tipo_alerta, search_term)
+        alertas_db, total_alertas = await AlertaRepository.get_alertas_paginated(db, offset, size, tipo_alerta, search_term)
+        total_pages = math.ceil(total_alertas / size) if total_alertas > 0 else 1
         items_out = [AlertaOut.model_validate(alerta) for alerta in alertas_db]
 
         return PaginatedAlertas(
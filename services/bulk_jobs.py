@@ -0,0 +1,190 @@
+# services/bulk_jobs.py
+
+import os
+import uuid
+from datetime import datetime, timedelta
+from fastapi import HTTPException, status
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.configs import settings
+from core.database import SessionLocal
+from models.upload_job import UploadJob
+from schemas.item import BulkItemUploadResult, BulkUploadJobStatus
+from services.bulk_processor import ItemBulkProcessor
+from utils.logger import logger
+from utils.websocket_endpoints import manager
+
+
+class BulkUploadJobManager:
+    """
+    Uploads em massa executados em segundo plano. O estado de cada job fica na tabela
+    upload_job, então qualquer worker responde à consulta de progresso; o arquivo
+    temporário e a execução ficam no worker que recebeu o upload.
+    Envia eventos via WebSocket para quem fez o upload.
+    """
+    # Jobs finalizados ficam disponíveis para consulta por este período
+    RETENCAO = timedelta(hours=1)
+
+    def __init__(self):
+        # job_id -> caminho do arquivo temporário, tipo do arquivo e usuario_id (só neste worker)
+        self._contexto: dict[str, dict] = {}
+
+    async def criar_job(self, caminho: str, file_type: str, usuario_id: int) -> BulkUploadJobStatus:
+        job = BulkUploadJobStatus(
+            job_id=uuid.uuid4().hex,
+            status="pendente",
+            total_items_processed=0,
+            items_created=0,
+            items_updated=0,
+        )
+        try:
+            async with SessionLocal() as db:
+                await db.execute(
+                    delete(UploadJob).where(UploadJob.finalizado_em < datetime.now() - self.RETENCAO)
+                )
+                db.add(UploadJob(job_id=job.job_id, usuario_id=usuario_id, status=job.status, errors=[]))
+                await db.commit()
+        except Exception:
+            # Sem o registro o job nunca roda; o arquivo já gravado não teria quem o remova
+            os.remove(caminho)
+            raise
+        self._contexto[job.job_id] = {"caminho": caminho, "file_type": file_type, "usuario_id": usuario_id}
+        return job
+
+    @staticmethod
+    async def get_job(db: AsyncSession, job_id: str, usuario_id: int) -> BulkUploadJobStatus:
+        job = await db.get(UploadJob, job_id)
+        # Job de outro usuário responde como inexistente, sem revelar que existe
+        if not job or job.usuario_id != usuario_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Job de upload não encontrado"
+            )
+        return BulkUploadJobStatus(
+            job_id=job.job_id,
+            status=job.status,
+            total_items_processed=job.total_items_processed,
+            items_created=job.items_created,
+            items_updated=job.items_updated,
+            errors=job.errors,
+            detalhe=job.detalhe,
+        )
+
+    async def executar(self, job_id: str) -> None:
+        """Processa o arquivo do job com uma sessão própria (a da requisição já foi encerrada)."""
+        contexto = self._contexto.pop(job_id)
+        usuario_id = contexto["usuario_id"]
+        job = BulkUploadJobStatus(
+            job_id=job_id,
+            status="processando",
+            total_items_processed=0,
+            items_created=0,
+            items_updated=0,
+        )
+
+        async def on_progress(parcial: BulkItemUploadResult):
+            self._atualizar(job, parcial)
+            await self._salvar(job)
+            await manager.send_to_user(usuario_id, self._evento("bulk_upload_progress", job))
+
+        try:
+            await self._salvar(job)
+            async with SessionLocal() as db:
+                processor = ItemBulkProcessor(db, usuario_id)
+                resultado = await processor.process_file(
+                    contexto["caminho"], contexto["file_type"], on_progress=on_progress
+                )
+            self._atualizar(job, resultado)
+            job.status = "concluido"
+        except HTTPException as e:
+            job.status = "falhou"
+            job.detalhe = str(e.detail)
+        except Exception as e:
+            logger.error(f"Erro no job de upload em massa {job_id}: {e}")
+            job.status = "falhou"
+            job.detalhe = "Erro ao processar upload de itens"
+        finally:
+            if os.path.exists(contexto["caminho"]):
+                os.remove(contexto["caminho"])
+
+        try:
+            await self._salvar(job, finalizado=True)
+        except Exception as e:
+            logger.error(f"Erro ao gravar o resultado do job de upload em massa {job_id}: {e}")
+        logger.info(
+            f"Job de upload em massa {job_id} finalizado com status '{job.status}' "
+            f"({job.total_items_processed} linhas, {len(job.errors)} erros)"
+        )
+        await manager.send_to_user(usuario_id, self._evento("bulk_upload_finished", job))
+
+    @staticmethod
+    async def reconciliar_interrompidos() -> int:
+        """
+        Marca como falhos os jobs pendentes ou em processamento que pararam de gravar progresso:
+        o worker que os executava reiniciou ou caiu, e ninguém mais vai concluí-los.
+        Roda na inicialização e periodicamente (a queda pode ter sido de outro worker).
+        """
+        agora = datetime.now()
+        limite = agora - timedelta(seconds=settings.BULK_UPLOAD_JOB_STALE_SECONDS)
+        async with SessionLocal() as db:
+            result = await db.execute(
+                update(UploadJob)
+                .where(UploadJob.status.in_(("pendente", "processando")), UploadJob.atualizado_em < limite)
+                .values(
+                    status="falhou",
+                    detalhe="Processamento interrompido (reinício do servidor); envie o arquivo novamente",
+                    finalizado_em=agora,
+                    atualizado_em=agora,
+                )
+                .returning(UploadJob.job_id)
+            )
+            interrompidos = result.scalars().all()
+            await db.commit()
+        if interrompidos:
+            logger.warning(f"Jobs de upload em massa interrompidos marcados como falhos: {interrompidos}")
+        return len(interrompidos)
+
+    @staticmethod
+    async def _salvar(job: BulkUploadJobStatus, finalizado: bool = False) -> None:
+        """
+        Grava o progresso numa sessão curta, separada da que processa o arquivo.
+        Durante o processamento só os contadores mudam; a lista de erros (que cresce a cada
+        lote) é gravada uma única vez, ao finalizar.
+        """
+        valores = {
+            "status": job.status,
+            "total_items_processed": job.total_items_processed,
+            "items_created": job.items_created,
+            "items_updated": job.items_updated,
+            "detalhe": job.detalhe,
+            "atualizado_em": datetime.now(),
+        }
+        if finalizado:
+            valores["errors"] = job.errors
+            valores["finalizado_em"] = datetime.now()
+        async with SessionLocal() as db:
+            await db.execute(update(UploadJob).where(UploadJob.job_id == job.job_id).values(**valores))
+            await db.commit()
+
+    @staticmethod
+    def _atualizar(job: BulkUploadJobStatus, parcial: BulkItemUploadResult) -> None:
+        job.total_items_processed = parcial.total_items_processed
+        job.items_created = parcial.items_created
+        job.items_updated = parcial.items_updated
+        job.errors = parcial.errors
+
+    @staticmethod
+    def _evento(tipo: str, job: BulkUploadJobStatus) -> dict:
+        # A lista de erros pode ser longa; o evento leva só a contagem
+        return {
+            "type": tipo,
+            "job_id": job.job_id,
+            "status": job.status,
+            "total_items_processed": job.total_items_processed,
+            "items_created": job.items_created,
+            "items_updated": job.items_updated,
+            "errors_count": len(job.errors),
+        }
+
+
+bulk_upload_jobs = BulkUploadJobManager() # Instância global, como o ConnectionManager
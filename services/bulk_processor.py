@@ -1,19 +1,31 @@
 # app/services/item/bulk_processor.py
 
-import io
+import asyncio
+import os
+import tempfile
+from collections.abc import Awaitable, Callable, Iterator
 from datetime import datetime
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import select, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+import openpyxl
 import pandas as pd
 
+from core.configs import settings
 from utils.normalizar_texto import normalize_name
-from services.finder import ItemFinder
 from repositories.item_repository import ItemRepository
+from repositories.paginacao import Paginacao
+from services.categoria_index import categoria_index
 from schemas.item import BulkItemUploadResult
 
 # Import do modelo Categoria para criação de novas categorias
 from models.categoria import Categoria
+from models.item import Item, ITEM_IDENTIDADE
+
+# Tamanho dos blocos copiados do upload para o arquivo temporário (1 MiB)
+SPOOL_BLOCK_SIZE = 1024 * 1024
 
 
 class ItemBulkProcessor:
@@ -27,57 +39,188 @@ class ItemBulkProcessor:
         self.auditoria_usuario_id = auditoria_usuario_id
         # Mapeamento de nome_categoria_normalizado -> categoria_id
         self.category_map: dict[str, int] = {}
+        # Indica categorias criadas no lote atual (o índice em memória é invalidado após o commit)
+        self._categorias_criadas = False
 
     async def process(self, upload_file) -> BulkItemUploadResult:
+        file_type = self.resolve_file_type(upload_file)
+
+        # 1) Copiar o upload para disco, sem carregar o arquivo inteiro em memória
+        caminho = await self.spool_upload(upload_file, file_type)
+        try:
+            return await self.process_file(caminho, file_type)
+        finally:
+            os.remove(caminho)
+
+    @classmethod
+    def resolve_file_type(cls, upload_file) -> str:
+        """Retorna 'xlsx' ou 'csv' conforme o content type; 400 para outros tipos."""
         content_type = upload_file.content_type
-        if content_type not in self.ALLOWED_CONTENT_TYPES:
+        if content_type not in cls.ALLOWED_CONTENT_TYPES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Tipo de arquivo inválido. Apenas .xlsx e .csv são permitidos.",
             )
+        return cls.ALLOWED_CONTENT_TYPES[content_type]
 
-        # 1) Ler DataFrame conforme tipo
-        df = await self._load_dataframe(upload_file)
-
-        # 2) Preparar colunas e pré-carregar/criar categorias
-        df = self._normalize_columns(df)
-        await self._fetch_or_create_categories(df)
-
-        total_processed = len(df)
+    @staticmethod
+    async def spool_upload(upload_file, file_type: str) -> str:
+        """
+        Grava o upload em um arquivo temporário, em blocos, e retorna o caminho.
+        A escrita em disco roda fora do event loop; se a leitura ou a escrita falhar,
+        o arquivo parcial é removido.
+        """
+        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_type}") as destino:
+            try:
+                while bloco := await upload_file.read(SPOOL_BLOCK_SIZE):
+                    await asyncio.to_thread(destino.write, bloco)
+            except BaseException:
+                destino.close()
+                os.unlink(destino.name)
+                raise
+            return destino.name
+
+    async def process_file(
+        self,
+        caminho: str,
+        file_type: str,
+        on_progress: Callable[[BulkItemUploadResult], Awaitable[None]] | None = None,
+        batch_size: int | None = None,
+    ) -> BulkItemUploadResult:
+        """
+        Processa o arquivo em blocos de settings.BULK_UPLOAD_CHUNK_SIZE linhas.
+        Cada bloco passa pela mesma validação e gravação, então o consumo de
+        memória não depende do tamanho do arquivo.
+        Se informado, on_progress recebe o resultado parcial após cada bloco.
+        batch_size (padrão settings.BULK_UPLOAD_BATCH_SIZE) define de quantas em
+        quantas linhas é feito o commit; cada lote roda em um SAVEPOINT próprio.
+        """
+        self.batch_size = batch_size or settings.BULK_UPLOAD_BATCH_SIZE
+        self._total_processed = 0
         self._items_created = 0
         self._items_updated = 0
-        errors: list[dict] = []
-
-        # 3) Processar cada linha separadamente
-        for idx, row in df.iterrows():
-            try:
-                await self._process_row(idx, row)
-            except ValueError as ve:
-                errors.append({"row": idx + 2, "error": str(ve)})
-                await self.db.rollback()
-            except Exception as e:
-                errors.append({"row": idx + 2, "error": f"Erro inesperado: {e}"})
-                await self.db.rollback()
-
-        # 4) Commit final (se ao menos uma linha foi processada sem erro crítico)
+        self._errors: list[dict] = []
+
+        # 2) Ler o arquivo bloco a bloco (a leitura roda fora do event loop)
+        chunks = self._iter_chunks(caminho, file_type)
+        leitura = None
+        try:
+            while True:
+                # shield: se o job for cancelado, a leitura em andamento na outra thread
+                # continua e é aguardada abaixo antes de fechar o gerador
+                leitura = asyncio.ensure_future(asyncio.to_thread(next, chunks, None))
+                df = await asyncio.shield(leitura)
+                if df is None:
+                    break
+                await self._process_chunk(df)
+                if on_progress:
+                    await on_progress(self._result())
+        finally:
+            if leitura is not None and not leitura.done():
+                await asyncio.wait([leitura])
+            # Um lote com erro interrompe a leitura: fecha o leitor CSV / a planilha já
+            chunks.close()
+
+        # 3) Cada lote já foi confirmado; o commit final só fecha a transação aberta
         await self.db.commit()
 
+        return self._result()
+
+    def _result(self) -> BulkItemUploadResult:
         return BulkItemUploadResult(
-            total_items_processed=total_processed,
+            total_items_processed=self._total_processed,
             items_created=self._items_created,
             items_updated=self._items_updated,
-            errors=errors,
+            errors=list(self._errors),
         )
 
-    async def _load_dataframe(self, upload_file) -> pd.DataFrame:
-        content = await upload_file.read()
-        file_type = self.ALLOWED_CONTENT_TYPES[upload_file.content_type]
+    async def _process_chunk(self, df: pd.DataFrame) -> None:
+        df = self._normalize_columns(df)
+        for inicio in range(0, len(df), self.batch_size):
+            await self._process_batch(df.iloc[inicio:inicio + self.batch_size])
 
-        if file_type == "xlsx":
-            return pd.read_excel(io.BytesIO(content))
-        else:  # csv
-            text = content.decode("utf-8")
-            return pd.read_csv(io.StringIO(text))
+    async def _process_batch(self, df: pd.DataFrame) -> None:
+        """
+        Grava um lote e faz commit. Os contadores só avançam depois do commit,
+        então refletem exatamente o que ficou no banco.
+        """
+        # Pré-carregar/criar categorias do lote
+        await self._fetch_or_create_categories(df)
+        self._total_processed += len(df)
+
+        # Validar o lote inteiro de forma vetorizada (nenhuma consulta ao banco aqui)
+        registros, erros = self._validate_dataframe(df)
+        self._errors.extend(erros)
+
+        # Agrupar repetições do lote e gravar tudo em lote, dentro de um SAVEPOINT
+        grupos = self._collapse_records(registros)
+        try:
+            async with self.db.begin_nested():
+                criados, atualizados = await self._persist_groups(grupos)
+        except SQLAlchemyError:
+            # O SAVEPOINT desfez só este lote; grava item a item para isolar as linhas com problema
+            criados, atualizados = await self._persist_groups_isolated(grupos)
+
+        await self.db.commit()
+        if self._categorias_criadas:
+            categoria_index.invalidar()
+            Paginacao.invalidar("categorias")
+            self._categorias_criadas = False
+        self._items_created += criados
+        self._items_updated += atualizados
+
+    async def _persist_groups_isolated(self, grupos: dict[tuple, dict]) -> tuple[int, int]:
+        """Grava cada grupo em seu próprio SAVEPOINT; falhas viram erros das linhas do grupo."""
+        criados = atualizados = 0
+        for chave, grupo in grupos.items():
+            try:
+                async with self.db.begin_nested():
+                    c, a = await self._persist_groups({chave: grupo})
+                criados += c
+                atualizados += a
+            except SQLAlchemyError as e:
+                motivo = getattr(e, "orig", None) or e
+                for linha in grupo["linhas"]:
+                    self._errors.append({"row": linha, "error": f"Erro ao gravar no banco: {motivo}"})
+        return criados, atualizados
+
+    def _iter_chunks(self, caminho: str, file_type: str) -> Iterator[pd.DataFrame]:
+        """
+        Gera DataFrames de até settings.BULK_UPLOAD_CHUNK_SIZE linhas.
+        O índice de cada DataFrame segue a posição da linha no arquivo
+        (índice + 2 = número da linha na planilha), usado nas mensagens de erro.
+        """
+        chunk_size = settings.BULK_UPLOAD_CHUNK_SIZE
+
+        if file_type == "csv":
+            with pd.read_csv(caminho, encoding="utf-8", chunksize=chunk_size) as leitor:
+                yield from leitor
+            return
+
+        # xlsx: openpyxl em modo somente leitura percorre as linhas sem montar a planilha
+        workbook = openpyxl.load_workbook(caminho, read_only=True, data_only=True)
+        try:
+            linhas = workbook.active.iter_rows(values_only=True)
+            cabecalho = next(linhas, None)
+            if cabecalho is None:
+                return
+            colunas = ["" if valor is None else str(valor) for valor in cabecalho]
+
+            buffer: list[tuple] = []
+            indices: list[int] = []
+            for idx, valores in enumerate(linhas):
+                # Linhas totalmente vazias são ignoradas, como no read_excel
+                if all(valor is None for valor in valores):
+                    continue
+                buffer.append(valores)
+                indices.append(idx)
+                if len(buffer) >= chunk_size:
+                    yield pd.DataFrame(buffer, columns=colunas, index=indices)
+                    buffer, indices = [], []
+            if buffer:
+                yield pd.DataFrame(buffer, columns=colunas, index=indices)
+        finally:
+            workbook.close()
 
     def _normalize_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         df.columns = df.columns.str.strip().str.lower()
@@ -93,18 +236,33 @@ class ItemBulkProcessor:
 
     async def _fetch_or_create_categories(self, df: pd.DataFrame) -> None:
         """
-        1) Extrai todas as categorias normalizadas do DataFrame.
-        2) Busca as que já existem no banco de dados e atualiza self.category_map.
+        1) Extrai todas as categorias normalizadas do DataFrame (ou bloco).
+        2) Resolve as que já existem pelo índice em memória (só as ausentes vão ao banco,
+           que pode ter categorias criadas por outro processo) e atualiza self.category_map.
         3) Para as categorias inexistentes, cria novas instâncias de Categoria,
-           persiste no banco (flush) e inclui no self.category_map.
+           persiste no banco (flush, cada uma em seu SAVEPOINT) e inclui no self.category_map.
         """
         # 1) Normaliza nomes de categoria únicos do arquivo
         raw_categories = df["categoria"].dropna().astype(str).str.strip().tolist()
         normalized_list = [normalize_name(name) for name in raw_categories]
         unique_normalized = list(dict.fromkeys(normalized_list))  # mantém ordem, sem duplicar
-
-        # 2) Busca no banco as categorias que já existem
-        query = select(Categoria).where(Categoria.nome_categoria.in_(unique_normalized))
+        # Categorias já resolvidas em blocos anteriores não são consultadas de novo
+        unique_normalized = [nome for nome in unique_normalized if nome not in self.category_map]
+        if not unique_normalized:
+            return
+
+        # 2) Resolve pelo índice de categorias e confirma no banco apenas as ausentes
+        ausentes = []
+        for nome in unique_normalized:
+            categoria_id = await categoria_index.get_id(self.db, nome)
+            if categoria_id is None:
+                ausentes.append(nome)
+            else:
+                self.category_map[nome] = categoria_id
+        if not ausentes:
+            return
+
+        query = select(Categoria).where(Categoria.nome_categoria.in_(ausentes))
         result = await self.db.execute(query)
         existing_categories = result.scalars().all()
 
@@ -114,7 +272,7 @@ class ItemBulkProcessor:
 
         # 3) Identifica quais normalized names ainda não existem e cria
         existing_names = {cat.nome_categoria for cat in existing_categories}
-        to_create = [nome for nome in unique_normalized if nome not in existing_names]
+        to_create = [nome for nome in ausentes if nome not in existing_names]
 
         for normalized_cat in to_create:
             # Descobrir o raw name correspondente (para nome_original)
@@ -125,113 +283,191 @@ class ItemBulkProcessor:
                 nome_original=raw_name,
                 nome_categoria=normalized_cat,
             )
-            self.db.add(nova_categoria)
-            await self.db.flush()  # garante que nova_categoria.categoria_id seja populado
+            try:
+                async with self.db.begin_nested():
+                    self.db.add(nova_categoria)
+                    await self.db.flush()  # garante que nova_categoria.categoria_id seja populado
+            except SQLAlchemyError:
+                # As linhas desta categoria serão reportadas em _validate_dataframe
+                continue
 
             # Atualiza o mapeamento
             self.category_map[normalized_cat] = nova_categoria.categoria_id
+            self._categorias_criadas = True
 
-    async def _process_row(self, idx: int, row) -> None:
+    def _validate_dataframe(self, df: pd.DataFrame) -> tuple[list[dict], list[dict]]:
         """
-        Processa uma linha do DataFrame:
+        Valida e converte todas as linhas do DataFrame de uma vez, com operações de coluna:
          - Valida campos obrigatórios de cada coluna
-         - Normaliza nome do item e procura duplicata
-         - Se existe duplicata: atualiza quantidade + campos opcionais
-         - Senão: cria novo objeto Item e dá db.add(...)
+         - Normaliza nome do item e monta a chave de duplicata
+           (nome_item, categoria_id, data_validade_item, marca_item)
          - Usa nome_item + unidade como 'descrição' quando coluna ausente ou vazia
+        Cada linha recebe apenas o primeiro erro encontrado, na mesma ordem de checagem
+        do antigo processamento linha a linha. Retorna (registros válidos, erros).
         """
-        # --- 1. Extrair e validar campos básicos ---
-        produto_raw = str(row["produto"]).strip()
-        if not produto_raw:
-            raise ValueError("Nome do produto não pode ser vazio.")
+        erro = pd.Series(None, index=df.index, dtype=object)
 
-        qtd_raw = row["quantidade"]
-        if pd.isna(qtd_raw) or not str(qtd_raw).strip().isdigit():
-            raise ValueError("Quantidade inválida ou vazia.")
-        quantidade = int(qtd_raw)
+        def marcar(condicao, mensagem):
+            nonlocal erro
+            erro = erro.mask(erro.isna() & condicao, mensagem)
 
-        if quantidade <= 0:
-            raise ValueError("Quantidade deve ser maior que zero.")
+        # --- 1. Extrair e validar campos básicos ---
+        produto = self._text_column(df["produto"])
+        marcar(produto == "", "Nome do produto não pode ser vazio.")
+
+        quantidade = pd.to_numeric(df["quantidade"], errors="coerce")
+        marcar(quantidade.isna() | (quantidade % 1 != 0), "Quantidade inválida ou vazia.")
+        marcar(quantidade <= 0, "Quantidade deve ser maior que zero.")
 
         # Unidade de medida (sempre obrigatória)
-        unidade = str(row["unidade de medida"]).strip()
-        if not unidade:
-            raise ValueError("Unidade de medida não pode ser vazia.")
+        unidade = self._text_column(df["unidade de medida"])
+        marcar(unidade == "", "Unidade de medida não pode ser vazia.")
 
         # Descrição: se coluna existe e há valor não vazio, usa; senão, concatena nome + unidade
-        if "descrição" in row and pd.notna(row["descrição"]) and str(row["descrição"]).strip():
-            descricao = str(row["descrição"]).strip()
-        else:
-            descricao = f"{produto_raw} {unidade}"
+        descricao = produto + " " + unidade
+        if "descrição" in df.columns:
+            informada = self._text_column(df["descrição"])
+            descricao = informada.where(informada != "", descricao)
 
         # Marca (opcional)
-        marca = (
-            str(row.get("marca", "")).strip() if pd.notna(row.get("marca")) else None
-        )
+        if "marca" in df.columns:
+            marca = df["marca"].where(df["marca"].isna(), df["marca"].astype(str).str.strip())
+            # Marca em branco é o mesmo que sem marca (uq_item_identidade usa COALESCE(marca, ''))
+            marca = marca.astype(object).where(marca.notna() & (marca != ""), None)
+        else:
+            marca = pd.Series([None] * len(df), index=df.index, dtype=object)
 
-        validade = self._parse_date(row.get("validade"), produto_raw)
+        validade = pd.Series([None] * len(df), index=df.index, dtype=object)
+        if "validade" in df.columns:
+            validade, invalida = self._parse_dates(df["validade"])
+            marcar(invalida, "Formato de validade inválido para '" + produto + "': " + df["validade"].astype(str))
 
-        # Categoria
-        cat_raw = str(row["categoria"]).strip()
-        normalized_cat = normalize_name(cat_raw)
-        categoria_id = self.category_map.get(normalized_cat)
-        if not categoria_id:
-            # Em teoria, todas as categorias já foram criadas em _fetch_or_create_categories()
-            raise ValueError(f"Falha ao encontrar ou criar a categoria '{cat_raw}'.")
+        # Categoria: normalização feita uma vez por valor distinto
+        categoria_raw = df["categoria"].astype(str).str.strip()
+        categoria_id = categoria_raw.map(
+            {raw: self.category_map.get(normalize_name(raw)) for raw in categoria_raw.unique()}
+        )
+        marcar(categoria_id.isna(), "Falha ao encontrar ou criar a categoria '" + categoria_raw + "'.")
 
-        # --- 2. Normalização e busca de duplicata ---
-        nome_normalizado = normalize_name(produto_raw)
-        existing = await ItemFinder.find_exact_match(
-            self.db, nome_normalizado, validade, categoria_id, marca
+        # --- 2. Montar erros e registros válidos ---
+        erros = [{"row": idx + 2, "error": mensagem} for idx, mensagem in erro.dropna().items()]
+
+        validos = erro.isna()
+        nomes_normalizados = produto[validos].map(
+            {nome: normalize_name(nome) for nome in produto[validos].unique()}
         )
+        registros = [
+            {
+                "row": idx + 2,
+                "chave": (nome_normalizado, int(cat_id), data, marca_item),
+                "nome_item_original": nome_original,
+                "descricao_item": desc,
+                "unidade_medida_item": unid,
+                "quantidade_item": int(qtd),
+            }
+            for idx, nome_normalizado, cat_id, data, marca_item, nome_original, desc, unid, qtd in zip(
+                df.index[validos],
+                nomes_normalizados,
+                categoria_id[validos],
+                validade[validos],
+                marca[validos],
+                produto[validos],
+                descricao[validos],
+                unidade[validos],
+                quantidade[validos],
+            )
+        ]
+        return registros, erros
 
-        # --- 3. Se duplicata existe, atualiza; senão, cria novo ---
-        if existing:
-            existing.quantidade_item += quantidade
-            existing.data_entrada_item = datetime.now()
-            if validade:
-                existing.data_validade_item = validade
-            if marca:
-                existing.marca_item = marca
-            # Atualiza descrição também, caso queira manter histórico (opcional)
-            existing.descricao_item = descricao
-            existing.auditoria_usuario_id = self.auditoria_usuario_id
-            await self.db.flush()
-            self._items_updated += 1
-        else:
-            from models.item import Item
-
-            new_item = Item(
-                nome_item_original=produto_raw,
-                nome_item=nome_normalizado,
-                descricao_item=descricao,
-                unidade_medida_item=unidade,
-                quantidade_item=quantidade,
-                categoria_id=categoria_id,
-                data_validade_item=validade,
-                marca_item=marca,
-                data_entrada_item=datetime.now(),
-                auditoria_usuario_id=self.auditoria_usuario_id,
+    @staticmethod
+    def _text_column(coluna: pd.Series) -> pd.Series:
+        """Converte a coluna em texto sem espaços nas pontas; células vazias viram ''."""
+        return coluna.where(coluna.notna(), "").astype(str).str.strip()
+
+    @staticmethod
+    def _parse_dates(coluna: pd.Series) -> tuple[pd.Series, pd.Series]:
+        """
+        Converte a coluna 'validade' em date: primeiro no formato dd/mm/YYYY e,
+        para o que falhar, uma única tentativa de inferência por valor.
+        Retorna (datas com None nas vazias, máscara das células inválidas).
+        """
+        preenchida = coluna.notna()
+        parsed = pd.to_datetime(coluna, errors="coerce", format="%d/%m/%Y")
+        pendentes = preenchida & parsed.isna()
+        if pendentes.any():
+            parsed[pendentes] = pd.to_datetime(coluna[pendentes], errors="coerce", format="mixed")
+
+        invalida = preenchida & parsed.isna()
+        datas = parsed.dt.date.astype(object).where(parsed.notna(), None)
+        return datas, invalida
+
+    @staticmethod
+    def _collapse_records(registros: list[dict]) -> dict[tuple, dict]:
+        """
+        Junta as linhas do arquivo que apontam para o mesmo item.
+        A primeira linha define nome original e unidade (como se criasse o item);
+        as seguintes somam quantidade e sobrescrevem a descrição, exatamente como
+        o processamento linha a linha fazia.
+        """
+        grupos: dict[tuple, dict] = {}
+        for registro in registros:
+            grupo = grupos.get(registro["chave"])
+            if grupo is None:
+                grupos[registro["chave"]] = {**registro, "linhas": [registro["row"]]}
+            else:
+                grupo["quantidade_item"] += registro["quantidade_item"]
+                grupo["descricao_item"] = registro["descricao_item"]
+                grupo["linhas"].append(registro["row"])
+        return grupos
+
+    async def _persist_groups(self, grupos: dict[tuple, dict]) -> tuple[int, int]:
+        """
+        Grava todos os grupos com o mesmo INSERT ... ON CONFLICT DO UPDATE de
+        ItemRepository.upsert_incrementando (em lote): itens novos são criados e os
+        existentes recebem o incremento, sem janela entre procurar e gravar, mesmo
+        com outro upload ou cadastro concorrente do mesmo item.
+        Retorna (itens criados, itens atualizados).
+        """
+        if not grupos:
+            return 0, 0
+
+        agora = datetime.now()
+        linhas = [
+            {
+                "nome_item_original": grupo["nome_item_original"],
+                "nome_item": nome_normalizado,
+                "descricao_item": grupo["descricao_item"],
+                "unidade_medida_item": grupo["unidade_medida_item"],
+                "quantidade_item": grupo["quantidade_item"],
+                "categoria_id": categoria_id,
+                "data_validade_item": validade,
+                "marca_item": marca,
+                "data_entrada_item": agora,
+                "auditoria_usuario_id": self.auditoria_usuario_id,
+            }
+            # Mesma ordem em todo upload: lotes concorrentes travam as linhas na mesma sequência
+            for (nome_normalizado, categoria_id, validade, marca), grupo in sorted(
+                grupos.items(), key=lambda g: (g[0][0], g[0][1], str(g[0][2]), g[0][3] or "")
             )
-            self.db.add(new_item)
-            await self.db.flush()
-            self._items_created += 1
-
-    def _parse_date(self, raw_value, produto_raw: str):
-        """Tenta converter a coluna 'validade' em date; levanta ValueError se inválido."""
-        from datetime import datetime as dt
-
-        if raw_value is pd.NA or pd.isna(raw_value):
-            return None
-
-        if isinstance(raw_value, (dt,)):
-            return raw_value.date()
-
-        # Tentar formato dd/mm/YYYY
-        parsed = pd.to_datetime(raw_value, errors="coerce", format="%d/%m/%Y")
-        if pd.isna(parsed):
-            # Tentar inferir
-            parsed = pd.to_datetime(raw_value, errors="coerce")
-        if pd.isna(parsed):
-            raise ValueError(f"Formato de validade inválido para '{produto_raw}': {raw_value}")
-        return parsed.date()
+        ]
+
+        stmt = pg_insert(Item.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(ITEM_IDENTIDADE),
+            set_={
+                "quantidade_item": Item.quantidade_item + stmt.excluded.quantidade_item,
+                "descricao_item": stmt.excluded.descricao_item,
+                "data_entrada_item": stmt.excluded.data_entrada_item,
+                "auditoria_usuario_id": stmt.excluded.auditoria_usuario_id,
+                "ativo": True,  # Reativa itens inativos que recebem estoque
+                "versao": Item.versao + 1,
+            },
+        # xmax = 0 só na linha recém-inserida; no UPDATE do ON CONFLICT ele recebe o id da transação
+        ).returning(literal_column("xmax = 0").label("inserido"))
+        result = await self.db.execute(stmt, linhas)
+
+        # Cada grupo inserido conta 1 criado e suas repetições como atualização;
+        # nos já existentes, todas as linhas do grupo são atualizações
+        criados = sum(1 for (inserido,) in result.all() if inserido)
+        atualizados = sum(len(grupo["linhas"]) for grupo in grupos.values()) - criados
+        return criados, atualizados
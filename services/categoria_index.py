@@ -0,0 +1,91 @@
+# services/categoria_index.py
+
+import asyncio
+import time
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.configs import settings
+from core.database import SessionLocal, engine, read_engine
+from models.categoria import Categoria
+
+
+class CategoriaIndex:
+    """
+    Índice em memória (por processo) das categorias: nome normalizado -> id e
+    trigramas -> ids, para busca por trecho sem ir ao banco.
+    É carregado sob demanda, invalidado pelo CategoriaService a cada escrita e,
+    como outros processos não avisam deste, recarregado após CATEGORIA_INDEX_TTL_SECONDS.
+    """
+
+    def __init__(self):
+        self._por_nome: dict[str, int] = {}
+        self._nomes: dict[int, str] = {}
+        self._trigramas: dict[str, set[int]] = {}
+        self._expira_em = 0.0
+        self._versao = 0
+        self._lock = asyncio.Lock()
+
+    async def get_id(self, db: AsyncSession, nome_normalizado: str) -> int | None:
+        await self._garantir_carregado(db)
+        return self._por_nome.get(nome_normalizado)
+
+    async def buscar_ids(self, db: AsyncSession, termo_normalizado: str) -> list[int]:
+        """Ids das categorias cujo nome normalizado contém o termo (equivale ao ILIKE '%termo%')."""
+        await self._garantir_carregado(db)
+        candidatos = self._candidatos(termo_normalizado)
+        return sorted(
+            categoria_id for categoria_id in candidatos
+            if termo_normalizado in self._nomes[categoria_id]
+        )
+
+    def invalidar(self) -> None:
+        self._expira_em = 0.0
+        self._versao += 1
+
+    async def _garantir_carregado(self, db: AsyncSession) -> None:
+        if time.monotonic() < self._expira_em:
+            return
+        async with self._lock:
+            if time.monotonic() < self._expira_em:
+                return
+            versao = self._versao
+            query = select(Categoria.categoria_id, Categoria.nome_categoria)
+            if db.bind is read_engine and read_engine is not engine:
+                # A réplica pode ainda não ter a categoria recém-criada que causou a
+                # invalidação; o índice duraria o TTL inteiro sem ela
+                async with SessionLocal() as sessao:
+                    result = await sessao.execute(query)
+            else:
+                result = await db.execute(query)
+            self._construir(result.all())
+            # Se houve invalidação durante a carga, a próxima consulta recarrega
+            if versao == self._versao:
+                self._expira_em = time.monotonic() + settings.CATEGORIA_INDEX_TTL_SECONDS
+
+    def _construir(self, linhas) -> None:
+        por_nome: dict[str, int] = {}
+        nomes: dict[int, str] = {}
+        trigramas: dict[str, set[int]] = {}
+        for categoria_id, nome in linhas:
+            por_nome.setdefault(nome, categoria_id)
+            nomes[categoria_id] = nome
+            for trigrama in self._trigramas_de(nome):
+                trigramas.setdefault(trigrama, set()).add(categoria_id)
+        # Troca as estruturas de uma vez; leitores nunca veem um índice pela metade
+        self._por_nome, self._nomes, self._trigramas = por_nome, nomes, trigramas
+
+    def _candidatos(self, termo: str):
+        trigramas = self._trigramas_de(termo)
+        if not trigramas:
+            # Termos com menos de 3 caracteres: varre os nomes (são poucas centenas)
+            return self._nomes.keys()
+        conjuntos = sorted((self._trigramas.get(t, set()) for t in trigramas), key=len)
+        return set.intersection(*conjuntos)
+
+    @staticmethod
+    def _trigramas_de(nome: str) -> set[str]:
+        return {nome[i:i + 3] for i in range(len(nome) - 2)}
+
+
+categoria_index = CategoriaIndex() # Instância global, compartilhada por busca, upload em massa e relatórios
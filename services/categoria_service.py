@@ -1,10 +1,12 @@
 # services/categoria_service.py
 from schemas.categoria import CategoriaCreate, CategoriaUpdate, PaginatedCategorias, CategoriaOut
 from repositories.categoria_repository import CategoriaRepository
+from repositories.paginacao import Paginacao
 from fastapi import HTTPException, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from utils.normalizar_texto import normalize_name
+from services.categoria_index import categoria_index
 import math
 
 
@@ -35,7 +37,10 @@ class CategoriaService:
                 "nome_categoria": nome_normalizado
             })
             
-            return await CategoriaRepository.create_categoria(db, dados_categoria)
+            categoria = await CategoriaRepository.create_categoria(db, dados_categoria)
+            categoria_index.invalidar()
+            Paginacao.invalidar("categorias")
+            return categoria
 
         except IntegrityError as e:
             await db.rollback()
@@ -114,11 +119,16 @@ class CategoriaService:
             del update_values['nome_categoria']
         
         # Atualiza apenas os campos permitidos
-        return await CategoriaRepository.update_categoria(db, categoria_id, update_values)
+        categoria = await CategoriaRepository.update_categoria(db, categoria_id, update_values)
+        categoria_index.invalidar()
+        Paginacao.invalidar("categorias")
+        return categoria
 
     @staticmethod
     async def delete_categoria(db: AsyncSession, categoria_id: int):
         result = await CategoriaRepository.delete_categoria(db, categoria_id)
+        categoria_index.invalidar()
+        Paginacao.invalidar("categorias")
         if not result:
             raise HTTPException(status_code=404, detail="Categoria não encontrada")
         return result
@@ -143,10 +153,9 @@ class CategoriaService:
                 detail="page deve ser >= 1"
             )
 
-        # conta total de categorias
-        total = await CategoriaRepository.count_categorias(db)
+        # busca a página e o total de categorias numa única consulta
         offset = (page - 1) * size
-        itens = await CategoriaRepository.get_categorias_paginated(db, offset, size)
+        itens, total = await CategoriaRepository.get_categorias_paginated(db, offset, size)
 
         # converte para DTO
         items_out = [CategoriaOut.model_validate(i) for i in itens]
@@ -187,16 +196,11 @@ class CategoriaService:
         categoria_ids = None
         if nome_categoria:
             nome_cat_norm = normalize_name(nome_categoria)
-            categoria_ids = await CategoriaRepository.find_categoria_ids_by_name(db, nome_cat_norm)
-
-        # conta total de itens filtrados
-        total = await CategoriaRepository.count_filtered_categorias(
-            db, categoria_ids=categoria_ids, nome_categoria_normalizado=nome_norm
-        )
+            categoria_ids = await categoria_index.buscar_ids(db, nome_cat_norm)
 
-        # calcula offset e traz só a página
+        # calcula offset e traz só a página, junto com o total filtrado
         offset = (page - 1) * size
-        categorias = await CategoriaRepository.get_filtered_categorias_paginated(
+        categorias, total = await CategoriaRepository.get_filtered_categorias_paginated(
             db, categoria_ids=categoria_ids,
             nome_categorias_normalizado=nome_norm,
             offset=offset, limit=size
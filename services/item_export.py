@@ -0,0 +1,81 @@
+# services/item_export.py
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import AsyncIterator
+from fastapi import HTTPException, status
+
+from core.database import ReadSessionLocal
+from repositories.item_repository import ItemRepository
+from schemas.item import ItemOut
+
+
+class ItemExporter:
+    """
+    Exporta o catálogo de itens ativos em NDJSON ou CSV, lote a lote, sem montar
+    a lista inteira em memória. Usado pelo StreamingResponse de /itens/exportar.
+    """
+    FORMATOS = {
+        "ndjson": "application/x-ndjson",
+        "csv": "text/csv; charset=utf-8",
+    }
+    # Mesmas colunas de ItemOut
+    COLUNAS = list(ItemOut.model_fields)
+    TAMANHO_LOTE = 1000
+
+    def __init__(self, formato: str, categoria_ids: list[int] | None, nome_normalizado: str | None):
+        if formato not in self.FORMATOS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"formato deve ser um de {list(self.FORMATOS)}",
+            )
+        self.formato = formato
+        self.categoria_ids = categoria_ids
+        self.nome_normalizado = nome_normalizado
+
+    @property
+    def media_type(self) -> str:
+        return self.FORMATOS[self.formato]
+
+    @property
+    def filename(self) -> str:
+        return f"itens_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{self.formato}"
+
+    async def stream(self) -> AsyncIterator[str]:
+        """
+        Gera o conteúdo do arquivo. Abre uma sessão própria: a sessão da requisição
+        é fechada antes de o corpo da resposta começar a ser enviado.
+        """
+        if self.formato == "csv":
+            yield self._csv_linhas([self.COLUNAS], cabecalho=True)
+
+        async with ReadSessionLocal() as db:
+            lotes = ItemRepository.stream_filtered(
+                db, self.COLUNAS, self.categoria_ids, self.nome_normalizado, self.TAMANHO_LOTE
+            )
+            async for lote in lotes:
+                if self.formato == "csv":
+                    yield self._csv_linhas([[linha[c] for c in self.COLUNAS] for linha in lote])
+                else:
+                    yield "".join(
+                        json.dumps(linha, default=self._json_default, ensure_ascii=False) + "\n"
+                        for linha in lote
+                    )
+
+    @staticmethod
+    def _csv_linhas(linhas: list[list], cabecalho: bool = False) -> str:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if cabecalho:
+            # BOM para o Excel reconhecer UTF-8
+            buffer.write("\ufeff")
+        writer.writerows(linhas)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _json_default(valor):
+        if isinstance(valor, (date, datetime)):
+            return valor.isoformat()
+        raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
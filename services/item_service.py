@@ -5,9 +5,14 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status, UploadFile
 from utils.normalizar_texto import normalize_name
+from utils.cursor import encode_cursor, decode_cursor
+from utils.concorrencia import com_retentativas
 from services.validator import ItemValidator
 from services.finder import ItemFinder
 from services.bulk_processor import ItemBulkProcessor
+from services.bulk_jobs import bulk_upload_jobs
+from services.item_export import ItemExporter
+from services.categoria_index import categoria_index
 from repositories.item_repository import ItemRepository
 from repositories.categoria_repository import CategoriaRepository
 from schemas.item import (
@@ -16,6 +21,7 @@ from schemas.item import (
     PaginatedItems,
     ItemOut,
     BulkItemUploadResult,
+    BulkUploadJobStatus,
 )
 
 class ItemService:
@@ -41,24 +47,13 @@ class ItemService:
         # Se não vier data_entrada_item, usa agora
         dados["data_entrada_item"] = dados.get("data_entrada_item") or datetime.now()
 
-        try:
-            # 4) Verifica duplicata (incluindo itens inativos para reativação)
-            existing = await ItemFinder.find_exact_match(
-                db,
-                nome_normalizado,
-                dados.get("data_validade_item"),
-                dados["categoria_id"],
-                dados.get("marca_item"),
-            )
+        # A coluna é DATE; descarta o horário que o schema aceita
+        if isinstance(dados.get("data_validade_item"), datetime):
+            dados["data_validade_item"] = dados["data_validade_item"].date()
 
-            if existing:
-                # Se existir duplicado, incrementa quantidade e reativa se necessário
-                return await ItemService._increment_existing_item(db, existing, item_data)
-
-            # 5) Se não, cria via repositório
-            from models.item import Item # Importação local para evitar circular
-            novo = Item(**dados)
-            return await ItemRepository.create(db, novo)
+        try:
+            # 4) Cria ou, se houver duplicata (inclusive inativa), incrementa e reativa
+            return await ItemRepository.upsert_incrementando(db, dados)
 
         except IntegrityError as ie:
             await db.rollback()
@@ -71,37 +66,6 @@ class ItemService:
                 detail=f"Erro ao criar o item: {e}",
             )
 
-    @staticmethod
-    async def _increment_existing_item(db: AsyncSession, existing, item_data: ItemCreate):
-        """
-        Incrementa apenas a quantidade (e atualiza campos opcionais)
-        sem criar novo registro. Reativa o item se ele estava inativo.
-        """
-        existing.quantidade_item += item_data.quantidade_item
-        existing.data_entrada_item = item_data.data_entrada_item or datetime.now()
-
-        # Atualiza campos opcionais, se vierem
-        if item_data.data_validade_item:
-            existing.data_validade_item = item_data.data_validade_item
-        if item_data.quantidade_minima_item:
-            existing.quantidade_minima_item = item_data.quantidade_minima_item
-        if item_data.marca_item:
-            existing.marca_item = item_data.marca_item
-
-        # Se o item estava inativo e sua quantidade foi incrementada, reativá-lo
-        if not existing.ativo:
-            existing.ativo = True
-
-        existing.auditoria_usuario_id = (
-            item_data.auditoria_usuario_id
-            if hasattr(item_data, "auditoria_usuario_id")
-            else existing.auditoria_usuario_id
-        )
-
-        await db.commit()
-        await db.refresh(existing)
-        return existing
-
     @staticmethod
     async def get_itens(db: AsyncSession):
         items = await ItemRepository.get_all(db)
@@ -122,6 +86,10 @@ class ItemService:
 
     @staticmethod
     async def delete_item(db: AsyncSession, item_id: int):
+        return await com_retentativas(db, lambda: ItemService._delete_item(db, item_id), "item")
+
+    @staticmethod
+    async def _delete_item(db: AsyncSession, item_id: int):
         item = await ItemRepository.get_by_id(db, item_id)
         if not item:
             raise HTTPException(
@@ -134,6 +102,16 @@ class ItemService:
     @staticmethod
     async def update_item(
         db: AsyncSession, item_id: int, data: ItemUpdate, current_user
+    ):
+        # Item.versao garante que o merge/atualização parte do estado atual do banco;
+        # em conflito, tudo é relido e reaplicado
+        return await com_retentativas(
+            db, lambda: ItemService._update_item(db, item_id, data, current_user), "item"
+        )
+
+    @staticmethod
+    async def _update_item(
+        db: AsyncSession, item_id: int, data: ItemUpdate, current_user
     ):
         # 1) Busca o item (get_by_id já filtra por ativo=True)
         item = await ItemRepository.get_by_id(db, item_id)
@@ -177,9 +155,9 @@ class ItemService:
 
             existing.auditoria_usuario_id = current_user.usuario_id
 
-            # O item original (item_id) é soft-deletado
-            await ItemRepository.delete(db, item) # Já seta item.ativo = False
-            await db.commit()
+            # O item original (item_id) é soft-deletado no mesmo commit da fusão
+            item.ativo = False
+            await ItemService._commit_identidade(db)
             await db.refresh(existing)
             return existing
         # 5b) Senão, faz atualização pontual no próprio item
@@ -194,12 +172,27 @@ class ItemService:
         
         item.auditoria_usuario_id = current_user.usuario_id
 
-        await db.commit()
+        await ItemService._commit_identidade(db)
         await db.refresh(item)
         return item
 
     @staticmethod
-    async def get_items_paginated(db: AsyncSession, page: int, size: int) -> PaginatedItems:
+    async def _commit_identidade(db: AsyncSession) -> None:
+        """Commit de uma alteração de item; violação de uq_item_identidade vira 409."""
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Outra requisição gravou a mesma identidade entre a checagem e o commit
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Já existe um item com o mesmo nome, categoria, validade e marca.",
+            )
+
+    @staticmethod
+    async def get_items_paginated(
+        db: AsyncSession, page: int, size: int, cursor: str | None = None
+    ) -> PaginatedItems:
         allowed = [5, 10, 25, 50, 100]
         if size not in allowed:
             raise HTTPException(
@@ -211,20 +204,22 @@ class ItemService:
                 status_code=status.HTTP_400_BAD_REQUEST, detail="page deve ser >= 1"
             )
 
-        total = await ItemRepository.count(db) # Já conta apenas itens ativos
-        offset = (page - 1) * size
-        itens = await ItemRepository.get_paginated(db, offset, size) # Já lista apenas itens ativos
+        apos = ItemService._decode_item_cursor(cursor)
+        offset = 0 if apos else (page - 1) * size
+        # Um item a mais indica se existe próxima página
+        itens, total = await ItemRepository.get_paginated(db, offset, size + 1, apos) # Já lista apenas itens ativos
 
-        items_out = [ItemOut.model_validate(i) for i in itens]
-        total_pages = (total // size) + (1 if total % size else 0)
-
-        return PaginatedItems(
-            page=page, size=size, total=total, total_pages=total_pages, items=items_out
-        )
+        return ItemService._build_page(itens, page, size, total, com_cursor=True)
 
     @staticmethod
     async def search_items_paginated(
-        db: AsyncSession, nome_produto: str | None, nome_categoria: str | None, page: int, size: int
+        db: AsyncSession,
+        nome_produto: str | None,
+        nome_categoria: str | None,
+        page: int,
+        size: int,
+        por_relevancia: bool = True,
+        cursor: str | None = None,
     ) -> PaginatedItems:
         allowed = [5, 10, 25, 50, 100]
         if size not in allowed:
@@ -241,23 +236,61 @@ class ItemService:
         categoria_ids = None
         if nome_categoria:
             nome_categoria_norm = normalize_name(nome_categoria)
-            categoria_ids = await CategoriaRepository.find_categoria_ids_by_name(
-                db, nome_categoria_norm
-            )
+            categoria_ids = await categoria_index.buscar_ids(db, nome_categoria_norm)
 
-        total = await ItemRepository.count_filtered(db, categoria_ids, nome_norm) # Já conta apenas itens ativos
-        offset = (page - 1) * size
-        itens = await ItemRepository.get_filtered_paginated( # Já lista apenas itens ativos
-            db, categoria_ids, nome_norm, offset, size
+        apos = ItemService._decode_item_cursor(cursor)
+        offset = 0 if apos else (page - 1) * size
+        itens, total = await ItemRepository.get_filtered_paginated( # Já lista apenas itens ativos
+            db, categoria_ids, nome_norm, offset, size + 1, por_relevancia, apos
         )
 
+        # Ordenado por relevância não há chave estável para o cursor; só o modo page/size vale
+        ordem_alfabetica = apos is not None or not (nome_norm and por_relevancia)
+        return ItemService._build_page(itens, page, size, total, com_cursor=ordem_alfabetica)
+
+    @staticmethod
+    def _decode_item_cursor(cursor: str | None) -> tuple[str, int] | None:
+        if not cursor:
+            return None
+        valores = decode_cursor(cursor, {"nome_item": str, "item_id": int})
+        return valores["nome_item"], valores["item_id"]
+
+    @staticmethod
+    def _build_page(itens, page: int, size: int, total: int, com_cursor: bool) -> PaginatedItems:
+        """
+        Monta a página a partir de até size + 1 itens ordenados por (nome_item, item_id);
+        o excedente só sinaliza que há próxima página e vira o next_cursor.
+        """
+        tem_proxima = len(itens) > size
+        itens = itens[:size]
+        next_cursor = None
+        if com_cursor and tem_proxima:
+            ultimo = itens[-1]
+            next_cursor = encode_cursor({"nome_item": ultimo.nome_item, "item_id": ultimo.item_id})
+
         items_out = [ItemOut.model_validate(i) for i in itens]
         total_pages = (total // size) + (1 if total % size else 0)
 
         return PaginatedItems(
-            page=page, size=size, total=total, total_pages=total_pages, items=items_out
+            page=page,
+            size=size,
+            total=total,
+            total_pages=total_pages,
+            items=items_out,
+            next_cursor=next_cursor,
         )
 
+    @staticmethod
+    async def export_items(
+        db: AsyncSession, formato: str, nome_produto: str | None, nome_categoria: str | None
+    ) -> ItemExporter:
+        """Prepara a exportação com os mesmos filtros de search_items_paginated."""
+        nome_norm = normalize_name(nome_produto) if nome_produto else None
+        categoria_ids = None
+        if nome_categoria:
+            categoria_ids = await categoria_index.buscar_ids(db, normalize_name(nome_categoria))
+        return ItemExporter(formato, categoria_ids, nome_norm)
+
     @staticmethod
     async def process_bulk_upload(
         db: AsyncSession, file: UploadFile, auditoria_usuario_id: int
@@ -265,6 +298,26 @@ class ItemService:
         processor = ItemBulkProcessor(db, auditoria_usuario_id)
         return await processor.process(file)
 
+    @staticmethod
+    async def create_bulk_upload_job(
+        file: UploadFile, auditoria_usuario_id: int
+    ) -> BulkUploadJobStatus:
+        """
+        Valida o tipo do arquivo e grava o upload em disco antes de a requisição terminar;
+        o processamento em si roda depois, em run_bulk_upload_job.
+        """
+        file_type = ItemBulkProcessor.resolve_file_type(file)
+        caminho = await ItemBulkProcessor.spool_upload(file, file_type)
+        return await bulk_upload_jobs.criar_job(caminho, file_type, auditoria_usuario_id)
+
+    @staticmethod
+    async def run_bulk_upload_job(job_id: str) -> None:
+        await bulk_upload_jobs.executar(job_id)
+
+    @staticmethod
+    async def get_bulk_upload_job(db: AsyncSession, job_id: str, usuario_id: int) -> BulkUploadJobStatus:
+        return await bulk_upload_jobs.get_job(db, job_id, usuario_id)
+
     @staticmethod
     def _handle_integrity_error(e: IntegrityError):
         error_msg = str(e.orig).lower()
@@ -6,6 +6,7 @@ from models.retirada import StatusEnum
 from core.configs import Settings
 from services.export_strategy import CSVExportStrategy, XLSXExportStrategy
 from services.categoria_service import CategoriaService
+from services.categoria_index import categoria_index
 from repositories.item_repository import ItemRepository 
 from services.retirada_service import RetiradaService
 from utils.relatorio_itens import formatar_dados_relatorio
@@ -37,10 +38,9 @@ class RelatorioService:
                         raise HTTPException(status_code=404, detail="Categoria não encontrada")
                     categoria_ids = [cat.categoria_id]
                 else:
-                    cats = await CategoriaService.get_categorias_like(session, filtro_categoria)
-                    if not cats:
+                    categoria_ids = await categoria_index.buscar_ids(session, normalize_name(filtro_categoria))
+                    if not categoria_ids:
                         raise HTTPException(status_code=404, detail="Nenhuma categoria encontrada com o termo fornecido")
-                    categoria_ids = [c.categoria_id for c in cats]
 
             # 2. Normalizar e tratar filtro de produto
             filtro_normalizado = None
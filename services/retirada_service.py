@@ -2,17 +2,18 @@ from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
-from schemas.retirada import RetiradaOut
+from schemas.retirada import RetiradaOut, RetiradaItemOut
+from schemas.item import ItemOut
 from models.retirada import Retirada, StatusEnum
-from models.retirada_item import RetiradaItem
+from models.item import Item
 from repositories.retirada_repository import RetiradaRepository
+from repositories.paginacao import Paginacao
 from schemas.retirada import RetiradaCreate, RetiradaUpdateStatus, RetiradaPaginated, RetiradaFilterParams
 
 from services.alerta_service import AlertaService
 from utils.websocket_endpoints import manager
 
-from models.usuario import Usuario, RoleEnum
-from sqlalchemy.future import select
+from models.usuario import RoleEnum
 
 class RetiradaService:
 
@@ -21,10 +22,9 @@ class RetiradaService:
         db: AsyncSession, page: int, page_size: int
     ) -> RetiradaPaginated:
         """Retorna uma lista paginada de todas as retiradas ativas."""
-        total = await RetiradaRepository.count_retiradas(db)
-        pages = (total + page_size - 1) // page_size if total > 0 else 1
         offset = (page - 1) * page_size
-        sqlalchemy_items = await RetiradaRepository.get_retiradas_paginated(db, offset, page_size)
+        sqlalchemy_items, total = await RetiradaRepository.get_retiradas_paginated(db, offset, page_size)
+        pages = (total + page_size - 1) // page_size if total > 0 else 1
         items = [RetiradaOut.model_validate(ent) for ent in sqlalchemy_items]
         return RetiradaPaginated(total=total, page=page, pages=pages, items=items)
 
@@ -36,12 +36,11 @@ class RetiradaService:
         page_size: int
     ) -> RetiradaPaginated:
         """Filtra e retorna retiradas ativas com paginação."""
-        total = await RetiradaRepository.count_retiradas_filter(db, params)
-        pages = (total + page_size - 1) // page_size if total > 0 else 1
         offset = (page - 1) * page_size
-        sqlalchemy_items = await RetiradaRepository.filter_retiradas_paginated(
+        sqlalchemy_items, total = await RetiradaRepository.filter_retiradas_paginated(
             db, params, offset, page_size
         )
+        pages = (total + page_size - 1) // page_size if total > 0 else 1
         items = [RetiradaOut.model_validate(ent) for ent in sqlalchemy_items]
         return RetiradaPaginated(total=total, page=page, pages=pages, items=items)
 
@@ -81,80 +80,77 @@ class RetiradaService:
                 if retirada_data.linked_usuario_id is not None:
                     solicitado_localmente_por_value = None
             
-            # 1) Cria Retirada
-            nova_retirada = Retirada(
-                usuario_id=usuario_id_for_record,
-                setor_id=retirada_data.setor_id,
-                status=initial_status,
-                solicitado_localmente_por=solicitado_localmente_por_value,
-                justificativa=retirada_data.justificativa,
-                autorizado_por=authorized_by_id, # Define quem autorizou para retiradas locais
-                data_solicitacao=datetime.now(),
-                is_active=True
+            # 1) Valida todos os itens da solicitação com uma única consulta
+            quantidades = RetiradaService._quantidades_por_item(retirada_data.itens)
+            itens_db = await RetiradaRepository.buscar_itens(db, list(quantidades))
+            RetiradaService._validar_itens(quantidades, itens_db)
+
+            # 2) Cria a retirada e suas linhas num único comando
+            data_solicitacao = datetime.now()
+            retirada_id = await RetiradaRepository.inserir_com_itens(
+                db,
+                {
+                    "usuario_id": usuario_id_for_record,
+                    "setor_id": retirada_data.setor_id,
+                    "status": initial_status,
+                    "solicitado_localmente_por": solicitado_localmente_por_value,
+                    "justificativa": retirada_data.justificativa,
+                    "autorizado_por": authorized_by_id, # Define quem autorizou para retiradas locais
+                    "data_solicitacao": data_solicitacao,
+                    "is_active": True,
+                },
+                quantidades,
             )
-            await RetiradaRepository.criar_retirada(db, nova_retirada)
-
-            # 2) Cria e adiciona itens
-            itens_retirada = [
-                RetiradaItem(
-                    retirada_id=nova_retirada.retirada_id,
-                    item_id=item.item_id,
-                    quantidade_retirada=item.quantidade_retirada
-                )
-                for item in retirada_data.itens
-            ]
-            await RetiradaRepository.adicionar_itens_retirada(db, itens_retirada)
 
-            # 3) Commit (para a criação da retirada e seus itens)
+            # 3) Retirada local já concluída: baixa o estoque na mesma transação,
+            # para que falta de saldo desfaça também a criação da retirada
+            novos_alertas = []
+            if retirada_data.is_local_withdrawal and initial_status == StatusEnum.CONCLUIDA:
+                novos_alertas = await RetiradaService._baixar_estoque(db, retirada_data.itens)
+
+            # 4) Commit (retirada, itens, estoque e alertas)
             await db.commit()
+            Paginacao.invalidar("retiradas_ativas")
+            await AlertaService.notificar_alertas(novos_alertas)
 
-            # 4) Recarrega com eager-load para serialização segura
-            retirada_completa = await RetiradaRepository.buscar_retirada_por_id(
-                db, nova_retirada.retirada_id
-            )
-            
-            # Se for uma retirada local e concluída, decrementa o estoque imediatamente
-            if retirada_data.is_local_withdrawal and initial_status == StatusEnum.CONCLUIDA:
-                for ri in retirada_completa.itens:
-                    item = await RetiradaRepository.buscar_item_por_id(db, ri.item_id)
-                    if not item:
-                        raise HTTPException(
-                            status_code=status.HTTP_404_NOT_FOUND,
-                            detail=f"Item com ID {ri.item_id} não encontrado."
-                        )
-                    if item.quantidade_item < ri.quantidade_retirada:
-                        raise HTTPException(
-                            status_code=status.HTTP_400_BAD_REQUEST,
-                            detail=f"Estoque insuficiente para item {item.nome_item_original}. Quantidade disponível: {item.quantidade_item}, solicitada: {ri.quantidade_retirada}"
-                        )
-                    await RetiradaRepository.atualizar_quantidade_item(
-                        db, item, item.quantidade_item - ri.quantidade_retirada
+            # 5) Monta a resposta com o que já está em memória; os itens carregados na
+            # validação foram atualizados pela baixa de estoque (populate_existing)
+            retirada_completa = RetiradaOut(
+                retirada_id=retirada_id,
+                usuario_id=usuario_id_for_record,
+                autorizado_por=authorized_by_id,
+                setor_id=retirada_data.setor_id,
+                status=initial_status,
+                detalhe_status=None,
+                justificativa=retirada_data.justificativa,
+                solicitado_localmente_por=solicitado_localmente_por_value,
+                data_solicitacao=data_solicitacao,
+                itens=[
+                    RetiradaItemOut(
+                        item_id=item_id,
+                        quantidade_retirada=quantidade,
+                        item=ItemOut.model_validate(itens_db[item_id]),
                     )
-                    # Se a quantidade do item chegar a 0, marcar como inativo (soft delete)
-                    if item.quantidade_item == 0:
-                        item.ativo = False # Marca o item como inativo (soft delete para item)
-                        await db.flush() # Garante que a mudança seja persistida antes do commit
-
-                    await AlertaService.verificar_estoque_baixo(db, ri.item_id)
-                await db.commit() # Commit das alterações de estoque
+                    for item_id, quantidade in quantidades.items()
+                ],
+            )
 
             # Transmitir o evento de nova solicitação de retirada APENAS para usuários do Almoxarifado
             # e APENAS se o status for PENDENTE (ou seja, não é uma retirada local concluída)
             if initial_status == StatusEnum.PENDENTE:
-                almoxarifados = await db.execute(
-                    select(Usuario).where(Usuario.tipo_usuario == RoleEnum.USUARIO_ALMOXARIFADO.value)
+                await manager.send_to_role(
+                    RoleEnum.USUARIO_ALMOXARIFADO,
+                    {
+                        "type": "new_withdrawal_request",
+                        "retirada_id": retirada_completa.retirada_id,
+                        "message": f"Nova solicitação de retirada do setor {retirada_completa.setor_id}"
+                    }
                 )
-                for almoxarifado_user in almoxarifados.scalars().all():
-                    await manager.send_to_user(
-                        almoxarifado_user.usuario_id,
-                        {
-                            "type": "new_withdrawal_request",
-                            "retirada_id": retirada_completa.retirada_id,
-                            "message": f"Nova solicitação de retirada do setor {retirada_completa.setor_id}"
-                        }
-                    )
 
             return retirada_completa
+        except HTTPException:
+            await db.rollback()
+            raise
         except Exception as e:
             await db.rollback()
             raise HTTPException(
@@ -162,9 +158,87 @@ class RetiradaService:
                 detail=f"Erro ao solicitar retirada: {e}"
             )
 
+    @staticmethod
+    def _quantidades_por_item(itens_retirada) -> dict[int, int]:
+        """item_id -> quantidade total (linhas repetidas do mesmo item são somadas)."""
+        quantidades: dict[int, int] = {}
+        for ri in itens_retirada:
+            quantidades[ri.item_id] = quantidades.get(ri.item_id, 0) + ri.quantidade_retirada
+        return quantidades
+
+    @staticmethod
+    def _validar_itens(quantidades: dict[int, int], itens_db: dict[int, Item]) -> None:
+        """
+        Confere, sem novas consultas, que a solicitação tem itens e que cada um existe,
+        está ativo, tem quantidade positiva e saldo suficiente. Reporta todos os
+        problemas de uma vez, no mesmo formato usado pela baixa de estoque.
+        """
+        if not quantidades:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A retirada deve conter ao menos um item.",
+            )
+
+        erros = []
+        for item_id, quantidade in quantidades.items():
+            item = itens_db.get(item_id)
+            if quantidade <= 0:
+                msg = f"Quantidade solicitada deve ser maior que zero (informada: {quantidade})."
+            elif item is None or not item.ativo:
+                msg = f"Item com ID {item_id} não encontrado."
+            elif item.quantidade_item < quantidade:
+                msg = (
+                    f"Estoque insuficiente para item {item.nome_item_original}. "
+                    f"Quantidade disponível: {item.quantidade_item}, solicitada: {quantidade}"
+                )
+            else:
+                continue
+            erros.append({"loc": ["itens", str(item_id)], "msg": msg, "type": "item_invalido"})
+
+        if erros:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=erros)
+
+    @staticmethod
+    async def _baixar_estoque(db: AsyncSession, itens_retirada) -> list:
+        """
+        Decrementa o estoque de todos os itens da retirada de uma vez e gera os alertas
+        de estoque baixo resultantes, sem commit. Retorna os alertas criados, para
+        notificar depois do commit.
+        Se algum item não tiver saldo, levanta 400 listando todos os que faltam;
+        o rollback feito por quem chamou desfaz as baixas já aplicadas.
+        """
+        quantidades = RetiradaService._quantidades_por_item(itens_retirada)
+        faltantes = await RetiradaRepository.decrementar_estoque(db, quantidades)
+        if faltantes:
+            # Mesmo formato dos erros de validação do FastAPI (lista com loc/msg),
+            # que o frontend já exibe item a item
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=[
+                    {
+                        "loc": ["itens", str(f["item_id"])],
+                        "msg": (
+                            f"Estoque insuficiente para item {f['nome_item']}. "
+                            f"Quantidade disponível: {f['disponivel']}, solicitada: {f['solicitada']}"
+                            if f["nome_item"] is not None
+                            else f"Item com ID {f['item_id']} não encontrado."
+                        ),
+                        "type": "estoque_insuficiente",
+                        **f,
+                    }
+                    for f in faltantes
+                ],
+            )
+        return await AlertaService.verificar_estoque_baixo_itens(db, quantidades)
+
     @staticmethod
     async def atualizar_status(db: AsyncSession, retirada_id: int, status_data: RetiradaUpdateStatus, admin_id: int):
-        """Atualiza o status de uma retirada e, se concluída, decrementa o estoque dos itens."""
+        """
+        Atualiza o status de uma retirada e, se concluída, decrementa o estoque dos itens.
+        Retiradas concluídas são finais: o status só muda se o UPDATE condicional encontrar
+        a retirada ainda não concluída, e só quem fez essa mudança baixa o estoque.
+        Conclusões simultâneas ou repetidas recebem 409 sem tocar no estoque.
+        """
         try:
             if status_data.status not in (s.value for s in StatusEnum):
                 raise HTTPException(400, "Status inválido.")
@@ -174,35 +248,23 @@ class RetiradaService:
             if not retirada:
                 raise HTTPException(status.HTTP_404_NOT_FOUND, "Retirada não encontrada")
 
-            # Se concluindo, decrementa estoques
-            if status_data.status == StatusEnum.CONCLUIDA:
-                for ri in retirada.itens:
-                    item = await RetiradaRepository.buscar_item_por_id(db, ri.item_id)
-                    if not item: # Garante que o item existe antes de tentar acessar seus atributos
-                        raise HTTPException(
-                            status_code=status.HTTP_404_NOT_FOUND,
-                            detail=f"Item com ID {ri.item_id} não encontrado."
-                        )
-                    if item.quantidade_item < ri.quantidade_retirada:
-                        raise HTTPException(
-                            status_code=status.HTTP_400_BAD_REQUEST,
-                            detail=f"Estoque insuficiente para item {item.nome_item_original}. Quantidade disponível: {item.quantidade_item}, solicitada: {ri.quantidade_retirada}"
-                        )
-                    await RetiradaRepository.atualizar_quantidade_item(
-                        db, item, item.quantidade_item - ri.quantidade_retirada
-                    )
-                    # Se a quantidade do item chegar a 0, marcar como inativo (soft delete)
-                    if item.quantidade_item == 0:
-                        item.ativo = False # Marca o item como inativo (soft delete para item)
-                        await db.flush() # Garante que a mudança seja persistida antes do commit
-
-                    await AlertaService.verificar_estoque_baixo(db, ri.item_id)
+            alterada = await RetiradaRepository.atualizar_status_condicional(
+                db, retirada_id, status_data.status, status_data.detalhe_status, admin_id
+            )
+            if not alterada:
+                raise HTTPException(
+                    status.HTTP_409_CONFLICT,
+                    "Retirada já concluída; o estoque já foi baixado e o status não pode mais ser alterado.",
+                )
 
-            retirada.status = status_data.status
-            retirada.detalhe_status = status_data.detalhe_status
-            retirada.autorizado_por = admin_id # Define quem autorizou/negou
+            # Se concluindo, decrementa estoques (tudo ou nada, no mesmo commit do status)
+            novos_alertas = []
+            if status_data.status == StatusEnum.CONCLUIDA:
+                novos_alertas = await RetiradaService._baixar_estoque(db, retirada.itens)
 
-            updated_retirada = await RetiradaRepository.atualizar_retirada(db, retirada)
+            await db.commit()
+            updated_retirada = await RetiradaRepository.buscar_retirada_por_id(db, retirada_id)
+            await AlertaService.notificar_alertas(novos_alertas)
 
             # Enviar notificação específica para o usuário que solicitou a retirada
             await manager.send_to_user(
@@ -231,10 +293,9 @@ class RetiradaService:
         db: AsyncSession, page: int, page_size: int
     ) -> RetiradaPaginated:
         """Retorna uma lista paginada de retiradas pendentes ativas."""
-        total = await RetiradaRepository.count_retiradas_pendentes(db)
-        pages = (total + page_size - 1) // page_size if total > 0 else 1
         offset = (page - 1) * page_size
-        sqlalchemy_items = await RetiradaRepository.get_retiradas_pendentes_paginated(db, offset, page_size)
+        sqlalchemy_items, total = await RetiradaRepository.get_retiradas_pendentes_paginated(db, offset, page_size)
+        pages = (total + page_size - 1) // page_size if total > 0 else 1
         items = [RetiradaOut.model_validate(ent) for ent in sqlalchemy_items]
         return RetiradaPaginated(total=total, page=page, pages=pages, items=items)
 
@@ -284,10 +345,9 @@ class RetiradaService:
         db: AsyncSession, usuario_id: int, page: int, page_size: int
     ) -> RetiradaPaginated:
         """Retorna uma lista paginada de retiradas ativas para um usuário específico."""
-        total = await RetiradaRepository.count_retiradas_by_user(db, usuario_id)
-        pages = (total + page_size - 1) // page_size if total > 0 else 1
         offset = (page - 1) * page_size
-        sqlalchemy_items = await RetiradaRepository.get_retiradas_by_user_paginated(db, usuario_id, offset, page_size)
+        sqlalchemy_items, total = await RetiradaRepository.get_retiradas_by_user_paginated(db, usuario_id, offset, page_size)
+        pages = (total + page_size - 1) // page_size if total > 0 else 1
         items = [RetiradaOut.model_validate(ent) for ent in sqlalchemy_items]
         return RetiradaPaginated(total=total, page=page, pages=pages, items=items)
 
@@ -301,6 +361,7 @@ class RetiradaService:
             raise HTTPException(status.HTTP_400_BAD_REQUEST, "A data inicial deve ser anterior à data final.")
 
         updated_count = await RetiradaRepository.soft_delete_by_period(db, start_date, end_date)
+        Paginacao.invalidar("retiradas_ativas")
         
         if updated_count == 0:
             return {"message": f"Nenhuma retirada encontrada no período de {start_date.strftime('%d/%m/%Y')} a {end_date.strftime('%d/%m/%Y')} para ser deletada.", "deleted_count": 0}
@@ -9,10 +9,13 @@ from schemas.usuario import UsuarioCreate, UsuarioUpdate
 from repositories.usuario_repository import UsuarioRepository
 from fastapi import HTTPException, status, Depends
 from core.security import get_password_hash, verify_password, create_access_token
+from core.user_cache import user_cache
+from core.token_revocation import token_revocation
 from fastapi.security import OAuth2PasswordRequestForm
 from core.database import get_session
 from models.usuario import RoleEnum
 from services.setor_service import SetorService
+from utils.websocket_endpoints import manager
 
 class UsuarioService:
 
@@ -37,7 +40,7 @@ class UsuarioService:
         new_user = Usuario(
             siape_usuario=user_data.siape_usuario,
             nome_usuario=user_data.nome_usuario,
-            senha_usuario=get_password_hash(user_data.senha_usuario),
+            senha_usuario=await get_password_hash(user_data.senha_usuario),
             tipo_usuario=3,
             email_usuario=user_data.email_usuario,
             setor_id=setor_root_data.setor_id,
@@ -103,7 +106,12 @@ class UsuarioService:
                 detail="Sem permissão para esta operação"
             )
         
-        return await UsuarioRepository.delete_usuario(db, usuario_id) 
+        result = await UsuarioRepository.delete_usuario(db, usuario_id)
+        await UsuarioService._invalidar_cache(usuario_id)
+        # Tokens já emitidos param de valer também nos endpoints que só leem as claims,
+        # e continuam recusados enquanto o usuário estiver inativo
+        await UsuarioService._revogar_tokens(usuario_id, desativado=True)
+        return result
 
     @staticmethod
     async def update_usuario(
@@ -120,11 +128,16 @@ class UsuarioService:
         UsuarioService._validate_permission(usuario_id, current_user)
         await UsuarioService._validate_user_data(db, usuario_data, usuario_id)
 
-        campos_atualizados = UsuarioService._prepare_update_fields(db, usuario, usuario_data)
+        # Campos que vão nas claims do token ou que o autenticam
+        credenciais_antes = (usuario.username, usuario.tipo_usuario, usuario.senha_usuario)
+        campos_atualizados = await UsuarioService._prepare_update_fields(db, usuario, usuario_data)
 
         if campos_atualizados:
             await db.commit()
             await db.refresh(usuario)
+            await UsuarioService._invalidar_cache(usuario_id)
+            if (usuario.username, usuario.tipo_usuario, usuario.senha_usuario) != credenciais_antes:
+                await UsuarioService._revogar_tokens(usuario_id)
         return usuario
 
     @staticmethod
@@ -136,11 +149,16 @@ class UsuarioService:
         user = await db.scalar(
             select(Usuario).where(Usuario.username == form_data.username)
         )
-        if not user or not verify_password(form_data.password, user.senha_usuario):
+        if not user or not await verify_password(form_data.password, user.senha_usuario):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Credenciais inválidas"
             )
+        if not user.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Usuário inativo"
+            )
         
         access_token = create_access_token(
             data_payload={"sub": user.username},
@@ -179,9 +197,11 @@ class UsuarioService:
             )
         
         # Atualiza a senha
-        user.senha_usuario = get_password_hash(new_password)
+        user.senha_usuario = await get_password_hash(new_password)
         await db.commit()
         await db.refresh(user)
+        await UsuarioService._invalidar_cache(user.usuario_id)
+        await UsuarioService._revogar_tokens(user.usuario_id)
         
         return user    
 
@@ -257,6 +277,25 @@ class UsuarioService:
                 detail="Setor não encontrado"
             )
 
+    @staticmethod
+    async def _invalidar_cache(usuario_id: int):
+        """Tira o usuário do user_cache neste worker e, pelo barramento, nos demais."""
+        user_cache.invalidate(usuario_id)
+        await manager.publicar_evento("cache_usuario", {"type": "cache_usuario", "usuario_id": usuario_id})
+
+    @staticmethod
+    async def _revogar_tokens(usuario_id: int, desativado: bool | None = None):
+        """Revoga os tokens do usuário neste worker e, pelo barramento, nos demais."""
+        revogado_em = token_revocation.revogar(usuario_id)
+        if desativado:
+            token_revocation.desativar(usuario_id)
+        await manager.publicar_evento("revogacao_token", {
+            "type": "revogacao_token",
+            "usuario_id": usuario_id,
+            "revogado_em": revogado_em,
+            "desativado": desativado,
+        })
+
     @staticmethod
     def _validate_permission (usuario_id: int, current_user: Usuario):
         """ Verifica se o usuário tem permissão para atualizar os dados. """
@@ -270,7 +309,7 @@ class UsuarioService:
             )
 
     @staticmethod
-    def _prepare_update_fields (db: AsyncSession, usuario: Usuario, usuario_data: UsuarioUpdate):
+    async def _prepare_update_fields (db: AsyncSession, usuario: Usuario, usuario_data: UsuarioUpdate):
         """Atualiza apenas os campos modificados."""
         campos_atualizados = False
 
@@ -302,7 +341,7 @@ class UsuarioService:
             campos_atualizados = True
 
         if usuario_data.senha_usuario:
-            usuario.senha_usuario = get_password_hash(usuario_data.senha_usuario)
+            usuario.senha_usuario = await get_password_hash(usuario_data.senha_usuario)
             campos_atualizados = True
 
         return campos_atualizados
@@ -0,0 +1,141 @@
+# tests/test_retirada_concorrencia.py
+"""
+Teste de estresse da conclusão de retiradas em paralelo (RetiradaService.atualizar_status).
+
+Precisa de um PostgreSQL descartável: TEST_DATABASE_URL=postgresql+asyncpg://... python -m pytest
+As tabelas são apagadas e recriadas a cada teste. Sem a variável, o módulo é ignorado.
+"""
+
+import asyncio
+import os
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if not TEST_DATABASE_URL:
+    pytest.skip("TEST_DATABASE_URL não definida (requer PostgreSQL)", allow_module_level=True)
+
+# As configurações são lidas na importação; o banco de teste substitui o da aplicação
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+os.environ.pop("DATABASE_URL_READ", None)
+os.environ.setdefault("JWT_SECRET", "teste")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+from fastapi import HTTPException
+from sqlalchemy import select, text
+
+from core.configs import settings
+from core.database import SessionLocal, engine
+from models import Categoria, Item, Retirada, RetiradaItem, Setor, Usuario
+from models.retirada import StatusEnum
+from models.usuario import RoleEnum
+from schemas.retirada import RetiradaUpdateStatus
+from services.retirada_service import RetiradaService
+
+PARALELAS = 10
+
+
+async def _preparar_banco(estoque: int, quantidades_retiradas: list[int]) -> tuple[int, list[int], int]:
+    """Recria o schema com um item e uma retirada pendente por quantidade; retorna os ids."""
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(settings.DBBaseModel.metadata.drop_all)
+        await conn.run_sync(settings.DBBaseModel.metadata.create_all)
+
+    async with SessionLocal() as db:
+        setor = Setor(nome_setor="Setor de teste")
+        categoria = Categoria(nome_categoria="teste", nome_original="Teste")
+        db.add_all([setor, categoria])
+        await db.flush()
+        usuario = Usuario(
+            nome_usuario="Almoxarife",
+            tipo_usuario=RoleEnum.USUARIO_ALMOXARIFADO.value,
+            email_usuario="almoxarife@teste",
+            senha_usuario="x",
+            setor_id=setor.setor_id,
+            username="almoxarife",
+        )
+        db.add(usuario)
+        await db.flush()
+        item = Item(
+            nome_item="parafuso",
+            nome_item_original="Parafuso",
+            descricao_item="Parafuso de teste",
+            unidade_medida_item="un",
+            quantidade_item=estoque,
+            quantidade_minima_item=0,
+            categoria_id=categoria.categoria_id,
+            auditoria_usuario_id=usuario.usuario_id,
+        )
+        db.add(item)
+        await db.flush()
+        retirada_ids = []
+        for quantidade in quantidades_retiradas:
+            retirada = Retirada(
+                usuario_id=usuario.usuario_id,
+                setor_id=setor.setor_id,
+                status=StatusEnum.PENDENTE.value,
+            )
+            db.add(retirada)
+            await db.flush()
+            db.add(RetiradaItem(
+                retirada_id=retirada.retirada_id, item_id=item.item_id, quantidade_retirada=quantidade
+            ))
+            retirada_ids.append(retirada.retirada_id)
+        await db.commit()
+        return item.item_id, retirada_ids, usuario.usuario_id
+
+
+async def _concluir(retirada_id: int, admin_id: int) -> int:
+    """Conclui a retirada numa sessão própria; retorna 200 ou o status HTTP do erro."""
+    async with SessionLocal() as db:
+        try:
+            await RetiradaService.atualizar_status(
+                db, retirada_id, RetiradaUpdateStatus(status=StatusEnum.CONCLUIDA.value), admin_id
+            )
+            return 200
+        except HTTPException as e:
+            return e.status_code
+
+
+async def _estoque(item_id: int) -> int:
+    async with SessionLocal() as db:
+        return await db.scalar(select(Item.quantidade_item).where(Item.item_id == item_id))
+
+
+def test_conclusoes_simultaneas_da_mesma_retirada_baixam_o_estoque_uma_vez():
+    async def cenario():
+        try:
+            item_id, (retirada_id,), admin_id = await _preparar_banco(estoque=100, quantidades_retiradas=[7])
+            resultados = await asyncio.gather(*(_concluir(retirada_id, admin_id) for _ in range(PARALELAS)))
+            # Repetir a conclusão depois também não baixa de novo
+            resultados.append(await _concluir(retirada_id, admin_id))
+            return resultados, await _estoque(item_id)
+        finally:
+            await engine.dispose()
+
+    resultados, estoque = asyncio.run(cenario())
+    assert resultados.count(200) == 1
+    assert resultados.count(409) == len(resultados) - 1
+    assert estoque == 93
+
+
+def test_conclusoes_simultaneas_nunca_deixam_estoque_negativo():
+    async def cenario():
+        try:
+            # 10 retiradas de 3 unidades disputando 20: no máximo 6 podem ser concluídas
+            item_id, retirada_ids, admin_id = await _preparar_banco(
+                estoque=20, quantidades_retiradas=[3] * PARALELAS
+            )
+            resultados = await asyncio.gather(*(_concluir(rid, admin_id) for rid in retirada_ids))
+            return resultados, await _estoque(item_id)
+        finally:
+            await engine.dispose()
+
+    resultados, estoque = asyncio.run(cenario())
+    concluidas = resultados.count(200)
+    assert concluidas == 6
+    assert resultados.count(400) == PARALELAS - concluidas # estoque insuficiente
+    assert estoque == 20 - 3 * concluidas
+    assert estoque >= 0
@@ -0,0 +1,133 @@
+# tests/test_websocket_carga.py
+"""
+Teste de carga do ConnectionManager com 1.000 WebSockets simulados (sem rede nem banco):
+clientes lentos são desconectados quando a fila estoura, sem atrasar os demais, e cada
+mensagem é serializada uma única vez, qualquer que seja o número de destinatários.
+"""
+
+import asyncio
+import os
+
+# As configurações são lidas na importação; o banco não é usado aqui
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://teste@localhost/teste")
+os.environ.setdefault("JWT_SECRET", "teste")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+import utils.websocket_endpoints as websocket_endpoints
+from core.configs import settings
+from models.usuario import RoleEnum
+from utils.websocket_endpoints import ConnectionManager
+
+CONEXOES = 1000
+LENTAS = 10 # uma a cada 100 conexões nunca termina um envio
+
+
+class _WebSocketSimulado:
+    def __init__(self, lento: bool = False):
+        self.lento = lento
+        self.recebidas: list[str] = []
+        self.fechado_com: int | None = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, texto: str):
+        if self.lento:
+            await asyncio.Event().wait() # cliente que parou de ler
+        await asyncio.sleep(0)
+        self.recebidas.append(texto)
+
+    async def close(self, code: int = 1000):
+        self.fechado_com = code
+
+
+async def _conectar_todos(manager: ConnectionManager) -> list[_WebSocketSimulado]:
+    sockets = [_WebSocketSimulado(lento=i % (CONEXOES // LENTAS) == 0) for i in range(CONEXOES)]
+    for i, websocket in enumerate(sockets):
+        # Metade com usuário (50 usuários, várias abas cada) e metade como conexão geral
+        user_id = i % 50 + 1 if i % 2 else None
+        role = RoleEnum.USUARIO_ALMOXARIFADO.value if i % 3 == 0 else RoleEnum.USUARIO_GERAL.value
+        await manager.connect(websocket, user_id, role)
+    return sockets
+
+
+async def _esperar(condicao, timeout: float = 10):
+    async def aguardar():
+        while not condicao():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(aguardar(), timeout)
+
+
+async def _desconectar_todos(manager: ConnectionManager, sockets: list[_WebSocketSimulado]):
+    for websocket in sockets:
+        manager.disconnect(websocket)
+    await asyncio.sleep(0.05)
+
+
+def test_clientes_lentos_sao_descartados_quando_a_fila_estoura():
+    async def cenario():
+        manager = ConnectionManager()
+        sockets = await _conectar_todos(manager)
+        rapidos = [ws for ws in sockets if not ws.lento]
+        lentos = [ws for ws in sockets if ws.lento]
+
+        # Rajadas menores que a fila: os rápidos sempre esvaziam a sua entre uma e outra,
+        # os lentos acumulam até estourar WS_QUEUE_SIZE
+        total, rajada = 3 * settings.WS_QUEUE_SIZE, 10
+        for enviadas in range(rajada, total + 1, rajada):
+            for k in range(rajada):
+                await manager.broadcast({"type": "new_alert", "message": f"alerta {enviadas - rajada + k}"})
+            await _esperar(lambda: all(len(ws.recebidas) == enviadas for ws in rapidos))
+
+        await asyncio.sleep(0.05) # fechamento dos sockets descartados roda em segundo plano
+        stats = manager.stats()
+        resultado = {
+            "rapidos_completos": all(len(ws.recebidas) == total for ws in rapidos),
+            "rapidos_fechados": [ws.fechado_com for ws in rapidos if ws.fechado_com is not None],
+            "lentos_fechados_com": {ws.fechado_com for ws in lentos},
+            "descartadas": stats["descartadas"],
+            "conexoes": stats["conexoes"],
+        }
+        await _desconectar_todos(manager, sockets)
+        return resultado
+
+    resultado = asyncio.run(asyncio.wait_for(cenario(), 60))
+    assert resultado["rapidos_completos"]
+    assert resultado["rapidos_fechados"] == []
+    assert resultado["lentos_fechados_com"] == {1013}
+    assert resultado["descartadas"] == LENTAS
+    assert resultado["conexoes"] == CONEXOES - LENTAS
+
+
+def test_cada_mensagem_e_serializada_uma_vez(monkeypatch):
+    serializacoes = []
+    dumps = websocket_endpoints.json.dumps
+
+    def contar_dumps(*args, **kwargs):
+        serializacoes.append(args[0])
+        return dumps(*args, **kwargs)
+
+    monkeypatch.setattr(websocket_endpoints.json, "dumps", contar_dumps)
+
+    async def cenario():
+        manager = ConnectionManager()
+        sockets = await _conectar_todos(manager)
+        await manager.broadcast({"type": "new_alert", "message": "para todos"})
+        await manager.send_to_user(2, {"type": "retirada", "message": "para um usuário"})
+        await manager.send_to_role(
+            [RoleEnum.USUARIO_ALMOXARIFADO, RoleEnum.USUARIO_DIRECAO], {"type": "new_alert", "message": "por perfil"}
+        )
+        await _esperar(lambda: all(len(ws.recebidas) >= 1 for ws in sockets if not ws.lento))
+        por_mensagem = {}
+        for ws in sockets:
+            for texto in ws.recebidas:
+                por_mensagem[texto] = por_mensagem.get(texto, 0) + 1
+        await _desconectar_todos(manager, sockets)
+        return por_mensagem
+
+    por_mensagem = asyncio.run(asyncio.wait_for(cenario(), 60))
+    assert len(serializacoes) == 3
+    # Centenas de destinatários receberam exatamente o mesmo texto serializado
+    assert sorted(por_mensagem.values())[-1] == CONEXOES - LENTAS
+    assert len(por_mensagem) == 3
@@ -0,0 +1,40 @@
+# utils/concorrencia.py
+
+import asyncio
+import random
+from typing import Awaitable, Callable, TypeVar
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+
+from core.configs import settings
+from utils.logger import logger
+
+T = TypeVar("T")
+
+
+async def com_retentativas(
+    db: AsyncSession, operacao: Callable[[], Awaitable[T]], descricao: str = "registro"
+) -> T:
+    """
+    Executa uma leitura-modificação-escrita sobre linhas versionadas (version_id_col).
+    Se outra transação gravou a linha entre a leitura e o commit, o UPDATE não casa
+    a versão lida e o SQLAlchemy levanta StaleDataError: desfaz (o rollback expira
+    os objetos da sessão, então a próxima tentativa relê do banco) e repete até
+    OPTIMISTIC_LOCK_MAX_RETRIES vezes, respondendo 409 se ainda houver conflito.
+    """
+    tentativas = max(settings.OPTIMISTIC_LOCK_MAX_RETRIES, 1)
+    for tentativa in range(1, tentativas + 1):
+        try:
+            return await operacao()
+        except StaleDataError:
+            await db.rollback()
+            logger.warning(f"Conflito de versão ao gravar {descricao} (tentativa {tentativa}/{tentativas})")
+            if tentativa < tentativas:
+                # Espera curta e aleatória para as transações concorrentes não colidirem de novo
+                await asyncio.sleep(random.uniform(0, 0.005 * 2 ** tentativa))
+
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"O {descricao} foi alterado por outra operação ao mesmo tempo; tente novamente.",
+    )
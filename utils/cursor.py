@@ -0,0 +1,35 @@
+# utils/cursor.py
+
+import base64
+import binascii
+import json
+from fastapi import HTTPException, status
+
+
+def encode_cursor(valores: dict) -> str:
+    """Gera um cursor opaco (JSON em base64 url-safe, sem padding) para paginação keyset."""
+    bruto = json.dumps(valores, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(bruto).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, campos: dict[str, type]) -> dict:
+    """
+    Decodifica um cursor gerado por encode_cursor e confere o tipo de cada campo
+    (campo -> tipo esperado); levanta 400 se estiver malformado. O cursor vem do
+    cliente: um tipo errado chegaria à comparação no banco e viraria erro 500.
+    """
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valores = json.loads(bruto.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        valores = None
+
+    if not isinstance(valores, dict) or any(
+        # bool é subclasse de int, mas true/false não são ids válidos
+        not isinstance(valores.get(campo), tipo) or isinstance(valores.get(campo), bool)
+        for campo, tipo in campos.items()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="cursor inválido"
+        )
+    return valores
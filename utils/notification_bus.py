@@ -0,0 +1,160 @@
+# utils/notification_bus.py
+"""
+Barramento de notificações entre workers. O ConnectionManager publica aqui cada evento
+e todo worker (inclusive o que publicou) o recebe e entrega às suas conexões locais.
+
+- MemoryNotificationBus: entrega no próprio processo (um worker só, ou testes).
+- PostgresNotificationBus: LISTEN/NOTIFY numa conexão asyncpg dedicada, fora do pool.
+"""
+
+import asyncio
+import json
+from typing import Callable, Optional
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from core.configs import settings
+from utils.logger import logger
+
+# Limite do payload do NOTIFY é 8000 bytes; acima disso o evento fica só no worker local
+_PAYLOAD_MAXIMO = 7900
+
+
+class MemoryNotificationBus:
+    tipo = "memoria"
+
+    def __init__(self):
+        self._ao_receber: Optional[Callable[[dict], None]] = None
+        self.publicadas = 0
+
+    async def iniciar(self, ao_receber: Callable[[dict], None]) -> None:
+        self._ao_receber = ao_receber
+
+    async def publicar(self, evento: dict) -> None:
+        self.publicadas += 1
+        self._ao_receber(evento)
+
+    async def parar(self) -> None:
+        self._ao_receber = None
+
+    def stats(self) -> dict:
+        return {"tipo": self.tipo, "publicadas": self.publicadas}
+
+
+class PostgresNotificationBus:
+    """
+    Publica com pg_notify e escuta o mesmo canal; o Postgres entrega a notificação a
+    todas as sessões em LISTEN, então cada worker recebe também o que publicou.
+    Se a conexão cair, reconecta em segundo plano; enquanto isso, os eventos publicados
+    por este worker são entregues só localmente (melhor do que perdê-los).
+    """
+    tipo = "postgres"
+
+    def __init__(self, dsn: str, canal: str):
+        self._dsn = dsn
+        self.canal = canal
+        self._conexao: Optional[asyncpg.Connection] = None
+        self._ao_receber: Optional[Callable[[dict], None]] = None
+        self._lock = asyncio.Lock() # asyncpg não aceita comandos simultâneos na mesma conexão
+        self._parado = False
+        self._reconexao: Optional[asyncio.Task] = None
+        self.publicadas = 0
+        self.recebidas = 0
+        self.entregues_localmente = 0
+
+    async def iniciar(self, ao_receber: Callable[[dict], None]) -> None:
+        self._ao_receber = ao_receber
+        self._parado = False
+        try:
+            await self._conectar()
+        except Exception as e:
+            logger.error(f"Barramento de notificações indisponível ({e!r}); tentando reconectar em segundo plano")
+            self._agendar_reconexao()
+
+    async def _conectar(self) -> None:
+        conexao = await asyncpg.connect(self._dsn)
+        await conexao.add_listener(self.canal, self._notificacao)
+        conexao.add_termination_listener(self._ao_cair)
+        self._conexao = conexao
+        logger.info(f"Barramento de notificações escutando o canal '{self.canal}'")
+
+    def _notificacao(self, conexao, pid, canal, payload: str) -> None:
+        self.recebidas += 1
+        try:
+            evento = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Notificação inválida no canal '{canal}' ignorada")
+            return
+        self._ao_receber(evento)
+
+    def _ao_cair(self, conexao) -> None:
+        if self._conexao is conexao:
+            self._conexao = None
+        if not self._parado:
+            logger.warning("Conexão do barramento de notificações encerrada; reconectando")
+            self._agendar_reconexao()
+
+    def _agendar_reconexao(self) -> None:
+        if self._reconexao is None or self._reconexao.done():
+            self._reconexao = asyncio.create_task(self._reconectar())
+
+    async def _reconectar(self) -> None:
+        espera = 1
+        while not self._parado and self._conexao is None:
+            await asyncio.sleep(espera)
+            try:
+                await self._conectar()
+            except Exception as e:
+                logger.warning(f"Falha ao reconectar o barramento de notificações: {e!r}")
+                espera = min(espera * 2, 30)
+
+    async def publicar(self, evento: dict) -> None:
+        payload = json.dumps(evento, separators=(",", ":"), ensure_ascii=False)
+        if self._conexao is None or len(payload.encode("utf-8")) > _PAYLOAD_MAXIMO:
+            self._entregar_localmente(evento)
+            return
+        try:
+            async with self._lock:
+                await self._conexao.execute("SELECT pg_notify($1, $2)", self.canal, payload)
+            self.publicadas += 1
+        except Exception as e:
+            logger.error(f"Erro ao publicar no barramento de notificações: {e!r}")
+            self._entregar_localmente(evento)
+
+    def _entregar_localmente(self, evento: dict) -> None:
+        self.entregues_localmente += 1
+        logger.warning(f"Evento '{evento.get('mensagem', {}).get('type')}' entregue só neste worker")
+        self._ao_receber(evento)
+
+    async def parar(self) -> None:
+        self._parado = True
+        if self._reconexao is not None:
+            self._reconexao.cancel()
+        if self._conexao is not None:
+            conexao, self._conexao = self._conexao, None
+            try:
+                await conexao.close(timeout=5)
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "tipo": self.tipo,
+            "canal": self.canal,
+            "conectado": self._conexao is not None,
+            "publicadas": self.publicadas,
+            "recebidas": self.recebidas,
+            "entregues_localmente": self.entregues_localmente,
+        }
+
+
+def criar_bus():
+    """Barramento escolhido em NOTIFICATION_BUS ("postgres" ou "memoria")."""
+    if settings.NOTIFICATION_BUS == "memoria":
+        return MemoryNotificationBus()
+    if settings.NOTIFICATION_BUS != "postgres":
+        raise ValueError(f"NOTIFICATION_BUS inválido: {settings.NOTIFICATION_BUS} (use 'postgres' ou 'memoria')")
+    # O asyncpg recebe a URL sem o sufixo do driver do SQLAlchemy (postgresql+asyncpg://)
+    dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+    return PostgresNotificationBus(dsn, settings.NOTIFICATION_CHANNEL)
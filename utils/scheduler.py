@@ -2,7 +2,9 @@
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from services.alerta_service import AlertaService
+from services.bulk_jobs import bulk_upload_jobs
 from core.database import get_session_scheduler
+from core.token_revocation import token_revocation
 from core.configs import settings 
 import os
 from datetime import datetime, timedelta
@@ -14,6 +16,15 @@ async def tarefa_diaria():
         print("Verificando validade e estoque dos itens...")
         await AlertaService.generate_daily_alerts(db)
 
+async def tarefa_sincronizar_desativados():
+    # Usuários desativados/reativados direto no banco ou enquanto o barramento estava fora
+    async with get_session_scheduler() as db:
+        await token_revocation.carregar_desativados(db)
+
+async def tarefa_reconciliar_uploads():
+    # Jobs de upload em massa órfãos (worker reiniciado ou derrubado)
+    await bulk_upload_jobs.reconciliar_interrompidos()
+
 async def tarefa_limpar_relatorios():
     print("Iniciando tarefa de limpeza de relatórios antigos...")
     pasta_relatorios = settings.PASTA_RELATORIOS
@@ -1,115 +1,251 @@
 # utils/websocket_endpoints.py
 
-from fastapi import WebSocket, WebSocketDisconnect, APIRouter
-from typing import Dict, List, Optional
+import asyncio
+import json
+from fastapi import WebSocket, WebSocketDisconnect, APIRouter, HTTPException
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from core.configs import settings
+from core.security import decode_access_token
+from utils.logger import logger
 
 websocket_router = APIRouter()
 
+class _Conexao:
+    """
+    Uma conexão WebSocket com sua fila de saída limitada e a tarefa que a esvazia.
+    Quem notifica só enfileira (sem await); um cliente lento atrasa apenas a si mesmo.
+    """
+
+    def __init__(self, websocket: WebSocket, user_id: Optional[int], role: Optional[int], ao_falhar):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.role = role
+        self.fila: asyncio.Queue[str] = asyncio.Queue(maxsize=settings.WS_QUEUE_SIZE)
+        self._ao_falhar = ao_falhar
+        self.fechada = False
+        self._escritor = asyncio.create_task(self._escrever())
+
+    def enfileirar(self, texto: str) -> bool:
+        try:
+            self.fila.put_nowait(texto)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _escrever(self):
+        try:
+            # Confere o estado a cada mensagem: o wait_for do Python 3.11 pode engolir o
+            # cancelamento quando o envio termina no mesmo ciclo em que fechar() é chamado
+            while not self.fechada:
+                texto = await self.fila.get()
+                await asyncio.wait_for(
+                    self.websocket.send_text(texto), timeout=settings.WS_SEND_TIMEOUT_SECONDS
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Timeout, cliente desconectado ou socket quebrado
+            logger.warning(f"Falha ao enviar para WebSocket (user_id: {self.user_id}): {e!r}. Desconectando...")
+            self._ao_falhar(self)
+
+    def fechar(self, code: int = 1000):
+        """Para o escritor e fecha o socket em segundo plano (idempotente)."""
+        if self.fechada:
+            return
+        self.fechada = True
+        if self._escritor is not asyncio.current_task():
+            self._escritor.cancel()
+        if code != 1000:
+            asyncio.create_task(self._fechar_socket(code))
+
+    async def _fechar_socket(self, code: int):
+        try:
+            await asyncio.wait_for(self.websocket.close(code=code), timeout=settings.WS_SEND_TIMEOUT_SECONDS)
+        except Exception:
+            pass # O cliente já pode ter ido embora
+
+
 class ConnectionManager:
     def __init__(self):
-        # Dicionário para mapear usuario_id para uma lista de WebSockets ativos
-        self.active_connections: Dict[int, List[WebSocket]] = {}
+        # Dicionário para mapear usuario_id para uma lista de conexões ativas
+        self.active_connections: Dict[int, List[_Conexao]] = {}
         # Lista para conexões gerais (para alertas que não são específicos de usuário)
-        self.general_connections: List[WebSocket] = []
+        self.general_connections: List[_Conexao] = []
+        # tipo_usuario (do token verificado) -> conexões, para notificar um perfil sem consultar o banco
+        self.role_connections: Dict[int, List[_Conexao]] = {}
+        self._por_socket: Dict[WebSocket, _Conexao] = {}
+        self.descartadas = 0 # Conexões derrubadas por fila cheia ou falha de envio
+        # Barramento entre workers (utils.notification_bus); sem ele, entrega só neste processo
+        self.bus = None
+        # Destinos que não são de WebSocket (ex.: revogação de tokens) -> função que trata o evento
+        self._tratadores: Dict[str, Callable[[dict], None]] = {}
+
+    async def iniciar_bus(self, bus):
+        await bus.iniciar(self._entregar)
+        self.bus = bus
+
+    async def parar_bus(self):
+        if self.bus is not None:
+            bus, self.bus = self.bus, None
+            await bus.parar()
+
+    def registrar_tratador(self, destino: str, tratador: Callable[[dict], None]):
+        """Trata em todos os workers os eventos publicados com publicar_evento(destino, ...)."""
+        self._tratadores[destino] = tratador
+
+    async def publicar_evento(self, destino: str, message: dict):
+        """Publica no barramento um evento para o tratador registrado no destino."""
+        await self._publicar(destino, None, message)
+
+    async def _publicar(self, destino: str, alvo, message: dict):
+        evento = {"destino": destino, "alvo": alvo, "mensagem": message}
+        if self.bus is None:
+            self._entregar(evento)
+        else:
+            await self.bus.publicar(evento)
+
+    def _entregar(self, evento: dict):
+        """Recebe um evento do barramento e o enfileira nas conexões deste worker."""
+        message = evento["mensagem"]
+        if evento["destino"] == "todos":
+            self._broadcast_local(message)
+        elif evento["destino"] == "usuario":
+            self._send_to_user_local(evento["alvo"], message)
+        elif evento["destino"] == "tipo_usuario":
+            self._send_to_role_local(evento["alvo"], message)
+        elif evento["destino"] in self._tratadores:
+            try:
+                self._tratadores[evento["destino"]](message)
+            except Exception as e:
+                logger.error(f"Erro ao tratar evento '{evento['destino']}' do barramento: {e!r}")
+        else:
+            logger.warning(f"Destino de notificação desconhecido: {evento['destino']}")
 
-    async def connect(self, websocket: WebSocket, user_id: int = None):
+    async def connect(self, websocket: WebSocket, user_id: int = None, role: int = None):
         await websocket.accept()
+        conexao = _Conexao(websocket, user_id, role, self._descartar)
+        self._por_socket[websocket] = conexao
+        if role is not None:
+            self.role_connections.setdefault(role, []).append(conexao)
         if user_id:
-            if user_id not in self.active_connections:
-                self.active_connections[user_id] = []
-            self.active_connections[user_id].append(websocket)
+            self.active_connections.setdefault(user_id, []).append(conexao)
             print(f"WebSocket conectado para o usuário {user_id}. Total de conexões para este usuário: {len(self.active_connections[user_id])}")
         else:
-            self.general_connections.append(websocket)
+            self.general_connections.append(conexao)
             print(f"WebSocket conectado como conexão geral. Total: {len(self.general_connections)}")
 
-
     def disconnect(self, websocket: WebSocket, user_id: int = None):
-        if user_id and user_id in self.active_connections:
-            try:
-                self.active_connections[user_id].remove(websocket)
-                if not self.active_connections[user_id]:
-                    del self.active_connections[user_id] # Remove a entrada se não houver mais conexões
-                print(f"WebSocket desconectado para o usuário {user_id}.")
-            except ValueError:
-                pass # Conexão já removida ou não encontrada
-        else:
-            try:
-                self.general_connections.remove(websocket)
-                print("Conexão WebSocket geral desconectada.")
-            except ValueError:
-                pass # Conexão já removida ou não encontrada
+        conexao = self._por_socket.get(websocket)
+        if conexao is not None:
+            self._remover(conexao)
+            print(f"WebSocket desconectado (user_id: {user_id}).")
 
+    def _remover(self, conexao: _Conexao, code: int = 1000):
+        self._por_socket.pop(conexao.websocket, None)
+        if conexao.role is not None and conexao in self.role_connections.get(conexao.role, []):
+            self.role_connections[conexao.role].remove(conexao)
+            if not self.role_connections[conexao.role]:
+                del self.role_connections[conexao.role]
+        if conexao.user_id and conexao.user_id in self.active_connections:
+            conexoes = self.active_connections[conexao.user_id]
+            if conexao in conexoes:
+                conexoes.remove(conexao)
+            if not conexoes:
+                del self.active_connections[conexao.user_id] # Remove a entrada se não houver mais conexões
+        elif conexao in self.general_connections:
+            self.general_connections.remove(conexao)
+        conexao.fechar(code)
 
-    async def broadcast(self, message: dict):
-        print(f"Attempting to broadcast message: {message}") # Log de depuração
+    def _descartar(self, conexao: _Conexao):
+        if conexao.fechada:
+            return
+        self.descartadas += 1
+        # 1013 (try again later): o cliente pode reconectar e recarregar o estado pela API
+        self._remover(conexao, code=1013)
 
-        # Envia para conexões gerais
-        for connection in list(self.general_connections): # Iterar sobre uma cópia para permitir remoção
-            try:
-                await connection.send_json(message)
-            except RuntimeError as e:
-                print(f"Erro ao enviar mensagem para WebSocket geral: {e}. Desconectando...")
-                self.general_connections.remove(connection)
-            except WebSocketDisconnect:
-                print("Conexão WebSocket geral já desconectada durante o broadcast.")
-                self.general_connections.remove(connection)
-            except Exception as e:
-                print(f"Erro inesperado no broadcast para WebSocket geral: {e}")
-                self.general_connections.remove(connection)
-        
-        #  Envia também para todas as conexões ativas de usuários específicos
-        for user_id, connections in list(self.active_connections.items()):
-            for connection in list(connections): # Iterar sobre uma cópia para permitir remoção
-                try:
-                    await connection.send_json(message)
-                except RuntimeError as e:
-                    print(f"Erro ao enviar mensagem para WebSocket do usuário {user_id} durante broadcast: {e}. Desconectando...")
-                    connections.remove(connection)
-                except WebSocketDisconnect:
-                    print(f"Conexão WebSocket do usuário {user_id} já desconectada durante broadcast.")
-                    connections.remove(connection)
-                except Exception as e:
-                    print(f"Erro inesperado no broadcast para WebSocket do usuário {user_id}: {e}")
-                    connections.remove(connection)
-            # Limpa listas de conexões de usuário vazias
-            if not connections:
-                del self.active_connections[user_id]
+    @staticmethod
+    def _serializar(message: dict) -> str:
+        # Mesmo formato do send_json do Starlette, feito uma vez por mensagem
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
 
+    def _enviar(self, conexoes: List[_Conexao], texto: str) -> int:
+        entregues = 0
+        for conexao in list(conexoes): # Cópia: descartar altera as listas
+            if conexao.enfileirar(texto):
+                entregues += 1
+            else:
+                logger.warning(f"Fila do WebSocket cheia (user_id: {conexao.user_id}); cliente lento desconectado")
+                self._descartar(conexao)
+        return entregues
+
+    async def broadcast(self, message: dict):
+        """Envia a mensagem para todas as conexões (gerais e de usuários) de todos os workers."""
+        await self._publicar("todos", None, message)
 
     async def send_to_user(self, user_id: int, message: dict):
-        print(f"Attempting to send message to user {user_id}: {message}") # Log de depuração
-        if user_id in self.active_connections:
-            for connection in list(self.active_connections[user_id]):
-                try:
-                    await connection.send_json(message)
-                except RuntimeError as e:
-                    print(f"Erro ao enviar mensagem para WebSocket do usuário {user_id}: {e}. Desconectando...")
-                    self.active_connections[user_id].remove(connection)
-                except WebSocketDisconnect:
-                    print(f"Conexão WebSocket do usuário {user_id} já desconectada.")
-                    self.active_connections[user_id].remove(connection)
-                except Exception as e:
-                    print(f"Erro inesperado ao enviar para WebSocket do usuário {user_id}: {e}")
-                    self.active_connections[user_id].remove(connection)
-            # Limpa a lista de conexões de usuário vazia após iterar
-            if not self.active_connections[user_id]:
-                del self.active_connections[user_id]
-        else:
-            print(f"Nenhuma conexão WebSocket ativa para o usuário {user_id}.")
+        """Envia a mensagem para todas as conexões do usuário, em qualquer worker."""
+        await self._publicar("usuario", user_id, message)
+
+    async def send_to_role(self, roles: Union[int, Iterable[int]], message: dict):
+        """Envia a mensagem para as conexões autenticadas de um ou mais tipos de usuário."""
+        roles = [int(roles)] if isinstance(roles, int) else [int(role) for role in roles]
+        await self._publicar("tipo_usuario", roles, message)
+
+    def _broadcast_local(self, message: dict):
+        texto = self._serializar(message)
+        conexoes = list(self.general_connections)
+        for conexoes_usuario in self.active_connections.values():
+            conexoes.extend(conexoes_usuario)
+        entregues = self._enviar(conexoes, texto)
+        logger.debug(f"Broadcast '{message.get('type')}' enfileirado para {entregues} conexões")
+
+    def _send_to_user_local(self, user_id: int, message: dict):
+        conexoes = self.active_connections.get(user_id)
+        if not conexoes:
+            logger.debug(f"Nenhuma conexão WebSocket ativa para o usuário {user_id}.")
+            return
+        self._enviar(conexoes, self._serializar(message))
+
+    def _send_to_role_local(self, roles: List[int], message: dict):
+        conexoes = [conexao for role in roles for conexao in self.role_connections.get(role, [])]
+        if not conexoes:
+            logger.debug(f"Nenhuma conexão WebSocket ativa para os tipos de usuário {roles}.")
+            return
+        self._enviar(conexoes, self._serializar(message))
+
+    def stats(self) -> dict:
+        conexoes = list(self._por_socket.values())
+        return {
+            "conexoes": len(conexoes),
+            "usuarios": len(self.active_connections),
+            "por_tipo_usuario": {role: len(conexoes) for role, conexoes in self.role_connections.items()},
+            "mensagens_na_fila": sum(conexao.fila.qsize() for conexao in conexoes),
+            "descartadas": self.descartadas,
+            "barramento": self.bus.stats() if self.bus is not None else None,
+        }
 
 
 manager = ConnectionManager() # Instancia o ConnectionManager globalmente
 
 @websocket_router.websocket("/ws/alerts")
 async def websocket_endpoint(websocket: WebSocket):
-    # O user_id será passado como um query parameter do frontend
+    # O usuário e o tipo vêm do token verificado: cookie access_token (enviado pelo navegador
+    # no handshake) ou query parameter token. Sem token, vale o user_id legado, sem tipo.
     # Exemplo: ws://localhost:8082/api/almoxarifado/ws/alerts?user_id=123
-    
-    #  Obter user_id explicitamente dos query parameters
+    token: Optional[str] = websocket.cookies.get("access_token") or websocket.query_params.get("token")
     user_id_str: Optional[str] = websocket.query_params.get("user_id")
     user_id: Optional[int] = None
-    if user_id_str:
+    role: Optional[int] = None
+    if token:
+        try:
+            payload = decode_access_token(token)
+        except HTTPException:
+            await websocket.close(code=1008, reason="Invalid token")
+            return
+        user_id = payload.get("usuario_id")
+        role = payload.get("tipo_usuario")
+    elif user_id_str:
         try:
             user_id = int(user_id_str)
         except ValueError:
@@ -117,7 +253,7 @@ async def websocket_endpoint(websocket: WebSocket):
             await websocket.close(code=1003, reason="Invalid user_id format")
             return
 
-    await manager.connect(websocket, user_id)
+    await manager.connect(websocket, user_id, role)
     try:
         while True:
             # Mantém a conexão viva. Se não esperamos mensagens do cliente, ele simplesmente aguarda.